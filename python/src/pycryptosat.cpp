@@ -29,7 +29,25 @@ THE SOFTWARE.
 #include <limits>
 #include <cassert>
 #include <algorithm>
+#include <chrono>
+#include <atomic>
+#include <memory>
+#include <mutex>
+#include <thread>
+#include <map>
+#include <string>
+#include <cstring>
+#ifdef _WIN32
+#include <process.h>
+#define getpid _getpid
+#else
+#include <unistd.h>
+#endif
 #include "../../src/cryptominisat.h"
+#include "../../src/dimacsparser.h"
+#include "../../src/opbparser.h"
+#include "../../src/pbencoder.h"
+#include "../../src/time_mem.h"
 using namespace CMSat;
 
 #define MODULE_NAME "pycryptosat"
@@ -40,20 +58,393 @@ using namespace CMSat;
 PyMODINIT_FUNC PyInit_ ## name(void); \
 PyMODINIT_FUNC PyInit_ ## name(void)
 
+// State shared between a Solver and interrupt(). SATSolver::interrupt_asap()
+// can be lost if it is called just before the solver resets its interrupt
+// flag at the start of a solve, so while an interrupted solve runs, a
+// watcher thread keeps calling it until the solve returns. The watcher only
+// uses this struct, which it co-owns, and never needs the GIL.
+struct SolveControl {
+    std::mutex mu;
+    SATSolver* cmsat = NULL;    // guarded by mu
+    bool solving = false;       // guarded by mu
+    bool watching = false;      // guarded by mu
+    std::atomic<bool> interrupted{false};
+
+    // Progress of the running or last backbone(...) call
+    std::atomic<uint64_t> backbone_candidates{0};
+    std::atomic<uint64_t> backbone_found{0};
+    std::atomic<uint64_t> backbone_rejected{0};
+    std::atomic<uint64_t> backbone_solves{0};
+};
+
+// Statistics of the last solve-like call, see last_stats()
+struct CallStats {
+    const char* call;           // NULL before the first call
+    double wall_time;
+    double cpu_time;
+    double search_time;
+    uint64_t conflicts;
+    uint64_t propagations;
+    uint64_t decisions;
+    long long peak_memory;      // -1 if unknown
+};
+
+struct SolverConfig;
+struct Reconstruction;
+static void delete_reconstruction(Reconstruction* rec);
+
 typedef struct {
     PyObject_HEAD
     /* Type-specific fields go here. */
     SATSolver* cmsat;
+    SolverConfig* config;
+    Reconstruction* reconstruction; // if the formula was simplified elsewhere
     std::vector<Lit> tmp_cl_lits;
 
     int verbose;
     double time_limit;
     long confl_limit;
+    lbool last_result;
+    std::shared_ptr<SolveControl>* control;
+    int async_running;
+    CallStats last_stats;
+    char single_run;
+    unsigned long num_solves;
 } Solver;
 typedef void (*sighandler_t)(int);
 
+static PyTypeObject* solver_type();
+
+/*************************** Buffer *************************/
+
+// Owns the memory behind a Buffer object. The data is moved in from a
+// std::vector, so handing results over to Python does not copy them.
+struct BufferStorage {
+    virtual ~BufferStorage() {}
+    virtual void* data() = 0;
+};
+
+template <typename T>
+struct VectorStorage : public BufferStorage {
+    explicit VectorStorage(std::vector<T>&& _vec) : vec(std::move(_vec)) {}
+    void* data() override { return vec.data(); }
+    std::vector<T> vec;
+};
+
+typedef struct {
+    PyObject_HEAD
+    BufferStorage* storage;
+    char format[4];
+    int ndim;
+    Py_ssize_t itemsize;
+    Py_ssize_t shape[2];
+    Py_ssize_t strides[2];
+} Buffer;
+
+static const char buffer_docstring[] = \
+"Read-write, C-contiguous array returned by the solver.\n\
+\n\
+Supports the buffer protocol, so it can be wrapped without copying by e.g.\n\
+numpy.asarray(buf) or memoryview(buf).";
+
+static int Buffer_getbuffer(Buffer* self, Py_buffer* view, int flags)
+{
+    view->obj = (PyObject*)self;
+    Py_INCREF(self);
+    view->buf = self->storage->data();
+    view->len = self->itemsize;
+    for (int i = 0; i < self->ndim; i++) {
+        view->len *= self->shape[i];
+    }
+    view->readonly = 0;
+    view->itemsize = self->itemsize;
+    view->format = (flags & PyBUF_FORMAT) ? self->format : NULL;
+    view->ndim = self->ndim;
+    view->shape = (flags & PyBUF_ND) ? self->shape : NULL;
+    view->strides = ((flags & PyBUF_STRIDES) == PyBUF_STRIDES) ? self->strides : NULL;
+    view->suboffsets = NULL;
+    view->internal = NULL;
+    return 0;
+}
+
+static Py_ssize_t Buffer_len(Buffer* self)
+{
+    return self->shape[0];
+}
+
+static void Buffer_dealloc(Buffer* self)
+{
+    delete self->storage;
+    PyObject_Del(self);
+}
+
+static PyBufferProcs Buffer_as_buffer = {
+    (getbufferproc)Buffer_getbuffer,   /* bf_getbuffer */
+    NULL,                              /* bf_releasebuffer */
+};
+
+static PySequenceMethods Buffer_as_sequence = {
+    (lenfunc)Buffer_len,        /* sq_length */
+};
+
+static PyTypeObject pycryptosat_BufferType = {
+    PyVarObject_HEAD_INIT(NULL, 0) /*ob_size*/
+    "pycryptosat.Buffer",       /*tp_name*/
+    sizeof(Buffer),             /*tp_basicsize*/
+    0,                          /*tp_itemsize*/
+    (destructor)Buffer_dealloc, /*tp_dealloc*/
+    0,                          /*tp_print*/
+    0,                          /*tp_getattr*/
+    0,                          /*tp_setattr*/
+    0,                          /*tp_compare*/
+    0,                          /*tp_repr*/
+    0,                          /*tp_as_number*/
+    &Buffer_as_sequence,        /*tp_as_sequence*/
+    0,                          /*tp_as_mapping*/
+    0,                          /*tp_hash */
+    0,                          /*tp_call*/
+    0,                          /*tp_str*/
+    0,                          /*tp_getattro*/
+    0,                          /*tp_setattro*/
+    &Buffer_as_buffer,          /*tp_as_buffer*/
+    Py_TPFLAGS_DEFAULT,         /*tp_flags*/
+    buffer_docstring,           /* tp_doc */
+};
+
+// Wrap the contents of vec into a new Buffer object. If rows is given, the
+// buffer is 2-D with shape (rows, vec.size()/rows), otherwise it is 1-D.
+template <typename T>
+static PyObject* new_buffer(std::vector<T>&& vec, const char* format, Py_ssize_t rows = -1)
+{
+    Buffer* buf = PyObject_New(Buffer, &pycryptosat_BufferType);
+    if (buf == NULL) {
+        return NULL;
+    }
+    const Py_ssize_t num = (Py_ssize_t)vec.size();
+    buf->storage = new VectorStorage<T>(std::move(vec));
+    strncpy(buf->format, format, sizeof(buf->format)-1);
+    buf->format[sizeof(buf->format)-1] = 0;
+    buf->itemsize = sizeof(T);
+    if (rows < 0) {
+        buf->ndim = 1;
+        buf->shape[0] = num;
+        buf->shape[1] = 0;
+        buf->strides[0] = sizeof(T);
+        buf->strides[1] = 0;
+    } else {
+        buf->ndim = 2;
+        buf->shape[0] = rows;
+        buf->shape[1] = rows == 0 ? 0 : num/rows;
+        buf->strides[0] = buf->shape[1]*sizeof(T);
+        buf->strides[1] = sizeof(T);
+    }
+    return (PyObject*)buf;
+}
+
+/*************************** Configuration *************************/
+
+// A configuration option of the Solver constructor, mapped to a SATSolver
+// setter. All values are passed as doubles, which hold any uint32_t.
+struct SolverOption {
+    enum Type { flag, uint32, positive_real, polarity };
+
+    const char* name;
+    Type type;
+    void (*apply)(SATSolver* cmsat, double value);
+};
+
+static const SolverOption solver_options[] = {
+    {"seed", SolverOption::uint32, [](SATSolver* s, double v) { s->set_seed((uint32_t)v); }},
+    {"polarity", SolverOption::polarity, [](SATSolver* s, double v) { s->set_polarity_mode((PolarityMode)(int)v); }},
+    {"simplify", SolverOption::flag, [](SATSolver* s, double v) { s->set_simplify(v != 0); }},
+    {"simplify_at_startup", SolverOption::flag, [](SATSolver* s, double v) { if (v == 0) s->set_no_simplify_at_startup(); }},
+    {"bve", SolverOption::flag, [](SATSolver* s, double v) { s->set_bve(v != 0); }},
+    {"full_bve", SolverOption::flag, [](SATSolver* s, double v) { s->set_full_bve(v != 0); }},
+    {"scc", SolverOption::flag, [](SATSolver* s, double v) { s->set_scc(v != 0); }},
+    {"distill", SolverOption::flag, [](SATSolver* s, double v) { s->set_distill(v != 0); }},
+    {"intree_probe", SolverOption::flag, [](SATSolver* s, double v) { s->set_intree_probe(v != 0); }},
+    {"renumber", SolverOption::flag, [](SATSolver* s, double v) { s->set_renumber(v != 0); }},
+    {"find_xors", SolverOption::flag, [](SATSolver* s, double v) { s->set_find_xors(v != 0); }},
+    {"otf_gauss", SolverOption::flag, [](SATSolver* s, double v) { if (v != 0) s->set_allow_otf_gauss(); }},
+    {"sls", SolverOption::flag, [](SATSolver* s, double v) { s->set_sls(v != 0); }},
+    {"single_run", SolverOption::flag, [](SATSolver* s, double v) { if (v != 0) s->set_single_run(); }},
+    {"timeout_multiplier", SolverOption::positive_real, [](SATSolver* s, double v) { s->set_orig_global_timeout_multiplier(v); }},
+    {NULL, SolverOption::flag, NULL}
+};
+
+// Same names as the --polar option of the cryptominisat5 binary
+static const struct { const char* name; PolarityMode mode; } polarity_modes[] = {
+    {"true", PolarityMode::polarmode_pos},
+    {"false", PolarityMode::polarmode_neg},
+    {"rnd", PolarityMode::polarmode_rnd},
+    {"auto", PolarityMode::polarmode_automatic},
+    {"stable", PolarityMode::polarmode_best},
+    {NULL, PolarityMode::polarmode_automatic}
+};
+
+struct SolverPreset {
+    const char* name;
+    std::vector<std::pair<const char*, double>> values;
+};
+
+static const SolverPreset solver_presets[] = {
+    // Many cheap incremental calls: start searching right away, keep the
+    // inprocessing between calls short and skip the steps whose setup cost
+    // dominates small queries
+    {"incremental-fast-startup", {{"simplify_at_startup", 0}, {"sls", 0}, {"renumber", 0}, {"timeout_multiplier", 0.5}}},
+    // One solve() only, which lets the solver drop bookkeeping kept for
+    // later calls
+    {"single-shot-max-throughput", {{"single_run", 1}}},
+    // Formulas with many XOR constraints: keep them and use Gaussian
+    // elimination on them instead of breaking them up
+    {"xor-heavy", {{"find_xors", 1}, {"otf_gauss", 1}}},
+    {NULL, {}}
+};
+
+static const SolverOption* find_solver_option(const char* name)
+{
+    for (const SolverOption* opt = solver_options; opt->name != NULL; opt++) {
+        if (strcmp(opt->name, name) == 0) {
+            return opt;
+        }
+    }
+    return NULL;
+}
+
+// Converts the value of an option, raising TypeError or ValueError
+static int convert_option_value(const SolverOption& opt, PyObject* value, double& out)
+{
+    switch (opt.type) {
+        case SolverOption::flag:
+            if (!PyBool_Check(value)) {
+                PyErr_Format(PyExc_TypeError, "option '%s' must be a bool", opt.name);
+                return 0;
+            }
+            out = value == Py_True;
+            return 1;
+        case SolverOption::uint32: {
+            if (!PyLong_Check(value)) {
+                PyErr_Format(PyExc_TypeError, "option '%s' must be an int", opt.name);
+                return 0;
+            }
+            const long long v = PyLong_AsLongLong(value);
+            if ((v == -1 && PyErr_Occurred()) || v < 0 || v > std::numeric_limits<uint32_t>::max()) {
+                PyErr_Clear();
+                PyErr_Format(PyExc_ValueError, "option '%s' must be between 0 and %u",
+                    opt.name, std::numeric_limits<uint32_t>::max());
+                return 0;
+            }
+            out = (double)v;
+            return 1;
+        }
+        case SolverOption::positive_real:
+            out = PyFloat_AsDouble(value);
+            if (out == -1.0 && PyErr_Occurred()) {
+                return 0;
+            }
+            if (!(out > 0)) {
+                PyErr_Format(PyExc_ValueError, "option '%s' must be positive", opt.name);
+                return 0;
+            }
+            return 1;
+        case SolverOption::polarity: {
+            const char* name = PyUnicode_Check(value) ? PyUnicode_AsUTF8(value) : NULL;
+            if (name == NULL) {
+                PyErr_Clear();
+                PyErr_Format(PyExc_TypeError, "option '%s' must be a str", opt.name);
+                return 0;
+            }
+            for (size_t i = 0; polarity_modes[i].name != NULL; i++) {
+                if (strcmp(polarity_modes[i].name, name) == 0) {
+                    out = (double)(int)polarity_modes[i].mode;
+                    return 1;
+                }
+            }
+            PyErr_Format(PyExc_ValueError,
+                "option '%s' must be 'true', 'false', 'rnd', 'auto' or 'stable', not '%s'", opt.name, name);
+            return 0;
+        }
+    }
+    return 0;
+}
+
+// Sets an option, replacing the value it already has, e.g. from a preset
+static void set_option(
+    std::vector<std::pair<const SolverOption*, double>>& options
+    , const SolverOption* opt
+    , double value
+) {
+    for (auto& option: options) {
+        if (option.first == opt) {
+            option.second = value;
+            return;
+        }
+    }
+    options.push_back(std::make_pair(opt, value));
+}
+
+// Moves the configuration options out of kwds into options, converted, the
+// explicit ones overriding the values of the preset. Returns the remaining keyword arguments, a new
+// reference, or NULL with an exception set.
+static PyObject* pop_solver_options(
+    PyObject* kwds
+    , std::vector<std::pair<const SolverOption*, double>>& options
+) {
+    if (kwds == NULL) {
+        return PyDict_New();
+    }
+    PyObject* rest = PyDict_Copy(kwds);
+    if (rest == NULL) {
+        return NULL;
+    }
+
+    PyObject* preset = PyDict_GetItemString(kwds, "preset");
+    if (preset != NULL && preset != Py_None) {
+        const char* name = PyUnicode_Check(preset) ? PyUnicode_AsUTF8(preset) : NULL;
+        const SolverPreset* found = NULL;
+        for (const SolverPreset* p = solver_presets; name != NULL && p->name != NULL; p++) {
+            if (strcmp(p->name, name) == 0) {
+                found = p;
+            }
+        }
+        if (found == NULL) {
+            PyErr_Clear();
+            PyErr_SetString(PyExc_ValueError, "preset must be 'incremental-fast-startup', "
+                "'single-shot-max-throughput' or 'xor-heavy'");
+            Py_DECREF(rest);
+            return NULL;
+        }
+        for (const auto& value: found->values) {
+            set_option(options, find_solver_option(value.first), value.second);
+        }
+    }
+    if (preset != NULL && PyDict_DelItemString(rest, "preset") != 0) {
+        Py_DECREF(rest);
+        return NULL;
+    }
+
+    PyObject *key, *value;
+    Py_ssize_t pos = 0;
+    while (PyDict_Next(kwds, &pos, &key, &value)) {
+        const char* name = PyUnicode_Check(key) ? PyUnicode_AsUTF8(key) : NULL;
+        const SolverOption* opt = name != NULL ? find_solver_option(name) : NULL;
+        if (opt == NULL) {
+            // Left for PyArg_ParseTupleAndKeywords() to check
+            PyErr_Clear();
+            continue;
+        }
+        double converted;
+        if (!convert_option_value(*opt, value, converted) || PyDict_DelItem(rest, key) != 0) {
+            Py_DECREF(rest);
+            return NULL;
+        }
+        set_option(options, opt, converted);
+    }
+    return rest;
+}
+
 static const char solver_create_docstring[] = \
-"Solver(verbose=0, time_limit=max_numeric_limits, confl_limit=max_numeric_limits, threads=1)\n\
+"Solver(verbose=0, time_limit=max_numeric_limits, confl_limit=max_numeric_limits, threads=1, preset=None, **options)\n\
 Create Solver object.\n\
 \n\
 :param verbose: Verbosity level: 0: nothing printed; 15: very verbose.\n\
@@ -61,53 +452,248 @@ Create Solver object.\n\
 :param confl_limit: Propagation limit: abort after this many conflicts.\n\
     Default: never abort.\n\
 :param threads: Number of threads to use.\n\
+:param preset: Named set of options tuned for a kind of workload:\n\
+    'incremental-fast-startup' for many cheap incremental solves,\n\
+    'single-shot-max-throughput' for a single solve() call,\n\
+    'xor-heavy' for problems with many XOR constraints. Options given\n\
+    explicitly override the values of the preset.\n\
+:param options: Keyword-only configuration of the solver:\n\
+    seed (int), polarity ('true', 'false', 'rnd', 'auto' or 'stable'),\n\
+    timeout_multiplier (float, scales the time spent in inprocessing), and\n\
+    the bools simplify, simplify_at_startup, bve, full_bve, scc, distill,\n\
+    intree_probe, renumber, find_xors, otf_gauss, sls and single_run.\n\
+    simplify=False turns off all simplification, while\n\
+    simplify_at_startup=False only skips it before the first search. With\n\
+    single_run=True, the solver can only be solved once.\n\
 :type verbose: <int>\n\
 :type time_limit: <double>\n\
 :type confl_limit: <long>\n\
-:type threads: <int>";
+:type threads: <int>\n\
+:type preset: <str>";
 
-static void setup_solver(Solver *self, PyObject *args, PyObject *kwds)
+// The arguments of Solver(), kept to set up more solvers the same way
+struct SolverConfig {
+    int verbose = 0;
+    double time_limit = std::numeric_limits<double>::max();
+    long confl_limit = std::numeric_limits<long>::max();
+    int num_threads = 1;
+    std::vector<std::pair<const SolverOption*, double>> options;
+};
+
+static int parse_solver_config(PyObject *args, PyObject *kwds, SolverConfig& config)
 {
     static char const* kwlist[] = {"verbose", "time_limit", "confl_limit", "threads", NULL};
 
-    int num_threads = 1;
-    self->cmsat = NULL;
-    self->verbose = 0;
-    self->time_limit = std::numeric_limits<double>::max();
-    self->confl_limit = std::numeric_limits<long>::max();
-
-    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|idli",  const_cast<char**>(kwlist),
-        &self->verbose, &self->time_limit, &self->confl_limit, &num_threads))
-    {
-        return;
+    PyObject* rest = pop_solver_options(kwds, config.options);
+    if (rest == NULL) {
+        return 0;
+    }
+    const int parsed = PyArg_ParseTupleAndKeywords(args, rest, "|idli",  const_cast<char**>(kwlist),
+        &config.verbose, &config.time_limit, &config.confl_limit, &config.num_threads);
+    Py_DECREF(rest);
+    if (!parsed) {
+        return 0;
     }
 
-    if (self->verbose < 0) {
+    if (config.verbose < 0) {
         PyErr_SetString(PyExc_ValueError, "verbosity must be at least 0");
-        return;
+        return 0;
     }
-    if (self->time_limit < 0) {
+    if (config.time_limit < 0) {
         PyErr_SetString(PyExc_ValueError, "time_limit must be at least 0");
-        return;
+        return 0;
     }
-    if (self->confl_limit < 0) {
+    if (config.confl_limit < 0) {
         PyErr_SetString(PyExc_ValueError, "conflict limit must be at least 0");
-        return;
+        return 0;
     }
-    if (num_threads <= 0) {
+    if (config.num_threads <= 0) {
         PyErr_SetString(PyExc_ValueError, "number of threads must be at least 1");
-        return;
+        return 0;
+    }
+    return 1;
+}
+
+// Does not need the GIL
+static SATSolver* new_configured_solver(const SolverConfig& config)
+{
+    SATSolver* cmsat = new SATSolver;
+    cmsat->set_verbosity(config.verbose);
+    cmsat->set_max_time(config.time_limit);
+    cmsat->set_max_confl(config.confl_limit);
+    cmsat->set_num_threads(config.num_threads);
+    for (const auto& option: config.options) {
+        option.first->apply(cmsat, option.second);
     }
+    return cmsat;
+}
 
-    self->cmsat = new SATSolver;
-    self->cmsat->set_verbosity(self->verbose);
-    self->cmsat->set_max_time(self->time_limit);
-    self->cmsat->set_max_confl(self->confl_limit);
-    self->cmsat->set_num_threads(num_threads);
+static bool is_single_run(const SolverConfig& config)
+{
+    for (const auto& option: config.options) {
+        if (strcmp(option.first->name, "single_run") == 0) {
+            return option.second != 0;
+        }
+    }
+    return false;
+}
+
+// Sets up a new solver for self, which has none
+static void init_solver(Solver *self, const SolverConfig& config)
+{
+    self->verbose = config.verbose;
+    self->time_limit = config.time_limit;
+    self->confl_limit = config.confl_limit;
+
+    self->cmsat = new_configured_solver(config);
+    delete self->config;
+    self->config = new SolverConfig(config);
+    delete_reconstruction(self->reconstruction);
+    self->reconstruction = NULL;
+    self->last_result = l_Undef;
+    self->last_stats.call = NULL;
+    if (self->control == NULL) {
+        self->control = new std::shared_ptr<SolveControl>(new SolveControl);
+    }
+    (*self->control)->cmsat = self->cmsat;
+    self->async_running = 0;
+    self->single_run = is_single_run(config);
+    self->num_solves = 0;
+}
+
+static void setup_solver(Solver *self, PyObject *args, PyObject *kwds)
+{
+    self->cmsat = NULL;
+
+    SolverConfig config;
+    if (!parse_solver_config(args, kwds, config)) {
+        return;
+    }
+    init_solver(self, config);
 
     return;
 }
 
+// Marks the start and the end of a solve that interrupt() may stop. Called
+// with the GIL held, like interrupt(), so that an interrupt() right before
+// the solve starts is not missed.
+static void set_solving(Solver *self, bool solving)
+{
+    SolveControl *ctl = self->control->get();
+    std::lock_guard<std::mutex> lock(ctl->mu);
+    ctl->solving = solving;
+    if (solving) {
+        self->num_solves++;
+    }
+}
+
+// SATSolver exits the process if a solver set up with single_run is solved
+// twice, so raise an exception instead. num_calls is the number of solves
+// the caller is about to make.
+static int check_single_run(Solver *self, size_t num_calls = 1)
+{
+    if (self->single_run && self->num_solves + num_calls > 1) {
+        PyErr_SetString(PyExc_RuntimeError, "solver created with single_run=True can only be solved once");
+        return 0;
+    }
+    return 1;
+}
+
+// Keeps interrupting the solver until the interrupted solve returns
+static void watch_interrupt(std::shared_ptr<SolveControl> ctl)
+{
+    for (;;) {
+        {
+            std::lock_guard<std::mutex> lock(ctl->mu);
+            if (!ctl->solving || !ctl->interrupted.load() || ctl->cmsat == NULL) {
+                ctl->watching = false;
+                return;
+            }
+            ctl->cmsat->interrupt_asap();
+        }
+        std::this_thread::sleep_for(std::chrono::milliseconds(1));
+    }
+}
+
+static void request_interrupt(Solver *self)
+{
+    SolveControl *ctl = self->control->get();
+    ctl->interrupted.store(true);
+    std::lock_guard<std::mutex> lock(ctl->mu);
+    if (!ctl->solving) {
+        return;
+    }
+    ctl->cmsat->interrupt_asap();
+    if (!ctl->watching) {
+        try {
+            std::thread(watch_interrupt, *self->control).detach();
+            ctl->watching = true;
+        } catch (const std::system_error&) {
+            // No thread: the single interrupt_asap() above has to do
+        }
+    }
+}
+
+static int is_interrupted(Solver *self)
+{
+    return (*self->control)->interrupted.load();
+}
+
+static void clear_interrupt(Solver *self)
+{
+    (*self->control)->interrupted.store(false);
+}
+
+// Peak resident memory of the process in bytes, -1 if unknown
+static long long peak_memory_bytes()
+{
+    #if defined(_MSC_VER) || defined(__MINGW32__) || defined(_WIN32) || defined(EMSCRIPTEN)
+    return -1;
+    #else
+    struct rusage ru;
+    if (getrusage(RUSAGE_SELF, &ru) != 0) {
+        return -1;
+    }
+    #if defined(__APPLE__)
+    return ru.ru_maxrss;
+    #else
+    return (long long)ru.ru_maxrss * 1024;
+    #endif
+    #endif
+}
+
+// Measures a solve-like call for last_stats(). Does not need the GIL.
+struct CallStatsTimer {
+    std::chrono::steady_clock::time_point wall;
+    double cpu;
+    double search_time;
+    uint64_t conflicts;
+    uint64_t propagations;
+    uint64_t decisions;
+
+    explicit CallStatsTimer(SATSolver *cmsat) :
+        wall(std::chrono::steady_clock::now())
+        , cpu(cpuTime())
+        , search_time(cmsat->get_sum_search_time())
+        , conflicts(cmsat->get_sum_conflicts())
+        , propagations(cmsat->get_sum_propagations())
+        , decisions(cmsat->get_sum_decisions())
+    {}
+
+    void stop(SATSolver *cmsat, const char* call, CallStats& stats) const
+    {
+        const std::chrono::duration<double> wall_time = std::chrono::steady_clock::now() - wall;
+        stats.call = call;
+        stats.wall_time = wall_time.count();
+        stats.cpu_time = cpuTime() - cpu;
+        stats.search_time = cmsat->get_sum_search_time() - search_time;
+        stats.conflicts = cmsat->get_sum_conflicts() - conflicts;
+        stats.propagations = cmsat->get_sum_propagations() - propagations;
+        stats.decisions = cmsat->get_sum_decisions() - decisions;
+        stats.peak_memory = peak_memory_bytes();
+    }
+};
+
 static int convert_lit_to_sign_and_var(PyObject* lit, long& var, bool& sign)
 {
     if (!IS_INT(lit))  {
@@ -253,97 +839,488 @@ static PyObject* add_clause(Solver *self, PyObject *args, PyObject *kwds)
 }
 
 
-template <typename T>
-static int _add_clauses_from_array(Solver *self, const size_t array_length, const T *array)
+// Number of variables the core supports, MAX_VARS in cryptominisat.cpp.
+// new_vars() throws beyond it.
+static const long max_num_vars = 1L << 28;
+
+// Makes sure the solver has at least num_vars variables
+static void ensure_vars(SATSolver *cmsat, long num_vars)
 {
-    if (array_length == 0) {
-        return 1;
-    }
-    if (array[array_length - 1] != 0) {
-        PyErr_SetString(PyExc_ValueError, "last clause not terminated by zero");
-        return 0;
+    if (num_vars > (long)cmsat->nVars()) {
+        cmsat->new_vars(num_vars - (long)cmsat->nVars());
     }
-    size_t k = 0;
-    long val = 0;
-    std::vector<Lit>& lits = self->tmp_cl_lits;
-    for (val = (long) array[k]; k < array_length; val = (long) array[++k]) {
-        lits.clear();
-        long int max_var = 0;
-        for (; k < array_length && val != 0; val = (long) array[++k]) {
-            long var;
-            bool sign;
-            if (val > std::numeric_limits<int>::max()/2
-                || val < std::numeric_limits<int>::min()/2
-            ) {
-                PyErr_Format(PyExc_ValueError, "integer %ld is too small or too large", val);
-                return 0;
-            }
+}
 
-            sign = (val < 0);
-            var = std::abs(val) - 1;
-            max_var = std::max(var, max_var);
+// What the core threw while variables or clauses were added to it
+enum class AddError { none, too_many_vars, out_of_memory };
 
-            lits.push_back(Lit(var, sign));
-        }
-        if (!lits.empty()) {
-            if (max_var >= (long int)self->cmsat->nVars()) {
-                self->cmsat->new_vars(max_var-(long int)self->cmsat->nVars()+1);
-            }
-            self->cmsat->add_clause(lits);
-        }
+// Runs add(), catching what the core throws when it runs out of variables
+// or of memory, which must not reach Python. Does not need the GIL.
+template <typename F>
+static AddError catch_add_error(F&& add)
+{
+    try {
+        add();
+    } catch (const TooManyVarsError&) {
+        return AddError::too_many_vars;
+    } catch (const std::bad_alloc&) {
+        return AddError::out_of_memory;
+    }
+    return AddError::none;
+}
+
+// Raises ValueError or MemoryError for error. Returns 0 if it did.
+static int check_add_error(const AddError error)
+{
+    switch (error) {
+        case AddError::none:
+            return 1;
+        case AddError::too_many_vars:
+            PyErr_SetString(PyExc_ValueError, "too many variables");
+            return 0;
+        case AddError::out_of_memory:
+            PyErr_NoMemory();
+            return 0;
     }
     return 1;
 }
 
-static int _add_clauses_from_buffer(Solver *self, Py_buffer *view)
+// Checks that view is a C-contiguous buffer of ints (format 'i', 'l' or
+// 'q') with 1 or up to max_ndim dimensions. "what" names it in errors.
+static int check_int_buffer(Py_buffer *view, const char* what, int max_ndim = 1)
 {
-    if (view->ndim != 1) {
-        PyErr_Format(PyExc_ValueError, "invalid clause array: expected 1-D array, got %d-D", view->ndim);
+    if (view->ndim < 1 || view->ndim > max_ndim) {
+        if (max_ndim == 1) {
+            PyErr_Format(PyExc_ValueError, "invalid %s: expected 1-D array, got %d-D", what, view->ndim);
+        } else {
+            PyErr_Format(PyExc_ValueError, "invalid %s: expected 1-D to %d-D array, got %d-D", what, max_ndim, view->ndim);
+        }
         return 0;
     }
     if (strcmp(view->format, "i") != 0 && strcmp(view->format, "l") != 0 && strcmp(view->format, "q") != 0) {
-        PyErr_Format(PyExc_ValueError, "invalid clause array: invalid format '%s'", view->format);
+        PyErr_Format(PyExc_ValueError, "invalid %s: invalid format '%s'", what, view->format);
         return 0;
     }
-
-    void * array_address = view->buf;
-    size_t itemsize = view->itemsize;
-    size_t array_length = view->len / itemsize;
-
-    if (itemsize == sizeof(int)) {
-        return _add_clauses_from_array(self, array_length, (const int *) array_address);
+    if (view->itemsize != sizeof(int) && view->itemsize != sizeof(long) && view->itemsize != sizeof(long long)) {
+        PyErr_Format(PyExc_ValueError, "invalid %s: invalid itemsize '%ld'", what, view->itemsize);
+        return 0;
     }
-    if (itemsize == sizeof(long)) {
-        return _add_clauses_from_array(self, array_length, (const long *) array_address);
+    return 1;
+}
+
+// Calls f with a typed pointer to the data of a buffer that passed
+// check_int_buffer(), and returns its result.
+template <typename F>
+static int with_int_array(Py_buffer *view, F&& f)
+{
+    if (view->itemsize == sizeof(int)) {
+        return f((const int *) view->buf);
     }
-    if (itemsize == sizeof(long long)) {
-        return _add_clauses_from_array(self, array_length, (const long long *) array_address);
+    if (view->itemsize == sizeof(long)) {
+        return f((const long *) view->buf);
     }
-    PyErr_Format(PyExc_ValueError, "invalid clause array: invalid itemsize '%ld'", itemsize);
-    return 0;
+    return f((const long long *) view->buf);
 }
 
-PyDoc_STRVAR(add_clauses_doc,
-"add_clauses(clauses)\n\
-Add iterable of clauses to the solver.\n\
-\n\
-:param clauses: List of clauses. Each clause contains literals (ints)\n\
-    Alternatively, this can be a flat array.array or other contiguous\n\
-    buffer (format 'i', 'l', or 'q') of zero separated and terminated\n\
-    clauses of literals (ints).\n\
-:type clauses: <list> or <array.array>\n\
-:return: None\n\
-:rtype: <None>"
-);
+// Clauses read from a buffer, clause i being lits[starts[i], starts[i+1]).
+// They are converted while holding the GIL, so that the solver never sees
+// literals that changed in the caller's buffer after they were checked.
+struct ClauseBatch {
+    std::vector<Lit> lits;
+    std::vector<size_t> starts = {0};
 
-static PyObject* add_clauses(Solver *self, PyObject *args, PyObject *kwds)
+    void end_clause() { starts.push_back(lits.size()); }
+    size_t size() const { return starts.size() - 1; }
+};
+
+// Checks a non-zero literal, appends it to the batch and updates max_var
+// with its variable (1-based). Needs the GIL.
+static int _append_lit(const long long val, ClauseBatch& batch, long& max_var)
 {
-    static char const* kwlist[] = {"clauses", NULL};
-    PyObject *clauses;
-    if (!PyArg_ParseTupleAndKeywords(args, kwds, "O", const_cast<char**>(kwlist), &clauses)) {
-        return NULL;
+    // The variables are created with ensure_vars(), which must not throw
+    if (val >= max_num_vars || val <= -max_num_vars) {
+        PyErr_Format(PyExc_ValueError, "integer %lld is too small or too large", val);
+        return 0;
     }
-
+    max_var = std::max(max_var, (long) std::abs(val));
+    batch.lits.push_back(Lit(std::abs(val) - 1, val < 0));
+    return 1;
+}
+
+// Appends the non-zero literals in array[begin, end) to the batch as one
+// clause, unless there are none.
+template <typename T>
+static int _read_padded_clause(const T *array, const size_t begin, const size_t end, ClauseBatch& batch, long& max_var)
+{
+    for (size_t k = begin; k < end; k++) {
+        const long long val = (long long) array[k];
+        if (val != 0 && !_append_lit(val, batch, max_var)) {
+            return 0;
+        }
+    }
+    if (batch.lits.size() > batch.starts.back()) {
+        batch.end_clause();
+    }
+    return 1;
+}
+
+// Adds the clauses of the batch. Their variables must exist in the solver.
+// Does not need the GIL.
+static void _add_clause_batch(SATSolver *cmsat, const ClauseBatch& batch)
+{
+    std::vector<Lit> lits;
+    for (size_t i = 0; i < batch.size(); i++) {
+        lits.assign(batch.lits.begin() + batch.starts[i], batch.lits.begin() + batch.starts[i+1]);
+        cmsat->add_clause(lits);
+    }
+}
+
+static void _add_clause_batch_nogil(Solver *self, const ClauseBatch& batch, long max_var)
+{
+    ensure_vars(self->cmsat, max_var);
+
+    Py_BEGIN_ALLOW_THREADS      /* release GIL */
+    _add_clause_batch(self->cmsat, batch);
+    Py_END_ALLOW_THREADS
+}
+
+// Clauses and XOR constraints of a solver, outside of any solver. It can be
+// filled by the copy functions of cryptominisat.h, like a SATSolver.
+struct Formula {
+    uint32_t num_vars = 0;
+    ClauseBatch clauses;
+    ClauseBatch xors;
+    std::vector<bool> xor_rhs;
+
+    void new_var() { num_vars++; }
+    void new_vars(const size_t n) { num_vars += n; }
+    uint32_t nVars() const { return num_vars; }
+    void add_clause(const std::vector<Lit>& lits)
+    {
+        clauses.lits.insert(clauses.lits.end(), lits.begin(), lits.end());
+        clauses.end_clause();
+    }
+    void add_xor_clause(const std::vector<Lit>& lits, bool rhs)
+    {
+        xors.lits.insert(xors.lits.end(), lits.begin(), lits.end());
+        xors.end_clause();
+        xor_rhs.push_back(rhs);
+    }
+};
+
+// Does not need the GIL
+static void add_formula(SATSolver *cmsat, const Formula& formula)
+{
+    cmsat->new_vars(formula.num_vars);
+    _add_clause_batch(cmsat, formula.clauses);
+    std::vector<Lit> lits;
+    for (size_t i = 0; i < formula.xors.size(); i++) {
+        lits.assign(formula.xors.lits.begin() + formula.xors.starts[i], formula.xors.lits.begin() + formula.xors.starts[i+1]);
+        cmsat->add_xor_clause(lits, formula.xor_rhs[i]);
+    }
+}
+
+// What is needed to extend the models of a solver that holds a simplified
+// formula, see copy_simplified_clauses(), to the variables the simplification
+// removed: the constraints that contain them. Whatever the values of the
+// other variables in a model of the simplified formula, they can be
+// satisfied by setting the removed variables.
+struct Reconstruction {
+    Formula constraints;
+    std::vector<bool> removed;
+    std::vector<lbool> model;   // the extended model of the last solve, see extend_solver_model()
+
+    void add(const Reconstruction& other)
+    {
+        constraints.num_vars = std::max(constraints.num_vars, other.constraints.num_vars);
+        for (size_t i = 0; i < other.constraints.clauses.size(); i++) {
+            const auto& batch = other.constraints.clauses;
+            constraints.add_clause(std::vector<Lit>(batch.lits.begin() + batch.starts[i], batch.lits.begin() + batch.starts[i+1]));
+        }
+        for (size_t i = 0; i < other.constraints.xors.size(); i++) {
+            const auto& batch = other.constraints.xors;
+            constraints.add_xor_clause(std::vector<Lit>(batch.lits.begin() + batch.starts[i], batch.lits.begin() + batch.starts[i+1]), other.constraints.xor_rhs[i]);
+        }
+        removed.resize(std::max(removed.size(), other.removed.size()), false);
+        for (size_t var = 0; var < other.removed.size(); var++) {
+            if (other.removed[var]) {
+                removed[var] = true;
+            }
+        }
+    }
+};
+
+// Defined here for init_solver(), which only sees the declaration
+static void delete_reconstruction(Reconstruction* rec)
+{
+    delete rec;
+}
+
+// Returns model with the removed variables set, by solving their constraints
+// with the other variables fixed to their values in model. The result is
+// written to extended, unless there is nothing to extend. Does not need the
+// GIL.
+static const std::vector<lbool>& extended_model(
+    const Reconstruction *rec
+    , const std::vector<lbool>& model
+    , std::vector<lbool>& extended
+) {
+    if (rec == NULL) {
+        return model;
+    }
+    extended = model;
+    const Formula& constraints = rec->constraints;
+    std::vector<Lit> assumptions;
+    std::vector<bool> fixed(model.size(), false);
+    for (const ClauseBatch* batch: {&constraints.clauses, &constraints.xors}) {
+        for (const Lit lit: batch->lits) {
+            const uint32_t var = lit.var();
+            if (var < model.size() && !fixed[var] && model[var] != l_Undef
+                && !(var < rec->removed.size() && rec->removed[var])
+            ) {
+                fixed[var] = true;
+                assumptions.push_back(Lit(var, model[var] == l_False));
+            }
+        }
+    }
+
+    SATSolver extender;
+    add_formula(&extender, constraints);
+    if (extender.solve(&assumptions) == l_True) {
+        const std::vector<lbool>& values = extender.get_model();
+        for (size_t var = 0; var < rec->removed.size() && var < model.size(); var++) {
+            if (rec->removed[var]) {
+                extended[var] = values[var];
+            }
+        }
+    }
+    return extended;
+}
+
+// Extends the model of a solve of self that returned res, for solver_model().
+// Call it right after the solve, in the same block without the GIL, so that
+// reading the model never solves while holding the GIL.
+static void extend_solver_model(Solver *self, const lbool res)
+{
+    Reconstruction *rec = self->reconstruction;
+    if (res == l_True && rec != NULL) {
+        extended_model(rec, self->cmsat->get_model(), rec->model);
+    }
+}
+
+// The model of the last satisfiable solve of self. Does not need the GIL.
+static const std::vector<lbool>& solver_model(Solver *self)
+{
+    if (self->reconstruction != NULL) {
+        return self->reconstruction->model;
+    }
+    return self->cmsat->get_model();
+}
+
+// Flat array of zero separated and terminated clauses
+template <typename T>
+static int _add_clauses_from_flat_array(Solver *self, const size_t array_length, const T *array, long max_var)
+{
+    if (array_length == 0) {
+        return 1;
+    }
+    if (array[array_length - 1] != 0) {
+        PyErr_SetString(PyExc_ValueError, "last clause not terminated by zero");
+        return 0;
+    }
+
+    ClauseBatch batch;
+    size_t begin = 0;
+    for (size_t k = 0; k < array_length; k++) {
+        if (array[k] == 0) {
+            if (!_read_padded_clause(array, begin, k, batch, max_var)) {
+                return 0;
+            }
+            begin = k+1;
+        }
+    }
+    _add_clause_batch_nogil(self, batch, max_var);
+    return 1;
+}
+
+// 2-D (num_clauses, width) array, one clause per row, padded with zeros
+template <typename T>
+static int _add_clauses_from_matrix(Solver *self, const size_t num_rows, const size_t width, const T *array, long max_var)
+{
+    ClauseBatch batch;
+    for (size_t row = 0; row < num_rows; row++) {
+        if (!_read_padded_clause(array, row*width, (row+1)*width, batch, max_var)) {
+            return 0;
+        }
+    }
+    _add_clause_batch_nogil(self, batch, max_var);
+    return 1;
+}
+
+// Checks that indptr is non-decreasing and points into an array of
+// lits_length elements
+template <typename P>
+static int _check_indptr(const size_t indptr_length, const P *indptr, const size_t lits_length)
+{
+    for (size_t i = 0; i < indptr_length; i++) {
+        if (indptr[i] < 0
+            || (size_t)indptr[i] > lits_length
+            || (i > 0 && indptr[i] < indptr[i-1])
+        ) {
+            PyErr_Format(PyExc_ValueError,
+                "invalid indptr: entry %zu must be between the previous entry and %zu", i, lits_length);
+            return 0;
+        }
+    }
+    return 1;
+}
+
+// Reads a CSR pair of buffers into the batch, row i being
+// array[indptr[i]:indptr[i+1]]. Empty rows are kept.
+template <typename T, typename P>
+static int _read_csr_batch(
+    const size_t indptr_length
+    , const P *indptr
+    , const size_t lits_length
+    , const T *array
+    , ClauseBatch& batch
+    , long& max_var
+) {
+    if (indptr_length == 0) {
+        return 1;
+    }
+    if (!_check_indptr(indptr_length, indptr, lits_length)) {
+        return 0;
+    }
+
+    batch.lits.reserve(indptr[indptr_length-1] - indptr[0]);
+    for (size_t i = 0; i+1 < indptr_length; i++) {
+        for (size_t k = indptr[i]; k < (size_t)indptr[i+1]; k++) {
+            const long long val = (long long) array[k];
+            if (val == 0) {
+                PyErr_SetString(PyExc_ValueError, "non-zero integer expected");
+                return 0;
+            }
+            if (!_append_lit(val, batch, max_var)) {
+                return 0;
+            }
+        }
+        batch.end_clause();
+    }
+    return 1;
+}
+
+// Clause i is literals[indptr[i]:indptr[i+1]], as in a CSR sparse matrix
+template <typename T, typename P>
+static int _add_clauses_from_csr(
+    Solver *self
+    , const size_t indptr_length
+    , const P *indptr
+    , const size_t lits_length
+    , const T *lits
+    , long max_var
+) {
+    ClauseBatch batch;
+    if (!_read_csr_batch(indptr_length, indptr, lits_length, lits, batch, max_var)) {
+        return 0;
+    }
+    _add_clause_batch_nogil(self, batch, max_var);
+    return 1;
+}
+
+static int _add_clauses_from_buffer(Solver *self, Py_buffer *view, long max_var)
+{
+    if (!check_int_buffer(view, "clause array", 2)) {
+        return 0;
+    }
+
+    if (view->ndim == 2) {
+        const size_t num_rows = view->shape[0];
+        const size_t width = view->shape[1];
+        return with_int_array(view, [&](auto array) {
+            return _add_clauses_from_matrix(self, num_rows, width, array, max_var);
+        });
+    }
+    const size_t array_length = view->len / view->itemsize;
+    return with_int_array(view, [&](auto array) {
+        return _add_clauses_from_flat_array(self, array_length, array, max_var);
+    });
+}
+
+static int _add_clauses_from_csr_buffers(Solver *self, Py_buffer *lits_view, Py_buffer *indptr_view, long max_var)
+{
+    if (!check_int_buffer(lits_view, "clause array") || !check_int_buffer(indptr_view, "indptr")) {
+        return 0;
+    }
+
+    const size_t lits_length = lits_view->len / lits_view->itemsize;
+    const size_t indptr_length = indptr_view->len / indptr_view->itemsize;
+    return with_int_array(lits_view, [&](auto lits) {
+        return with_int_array(indptr_view, [&](auto indptr) {
+            return _add_clauses_from_csr(self, indptr_length, indptr, lits_length, lits, max_var);
+        });
+    });
+}
+
+PyDoc_STRVAR(add_clauses_doc,
+"add_clauses(clauses, max_var=0, indptr=None)\n\
+Add iterable of clauses to the solver.\n\
+\n\
+:param clauses: List of clauses. Each clause contains literals (ints)\n\
+    Alternatively, this can be a flat array.array or other contiguous\n\
+    buffer (format 'i', 'l', or 'q') of zero separated and terminated\n\
+    clauses of literals (ints), or a 2-D (num_clauses, width) buffer with\n\
+    one clause per row, padded with zeros. Buffers are checked and copied\n\
+    first, then added with the GIL released.\n\
+:type clauses: <list> or <array.array>\n\
+:param indptr: (Optional) Makes clauses a flat buffer of literals without\n\
+    zeros, where clause i is clauses[indptr[i]:indptr[i+1]], as in a CSR\n\
+    sparse matrix. An empty row is an empty clause, which makes the\n\
+    system unsatisfiable.\n\
+:type indptr: <array.array> or other buffer\n\
+:param max_var: (Optional) Largest variable used by the clauses. The\n\
+    variables up to it are created once, up front.\n\
+:type max_var: <long>\n\
+:return: None\n\
+:rtype: <None>"
+);
+
+static PyObject* add_clauses(Solver *self, PyObject *args, PyObject *kwds)
+{
+    static char const* kwlist[] = {"clauses", "max_var", "indptr", NULL};
+    PyObject *clauses;
+    long max_var = 0;
+    PyObject *indptr = NULL;
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "O|lO", const_cast<char**>(kwlist), &clauses, &max_var, &indptr)) {
+        return NULL;
+    }
+    if (max_var < 0 || max_var >= max_num_vars) {
+        PyErr_Format(PyExc_ValueError, "max_var %ld is too small or too large", max_var);
+        return NULL;
+    }
+
+    if (indptr != NULL && indptr != Py_None) {
+        Py_buffer view;
+        if (PyObject_GetBuffer(clauses, &view, PyBUF_CONTIG_RO | PyBUF_FORMAT) != 0) {
+            return NULL;
+        }
+        Py_buffer indptr_view;
+        if (PyObject_GetBuffer(indptr, &indptr_view, PyBUF_CONTIG_RO | PyBUF_FORMAT) != 0) {
+            PyBuffer_Release(&view);
+            return NULL;
+        }
+
+        int ret = _add_clauses_from_csr_buffers(self, &view, &indptr_view, max_var);
+        PyBuffer_Release(&indptr_view);
+        PyBuffer_Release(&view);
+
+        if (ret == 0 || PyErr_Occurred()) {
+            return 0;
+        }
+        Py_INCREF(Py_None);
+        return Py_None;
+    }
+
     if (PyObject_CheckBuffer(clauses)) {
         Py_buffer view;
         memset(&view, 0, sizeof(view));
@@ -351,7 +1328,7 @@ static PyObject* add_clauses(Solver *self, PyObject *args, PyObject *kwds)
             return NULL;
         }
 
-        int ret = _add_clauses_from_buffer(self, &view);
+        int ret = _add_clauses_from_buffer(self, &view, max_var);
         PyBuffer_Release(&view);
 
         if (ret == 0 || PyErr_Occurred()) {
@@ -366,6 +1343,7 @@ static PyObject* add_clauses(Solver *self, PyObject *args, PyObject *kwds)
         PyErr_SetString(PyExc_TypeError, "iterable object expected");
         return NULL;
     }
+    ensure_vars(self->cmsat, max_var);
 
     PyObject *clause;
     while ((clause = PyIter_Next(iterator)) != NULL) {
@@ -384,6 +1362,213 @@ static PyObject* add_clauses(Solver *self, PyObject *args, PyObject *kwds)
     return Py_None;
 }
 
+PyDoc_STRVAR(load_dimacs_doc,
+"load_dimacs(path, strict_header=False)\n\
+Read a DIMACS CNF file directly into the solver.\n\
+\n\
+The file is parsed in C++ with the GIL released. Gzipped files (when\n\
+built with zlib) and XOR clauses ('x' lines) are supported, just like in\n\
+the cryptominisat5 binary. Comment lines are interpreted the same way too:\n\
+'c ind' and 'c p show' lines set the sampling variables of the solver, and\n\
+'c p weight' lines set literal weights.\n\
+\n\
+A malformed file raises ValueError naming the offending line. The clauses\n\
+of the lines before it have been added to the solver by then and are not\n\
+removed, so the solver should be discarded.\n\
+\n\
+:param path: Path of the file to read\n\
+:type path: <str> or <os.PathLike>\n\
+:param strict_header: (Optional) Require a 'p cnf' header and check that\n\
+    the variables used are within it.\n\
+:type strict_header: <bool>\n\
+:return: Statistics of the parsing: number of variables and clauses in\n\
+    the header, number of clauses and XOR clauses added, and the wall\n\
+    clock time taken to parse the file, in seconds\n\
+:rtype: <dict>"
+);
+
+// Parses the DIMACS file at path, a bytes object, into self with the GIL
+// released. Returns its statistics, or NULL with an exception set.
+static PyObject* parse_dimacs_file(Solver *self, PyObject *path, bool strict_header)
+{
+    const char *fname = PyBytes_AS_STRING(path);
+    #ifndef USE_ZLIB
+    FILE *in = fopen(fname, "rb");
+    #else
+    gzFile in = gzopen(fname, "rb");
+    #endif
+    if (in == NULL) {
+        PyErr_SetFromErrnoWithFilenameObject(PyExc_OSError, path);
+        return NULL;
+    }
+
+    std::unique_ptr<FieldGen> fg = std::make_unique<FGenDouble>();
+    #ifndef USE_ZLIB
+    DimacsParser<StreamBuffer<FILE*, FN>, SATSolver> parser(self->cmsat, NULL, self->verbose, fg);
+    #else
+    DimacsParser<StreamBuffer<gzFile, GZ>, SATSolver> parser(self->cmsat, NULL, self->verbose, fg);
+    #endif
+
+    bool ok = false;
+    bool too_many_vars = false;
+    bool out_of_memory = false;
+    const auto start = std::chrono::steady_clock::now();
+    Py_BEGIN_ALLOW_THREADS      /* release GIL */
+    // The header makes the parser call new_vars(), which throws if the
+    // number of variables is beyond what the solver supports
+    try {
+        ok = parser.parse_DIMACS(in, strict_header);
+    } catch (const TooManyVarsError&) {
+        too_many_vars = true;
+    } catch (const std::bad_alloc&) {
+        out_of_memory = true;
+    }
+    #ifndef USE_ZLIB
+    fclose(in);
+    #else
+    gzclose(in);
+    #endif
+    Py_END_ALLOW_THREADS
+    const std::chrono::duration<double> parse_time = std::chrono::steady_clock::now() - start;
+
+    if (too_many_vars) {
+        PyErr_Format(PyExc_ValueError, "could not parse DIMACS file '%s': too many variables",
+            fname);
+        return NULL;
+    }
+    if (out_of_memory) {
+        PyErr_NoMemory();
+        return NULL;
+    }
+    if (!ok) {
+        PyErr_Format(PyExc_ValueError, "could not parse DIMACS file '%s': error at line %zu",
+            fname, parser.get_line_num());
+        return NULL;
+    }
+    return Py_BuildValue("{s:i,s:i,s:n,s:n,s:d}",
+        "num_vars", parser.get_num_header_vars(),
+        "num_clauses", parser.get_num_header_cls(),
+        "clauses_added", (Py_ssize_t)parser.get_norm_clauses_added(),
+        "xor_clauses_added", (Py_ssize_t)parser.get_xor_clauses_added(),
+        "parse_time", parse_time.count());
+}
+
+static PyObject* load_dimacs(Solver *self, PyObject *args, PyObject *kwds)
+{
+    static char const* kwlist[] = {"path", "strict_header", NULL};
+    PyObject *path = NULL;
+    int strict_header = 0;
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "O&|p", const_cast<char**>(kwlist),
+        PyUnicode_FSConverter, &path, &strict_header))
+    {
+        return NULL;
+    }
+    PyObject *stats = parse_dimacs_file(self, path, strict_header);
+    Py_DECREF(path);
+    return stats;
+}
+
+PyDoc_STRVAR(load_opb_doc,
+"load_opb(path)\n\
+Read a pseudo-Boolean OPB file directly into the solver.\n\
+\n\
+The file is parsed and its linear constraints are encoded into clauses in\n\
+C++ with the GIL released, like by add_pb() and by the cryptominisat5\n\
+binary for '.opb' files. Variable xN is variable N of the solver, and the\n\
+auxiliary variables of the encoding are added after the variables of the\n\
+file. The objective function ('min:' line) is ignored. Gzipped files are\n\
+supported when built with zlib.\n\
+\n\
+A malformed file raises ValueError naming the offending line, and then\n\
+nothing has been added to the solver.\n\
+\n\
+:param path: Path of the file to read\n\
+:type path: <str> or <os.PathLike>\n\
+:return: Statistics of the parsing: number of variables and constraints\n\
+    in the header, number of constraints read, whether there was an\n\
+    objective function, number of auxiliary variables and clauses of the\n\
+    encoding, and the wall clock time taken, in seconds\n\
+:rtype: <dict>"
+);
+
+static PyObject* load_opb(Solver *self, PyObject *args, PyObject *kwds)
+{
+    static char const* kwlist[] = {"path", NULL};
+    PyObject *path = NULL;
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "O&", const_cast<char**>(kwlist),
+        PyUnicode_FSConverter, &path))
+    {
+        return NULL;
+    }
+
+    const char *fname = PyBytes_AS_STRING(path);
+    #ifndef USE_ZLIB
+    FILE *in = fopen(fname, "rb");
+    #else
+    gzFile in = gzopen(fname, "rb");
+    #endif
+    if (in == NULL) {
+        PyErr_SetFromErrnoWithFilenameObject(PyExc_OSError, path);
+        Py_DECREF(path);
+        return NULL;
+    }
+
+    #ifndef USE_ZLIB
+    OPBParser<StreamBuffer<FILE*, FN>, SATSolver> parser(self->cmsat, self->verbose);
+    #else
+    OPBParser<StreamBuffer<gzFile, GZ>, SATSolver> parser(self->cmsat, self->verbose);
+    #endif
+
+    bool ok = false;
+    bool too_many_vars = false;
+    bool out_of_memory = false;
+    const auto start = std::chrono::steady_clock::now();
+    Py_BEGIN_ALLOW_THREADS      /* release GIL */
+    // The variables of the file and of the encoding are added with
+    // new_vars(), which throws beyond what the solver supports
+    try {
+        ok = parser.parse_OPB(in);
+    } catch (const TooManyVarsError&) {
+        too_many_vars = true;
+    } catch (const std::bad_alloc&) {
+        out_of_memory = true;
+    }
+    #ifndef USE_ZLIB
+    fclose(in);
+    #else
+    gzclose(in);
+    #endif
+    Py_END_ALLOW_THREADS
+    const std::chrono::duration<double> parse_time = std::chrono::steady_clock::now() - start;
+
+    if (too_many_vars) {
+        PyErr_Format(PyExc_ValueError, "could not parse OPB file '%s': too many variables",
+            fname);
+        Py_DECREF(path);
+        return NULL;
+    }
+    if (out_of_memory) {
+        PyErr_NoMemory();
+        Py_DECREF(path);
+        return NULL;
+    }
+    if (!ok) {
+        PyErr_Format(PyExc_ValueError, "could not parse OPB file '%s': error at line %zu",
+            fname, parser.get_line_num());
+        Py_DECREF(path);
+        return NULL;
+    }
+    Py_DECREF(path);
+    return Py_BuildValue("{s:L,s:L,s:n,s:O,s:K,s:K,s:d}",
+        "num_vars", (long long)parser.get_num_header_vars(),
+        "num_constraints", (long long)parser.get_num_header_constraints(),
+        "constraints_added", (Py_ssize_t)parser.get_constraints_added(),
+        "objective", parser.get_objective_found() ? Py_True : Py_False,
+        "aux_vars_added", (unsigned long long)parser.get_aux_vars_added(),
+        "clauses_added", (unsigned long long)parser.get_clauses_added(),
+        "parse_time", parse_time.count());
+}
+
 static PyObject* add_xor_clause(Solver *self, PyObject *args, PyObject *kwds)
 {
     static char const* kwlist[] = {"xor_clause", "rhs", NULL};
@@ -409,306 +1594,3600 @@ static PyObject* add_xor_clause(Solver *self, PyObject *args, PyObject *kwds)
     return Py_None;
 }
 
-static PyObject* get_solution(SATSolver *cmsat)
+// Reads one rhs per XOR clause from a 1-D buffer of bools or ints, each 0
+// or 1
+static int _read_rhs_buffer(Py_buffer *view, const size_t num_xors, std::vector<bool>& rhs)
 {
-    // Create tuple with the size of number of variables in model
-    unsigned max_idx = cmsat->nVars();
-    PyObject *tuple = PyTuple_New((Py_ssize_t) max_idx+1);
-    if (tuple == NULL) {
-        PyErr_SetString(PyExc_SystemError, "failed to create a tuple");
-        return NULL;
+    const bool is_bytes = view->itemsize == 1
+        && (strcmp(view->format, "?") == 0 || strcmp(view->format, "b") == 0 || strcmp(view->format, "B") == 0);
+    if (view->ndim != 1 || (!is_bytes && !check_int_buffer(view, "rhs array"))) {
+        if (!PyErr_Occurred()) {
+            PyErr_Format(PyExc_ValueError, "invalid rhs array: expected 1-D array, got %d-D", view->ndim);
+        }
+        return 0;
     }
-
-    Py_INCREF(Py_None);
-    PyTuple_SET_ITEM(tuple, (Py_ssize_t)0, Py_None);
-
-    PyObject *py_value = NULL;
-    lbool v;
-    for (unsigned i = 0; i < max_idx; i++) {
-        v = cmsat->get_model()[i];
-
-        if (v == l_True) {
-            py_value = Py_True;
-        } else if (v == l_False) {
-            py_value = Py_False;
-        } else if (v == l_Undef) {
-            py_value = Py_None;
-        } else {
-            // v can only be l_False, l_True, l_Undef
-            assert((v == l_False) || (v == l_True) || (v == l_Undef));
+    const size_t length = view->len / view->itemsize;
+    if (length != num_xors) {
+        PyErr_Format(PyExc_ValueError, "rhs array has %zu entries for %zu XOR clauses", length, num_xors);
+        return 0;
+    }
+    auto read = [&](auto array) {
+        rhs.resize(length);
+        for (size_t i = 0; i < length; i++) {
+            if (array[i] != 0 && array[i] != 1) {
+                PyErr_Format(PyExc_ValueError, "invalid rhs array: entry %zu is not 0 or 1", i);
+                return 0;
+            }
+            rhs[i] = array[i] == 1;
         }
-        Py_INCREF(py_value);
-        PyTuple_SET_ITEM(tuple, (Py_ssize_t)i+1, py_value);
+        return 1;
+    };
+    if (is_bytes) {
+        return read((const unsigned char *) view->buf);
     }
-    return tuple;
+    return with_int_array(view, read);
 }
 
-static PyObject* get_raw_solution(SATSolver *cmsat) {
-
-    // Create tuple with the size of number of variables in model
-    unsigned max_idx = cmsat->nVars();
-    PyObject *tuple = PyTuple_New((Py_ssize_t) max_idx);
-    if (tuple == NULL) {
-        PyErr_SetString(PyExc_SystemError, "failed to create a tuple");
-        return NULL;
+// Zero terminated XOR clauses of positive variables. Every zero ends one, so
+// empty XOR clauses are kept.
+template <typename T>
+static int _read_flat_xor_batch(const size_t array_length, const T *array, ClauseBatch& batch, long& max_var)
+{
+    if (array_length > 0 && array[array_length - 1] != 0) {
+        PyErr_SetString(PyExc_ValueError, "last XOR clause not terminated by zero");
+        return 0;
+    }
+    batch.lits.reserve(array_length);
+    for (size_t k = 0; k < array_length; k++) {
+        if (array[k] == 0) {
+            batch.end_clause();
+        } else if (!_append_lit((long long) array[k], batch, max_var)) {
+            return 0;
+        }
+    }
+    return 1;
+}
+
+PyDoc_STRVAR(add_xor_clauses_doc,
+"add_xor_clauses(xor_clauses, rhs, indptr=None, max_var=0)\n\
+Add many XOR clauses to the solver at once.\n\
+\n\
+The buffers are checked and copied first, then the XOR clauses are added\n\
+with the GIL released, as add_xor_clause() would add them one by one.\n\
+\n\
+.. example:: \n\
+    >>> s.add_xor_clauses(array('i', [1, 2, 3, 0, 2, 4, 0]), bytes([1, 0]))\n\
+\n\
+:param xor_clauses: Flat array.array or other contiguous buffer (format\n\
+    'i', 'l', or 'q') of zero terminated XOR clauses of variables (positive\n\
+    ints). Each zero ends one XOR clause, so an empty one is \"0\".\n\
+:type xor_clauses: <array.array> or other buffer\n\
+:param rhs: Buffer with one entry per XOR clause, 1 (True) or 0 (False),\n\
+    e.g. bytes or a NumPy bool or int array.\n\
+:type rhs: <bytes> or other buffer\n\
+:param indptr: (Optional) Makes xor_clauses a flat buffer of variables\n\
+    without zeros, where XOR clause i is xor_clauses[indptr[i]:indptr[i+1]],\n\
+    as in a CSR sparse matrix.\n\
+:type indptr: <array.array> or other buffer\n\
+:param max_var: (Optional) Largest variable used by the XOR clauses. The\n\
+    variables up to it are created once, up front.\n\
+:type max_var: <long>\n\
+:return: None\n\
+:rtype: <None>"
+);
+
+static PyObject* add_xor_clauses(Solver *self, PyObject *args, PyObject *kwds)
+{
+    static char const* kwlist[] = {"xor_clauses", "rhs", "indptr", "max_var", NULL};
+    PyObject *xor_clauses;
+    PyObject *rhs;
+    PyObject *indptr = NULL;
+    long max_var = 0;
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "OO|Ol", const_cast<char**>(kwlist), &xor_clauses, &rhs, &indptr, &max_var)) {
+        return NULL;
+    }
+    if (max_var < 0 || max_var >= max_num_vars) {
+        PyErr_Format(PyExc_ValueError, "max_var %ld is too small or too large", max_var);
+        return NULL;
+    }
+
+    Formula xors;
+    Py_buffer view;
+    if (PyObject_GetBuffer(xor_clauses, &view, PyBUF_CONTIG_RO | PyBUF_FORMAT) != 0) {
+        return NULL;
+    }
+    int ok = check_int_buffer(&view, "XOR clause array");
+    if (ok && indptr != NULL && indptr != Py_None) {
+        Py_buffer indptr_view;
+        if (PyObject_GetBuffer(indptr, &indptr_view, PyBUF_CONTIG_RO | PyBUF_FORMAT) != 0) {
+            PyBuffer_Release(&view);
+            return NULL;
+        }
+        ok = check_int_buffer(&indptr_view, "indptr")
+            && with_int_array(&view, [&](auto vars) {
+                return with_int_array(&indptr_view, [&](auto starts) {
+                    return _read_csr_batch(indptr_view.len / indptr_view.itemsize, starts,
+                        view.len / view.itemsize, vars, xors.xors, max_var);
+                });
+            });
+        PyBuffer_Release(&indptr_view);
+    } else if (ok) {
+        ok = with_int_array(&view, [&](auto vars) {
+            return _read_flat_xor_batch(view.len / view.itemsize, vars, xors.xors, max_var);
+        });
+    }
+    PyBuffer_Release(&view);
+    if (!ok) {
+        return NULL;
+    }
+    for (const Lit lit: xors.xors.lits) {
+        if (lit.sign()) {
+            PyErr_SetString(PyExc_ValueError, "XOR clause must contain only positive variables (not inverted literals)");
+            return NULL;
+        }
+    }
+
+    Py_buffer rhs_view;
+    if (PyObject_GetBuffer(rhs, &rhs_view, PyBUF_CONTIG_RO | PyBUF_FORMAT) != 0) {
+        return NULL;
+    }
+    ok = _read_rhs_buffer(&rhs_view, xors.xors.size(), xors.xor_rhs);
+    PyBuffer_Release(&rhs_view);
+    if (!ok) {
+        return NULL;
+    }
+
+    ensure_vars(self->cmsat, max_var);
+    Py_BEGIN_ALLOW_THREADS      /* release GIL */
+    add_formula(self->cmsat, xors);
+    Py_END_ALLOW_THREADS
+
+    Py_INCREF(Py_None);
+    return Py_None;
+}
+
+/*************************** Pseudo-Boolean constraints *************************/
+
+static int parse_pb_comparator(const char* comparator, PbComparator& cmp)
+{
+    if (comparator == NULL || strcmp(comparator, "<=") == 0) {
+        cmp = PbComparator::at_most;
+    } else if (strcmp(comparator, ">=") == 0) {
+        cmp = PbComparator::at_least;
+    } else if (strcmp(comparator, "=") == 0 || strcmp(comparator, "==") == 0) {
+        cmp = PbComparator::equal;
+    } else {
+        PyErr_Format(PyExc_ValueError, "invalid comparator '%s', expected '<=', '>=' or '='", comparator);
+        return 0;
+    }
+    return 1;
+}
+
+// Checks that a constraint is small enough to be encoded without overflows
+static int check_pb_range(const int64_t* coeffs, size_t num_coeffs, int64_t bound)
+{
+    if (!pb_in_range(coeffs, num_coeffs, bound)) {
+        PyErr_SetString(PyExc_ValueError, "coefficients and bound of the constraint are too large");
+        return 0;
+    }
+    return 1;
+}
+
+// Encodes the constraints with encode(PbEncoder<Formula>&), then adds the
+// clauses and the auxiliary variables to the solver. Nothing is added if
+// there would be too many variables. Does not need the GIL.
+template <typename F>
+static AddError add_pb_encoding(SATSolver *cmsat, F&& encode)
+{
+    return catch_add_error([&] {
+        Formula formula;
+        formula.num_vars = cmsat->nVars();
+        PbEncoder<Formula> encoder(&formula);
+        encode(encoder);
+        cmsat->new_vars(formula.num_vars - cmsat->nVars());
+        _add_clause_batch(cmsat, formula.clauses);
+    });
+}
+
+// Parses an iterable of ints
+static int parse_coeffs(PyObject* coeffs, std::vector<int64_t>& out)
+{
+    PyObject *iterator = PyObject_GetIter(coeffs);
+    if (iterator == NULL) {
+        PyErr_SetString(PyExc_TypeError, "iterable object expected");
+        return 0;
+    }
+    PyObject *coeff;
+    while ((coeff = PyIter_Next(iterator)) != NULL) {
+        if (!IS_INT(coeff)) {
+            Py_DECREF(coeff);
+            Py_DECREF(iterator);
+            PyErr_SetString(PyExc_TypeError, "integer expected !");
+            return 0;
+        }
+        out.push_back(PyLong_AsLongLong(coeff));
+        Py_DECREF(coeff);
+        if (PyErr_Occurred()) {
+            Py_DECREF(iterator);
+            return 0;
+        }
+    }
+    Py_DECREF(iterator);
+    return !PyErr_Occurred();
+}
+
+// Adds sum(coeffs[i] * lits[i]) <cmp> bound, coeffs being all 1 if NULL
+static PyObject* add_pb_constraint(Solver *self, PyObject *lits_obj, PyObject *coeffs_obj, long long bound, PbComparator cmp)
+{
+    std::vector<Lit> lits;
+    std::vector<int64_t> coeffs;
+    if (!parse_clause(self, lits_obj, lits)) {
+        return NULL;
+    }
+    if (coeffs_obj == NULL) {
+        coeffs.assign(lits.size(), 1);
+    } else {
+        if (!parse_coeffs(coeffs_obj, coeffs)) {
+            return NULL;
+        }
+        if (coeffs.size() != lits.size()) {
+            PyErr_Format(PyExc_ValueError, "%zu coefficients for %zu literals", coeffs.size(), lits.size());
+            return NULL;
+        }
+    }
+    if (!check_pb_range(coeffs.data(), coeffs.size(), bound)) {
+        return NULL;
+    }
+
+    AddError error;
+    Py_BEGIN_ALLOW_THREADS      /* release GIL */
+    error = add_pb_encoding(self->cmsat, [&](PbEncoder<Formula>& encoder) {
+        encoder.add(lits, coeffs, bound, cmp);
+    });
+    Py_END_ALLOW_THREADS
+    if (!check_add_error(error)) {
+        return NULL;
+    }
+
+    Py_INCREF(Py_None);
+    return Py_None;
+}
+
+PyDoc_STRVAR(add_atmost_doc,
+"add_atmost(lits, k)\n\
+Add a constraint that at most k of the literals are True.\n\
+\n\
+It is encoded into clauses over new auxiliary variables, which are added\n\
+after the existing ones, so nb_vars() grows.\n\
+\n\
+:param lits: Literals (ints)\n\
+:type lits: <list>\n\
+:param k: Largest number of True literals\n\
+:type k: <long>\n\
+:return: None\n\
+:rtype: <None>"
+);
+
+static PyObject* add_atmost(Solver *self, PyObject *args, PyObject *kwds)
+{
+    static char const* kwlist[] = {"lits", "k", NULL};
+    PyObject *lits;
+    long long k;
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "OL", const_cast<char**>(kwlist), &lits, &k)) {
+        return NULL;
+    }
+    return add_pb_constraint(self, lits, NULL, k, PbComparator::at_most);
+}
+
+PyDoc_STRVAR(add_atleast_doc,
+"add_atleast(lits, k)\n\
+Add a constraint that at least k of the literals are True.\n\
+\n\
+It is encoded into clauses as by add_atmost(...).\n\
+\n\
+:param lits: Literals (ints)\n\
+:type lits: <list>\n\
+:param k: Smallest number of True literals\n\
+:type k: <long>\n\
+:return: None\n\
+:rtype: <None>"
+);
+
+static PyObject* add_atleast(Solver *self, PyObject *args, PyObject *kwds)
+{
+    static char const* kwlist[] = {"lits", "k", NULL};
+    PyObject *lits;
+    long long k;
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "OL", const_cast<char**>(kwlist), &lits, &k)) {
+        return NULL;
+    }
+    return add_pb_constraint(self, lits, NULL, k, PbComparator::at_least);
+}
+
+PyDoc_STRVAR(add_pb_doc,
+"add_pb(lits, coeffs, bound, comparator='<=')\n\
+Add a pseudo-Boolean constraint sum(coeffs[i] * lits[i]) <= bound.\n\
+\n\
+A True literal counts as 1, a False one as 0. The constraint is encoded\n\
+into clauses over new auxiliary variables, which are added after the\n\
+existing ones, so nb_vars() grows.\n\
+\n\
+.. example:: \n\
+    >>> s.add_pb([1, 2, -3], [3, 2, 5], 6)\n\
+\n\
+:param lits: Literals (ints)\n\
+:type lits: <list>\n\
+:param coeffs: One coefficient (int, possibly negative) per literal\n\
+:type coeffs: <list>\n\
+:param bound: Right hand side\n\
+:type bound: <long>\n\
+:param comparator: (Optional) '<=', '>=' or '='\n\
+:type comparator: <str>\n\
+:return: None\n\
+:rtype: <None>"
+);
+
+static PyObject* add_pb(Solver *self, PyObject *args, PyObject *kwds)
+{
+    static char const* kwlist[] = {"lits", "coeffs", "bound", "comparator", NULL};
+    PyObject *lits;
+    PyObject *coeffs;
+    long long bound;
+    const char* comparator = NULL;
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "OOL|z", const_cast<char**>(kwlist), &lits, &coeffs, &bound, &comparator)) {
+        return NULL;
+    }
+    PbComparator cmp;
+    if (!parse_pb_comparator(comparator, cmp)) {
+        return NULL;
+    }
+    return add_pb_constraint(self, lits, coeffs, bound, cmp);
+}
+
+PyDoc_STRVAR(add_pb_constraints_doc,
+"add_pb_constraints(literals, indptr, bounds, coeffs=None, comparator='<=')\n\
+Add many pseudo-Boolean or cardinality constraints at once.\n\
+\n\
+Constraint i is sum(coeffs[j] * literals[j]) <= bounds[i] over\n\
+j in range(indptr[i], indptr[i+1]), as in a CSR sparse matrix. The buffers\n\
+are checked and copied first, then the constraints are encoded as by\n\
+add_pb(...) with the GIL released.\n\
+\n\
+:param literals: Buffer (format 'i', 'l', or 'q') of literals\n\
+:type literals: <array.array> or other buffer\n\
+:param indptr: Buffer of the start of each constraint in literals, and\n\
+    of the end of the last one\n\
+:type indptr: <array.array> or other buffer\n\
+:param bounds: Buffer with the right hand side of each constraint\n\
+:type bounds: <array.array> or other buffer\n\
+:param coeffs: (Optional) Buffer with one coefficient per literal.\n\
+    Default: all 1, i.e. cardinality constraints.\n\
+:type coeffs: <array.array> or other buffer\n\
+:param comparator: (Optional) '<=', '>=' or '=', for all constraints\n\
+:type comparator: <str>\n\
+:return: None\n\
+:rtype: <None>"
+);
+
+// Reads a 1-D int buffer of the given length into out
+static int read_int64_buffer(PyObject *obj, const char* what, size_t length, std::vector<int64_t>& out)
+{
+    Py_buffer view;
+    if (PyObject_GetBuffer(obj, &view, PyBUF_CONTIG_RO | PyBUF_FORMAT) != 0) {
+        return 0;
+    }
+    int ok = check_int_buffer(&view, what);
+    if (ok && (size_t)(view.len / view.itemsize) != length) {
+        PyErr_Format(PyExc_ValueError, "invalid %s: expected %zu entries, got %zd", what, length, view.len / view.itemsize);
+        ok = 0;
+    }
+    if (ok) {
+        with_int_array(&view, [&](auto array) {
+            out.assign(array, array + length);
+            return 1;
+        });
+    }
+    PyBuffer_Release(&view);
+    return ok;
+}
+
+static PyObject* add_pb_constraints(Solver *self, PyObject *args, PyObject *kwds)
+{
+    static char const* kwlist[] = {"literals", "indptr", "bounds", "coeffs", "comparator", NULL};
+    PyObject *literals;
+    PyObject *indptr;
+    PyObject *bounds_obj;
+    PyObject *coeffs_obj = NULL;
+    const char* comparator = NULL;
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "OOO|Oz", const_cast<char**>(kwlist),
+        &literals, &indptr, &bounds_obj, &coeffs_obj, &comparator))
+    {
+        return NULL;
+    }
+    PbComparator cmp;
+    if (!parse_pb_comparator(comparator, cmp)) {
+        return NULL;
+    }
+
+    ClauseBatch batch;
+    long max_var = 0;
+    Py_buffer view;
+    if (PyObject_GetBuffer(literals, &view, PyBUF_CONTIG_RO | PyBUF_FORMAT) != 0) {
+        return NULL;
+    }
+    Py_buffer indptr_view;
+    if (PyObject_GetBuffer(indptr, &indptr_view, PyBUF_CONTIG_RO | PyBUF_FORMAT) != 0) {
+        PyBuffer_Release(&view);
+        return NULL;
+    }
+    const int ok = check_int_buffer(&view, "literal array") && check_int_buffer(&indptr_view, "indptr")
+        && with_int_array(&view, [&](auto lits) {
+            return with_int_array(&indptr_view, [&](auto starts) {
+                return _read_csr_batch(indptr_view.len / indptr_view.itemsize, starts,
+                    view.len / view.itemsize, lits, batch, max_var);
+            });
+        });
+    PyBuffer_Release(&indptr_view);
+    PyBuffer_Release(&view);
+    if (!ok) {
+        return NULL;
+    }
+
+    std::vector<int64_t> bounds;
+    std::vector<int64_t> coeffs;
+    if (!read_int64_buffer(bounds_obj, "bounds", batch.size(), bounds)) {
+        return NULL;
+    }
+    if (coeffs_obj != NULL && coeffs_obj != Py_None) {
+        if (!read_int64_buffer(coeffs_obj, "coeffs", batch.lits.size(), coeffs)) {
+            return NULL;
+        }
+    } else {
+        coeffs.assign(batch.lits.size(), 1);
+    }
+    for (size_t i = 0; i < batch.size(); i++) {
+        if (!check_pb_range(coeffs.data() + batch.starts[i], batch.starts[i+1] - batch.starts[i], bounds[i])) {
+            return NULL;
+        }
+    }
+
+    ensure_vars(self->cmsat, max_var);
+    AddError error;
+    Py_BEGIN_ALLOW_THREADS      /* release GIL */
+    error = add_pb_encoding(self->cmsat, [&](PbEncoder<Formula>& encoder) {
+        std::vector<Lit> lits;
+        std::vector<int64_t> constraint_coeffs;
+        for (size_t i = 0; i < batch.size(); i++) {
+            lits.assign(batch.lits.begin() + batch.starts[i], batch.lits.begin() + batch.starts[i+1]);
+            constraint_coeffs.assign(coeffs.begin() + batch.starts[i], coeffs.begin() + batch.starts[i+1]);
+            encoder.add(lits, constraint_coeffs, bounds[i], cmp);
+        }
+    });
+    Py_END_ALLOW_THREADS
+    if (!check_add_error(error)) {
+        return NULL;
+    }
+
+    Py_INCREF(Py_None);
+    return Py_None;
+}
+
+// The model as a tuple indexed by variable number, or if vars is given, the
+// values of the variables in vars only, in their order
+static PyObject* get_solution(const std::vector<lbool>& model, size_t num_vars, const std::vector<uint32_t>* vars = NULL)
+{
+    // Create tuple with the size of number of variables in model
+    unsigned max_idx = vars != NULL ? vars->size() : num_vars;
+    const unsigned offset = vars != NULL ? 0 : 1;
+    PyObject *tuple = PyTuple_New((Py_ssize_t) max_idx+offset);
+    if (tuple == NULL) {
+        PyErr_SetString(PyExc_SystemError, "failed to create a tuple");
+        return NULL;
+    }
+
+    if (vars == NULL) {
+        Py_INCREF(Py_None);
+        PyTuple_SET_ITEM(tuple, (Py_ssize_t)0, Py_None);
     }
 
-    // Add each variable in model to the tuple
     PyObject *py_value = NULL;
-    int sign;
-    for (long var = 0; var != (long)max_idx; var++) {
+    lbool v;
+    for (unsigned i = 0; i < max_idx; i++) {
+        v = vars != NULL ? model[(*vars)[i]] : model[i];
+
+        if (v == l_True) {
+            py_value = Py_True;
+        } else if (v == l_False) {
+            py_value = Py_False;
+        } else if (v == l_Undef) {
+            py_value = Py_None;
+        } else {
+            // v can only be l_False, l_True, l_Undef
+            assert((v == l_False) || (v == l_True) || (v == l_Undef));
+        }
+        Py_INCREF(py_value);
+        PyTuple_SET_ITEM(tuple, (Py_ssize_t)i+offset, py_value);
+    }
+    return tuple;
+}
+
+enum class ModelFormat { tuple, buffer, packed, none };
+
+static int parse_model_format(const char* name, ModelFormat& fmt)
+{
+    if (name == NULL || strcmp(name, "tuple") == 0) {
+        fmt = ModelFormat::tuple;
+    } else if (strcmp(name, "buffer") == 0) {
+        fmt = ModelFormat::buffer;
+    } else if (strcmp(name, "packed") == 0) {
+        fmt = ModelFormat::packed;
+    } else if (strcmp(name, "none") == 0) {
+        fmt = ModelFormat::none;
+    } else {
+        PyErr_Format(PyExc_ValueError,
+            "model_format must be 'tuple', 'buffer', 'packed' or 'none', not '%s'", name);
+        return 0;
+    }
+    return 1;
+}
+
+// Size in bytes of the model when written out in the given format
+static size_t model_buffer_size(size_t num_vars, ModelFormat fmt, const std::vector<uint32_t>* vars = NULL)
+{
+    const size_t num = vars != NULL ? vars->size() : num_vars + 1;
+    if (fmt == ModelFormat::packed) {
+        return (num + 7) / 8;
+    }
+    return num;
+}
 
-        if (cmsat->get_model()[var] != l_Undef) {
+// Writes the model into out, which must be model_buffer_size() bytes long.
+// Unpacked: one int8 per variable, 1 = True, 0 = False, -1 = unassigned.
+// Packed: one bit per variable (LSB first), set iff the variable is True.
+// In both cases index 0 is a placeholder, so out[i] is the value of variable i.
+// If vars is given, out[i] is the value of variable vars[i] instead.
+static void write_model_buffer(const std::vector<lbool>& model, size_t num_vars, ModelFormat fmt, void *out,
+    const std::vector<uint32_t>* vars = NULL)
+{
+    if (vars != NULL) {
+        uint8_t *bits = (uint8_t *) out;
+        int8_t *vals = (int8_t *) out;
+        if (fmt == ModelFormat::packed) {
+            memset(bits, 0, model_buffer_size(num_vars, fmt, vars));
+        }
+        for (size_t i = 0; i < vars->size(); i++) {
+            const uint32_t var = (*vars)[i];
+            const lbool v = var < model.size() ? model[var] : l_Undef;
+            if (fmt == ModelFormat::packed) {
+                bits[i >> 3] |= (uint8_t)((v == l_True ? 1U : 0U) << (i & 7));
+            } else {
+                vals[i] = (v == l_True) ? 1 : ((v == l_False) ? 0 : -1);
+            }
+        }
+        return;
+    }
+
+    const size_t max_idx = std::min<size_t>(num_vars, model.size());
+    if (fmt == ModelFormat::packed) {
+        uint8_t *bits = (uint8_t *) out;
+        memset(bits, 0, model_buffer_size(num_vars, fmt));
+        for (size_t i = 0; i < max_idx; i++) {
+            if (model[i] == l_True) {
+                bits[(i+1) >> 3] |= (uint8_t)(1U << ((i+1) & 7));
+            }
+        }
+        return;
+    }
+
+    int8_t *vals = (int8_t *) out;
+    vals[0] = -1;
+    for (size_t i = 0; i < max_idx; i++) {
+        const lbool v = model[i];
+        vals[i+1] = (v == l_True) ? 1 : ((v == l_False) ? 0 : -1);
+    }
+    for (size_t i = max_idx; i < num_vars; i++) {
+        vals[i+1] = -1;
+    }
+}
+
+static PyObject* get_model_buffer_new(const std::vector<lbool>& model, size_t num_vars, ModelFormat fmt,
+    const std::vector<uint32_t>* vars = NULL)
+{
+    if (fmt == ModelFormat::packed) {
+        std::vector<uint8_t> bits(model_buffer_size(num_vars, fmt, vars));
+        write_model_buffer(model, num_vars, fmt, bits.data(), vars);
+        return new_buffer(std::move(bits), "B");
+    }
+    std::vector<int8_t> vals(model_buffer_size(num_vars, fmt, vars));
+    write_model_buffer(model, num_vars, fmt, vals.data(), vars);
+    return new_buffer(std::move(vals), "b");
+}
+
+static PyObject* get_model_as(const std::vector<lbool>& model, size_t num_vars, ModelFormat fmt,
+    const std::vector<uint32_t>* vars = NULL)
+{
+    switch (fmt) {
+        case ModelFormat::tuple:
+            return get_solution(model, num_vars, vars);
+        case ModelFormat::buffer:
+        case ModelFormat::packed:
+            return get_model_buffer_new(model, num_vars, fmt, vars);
+        case ModelFormat::none:
+            break;
+    }
+    Py_INCREF(Py_None);
+    return Py_None;
+}
+
+static int parse_model_vars(Solver *self, PyObject *vars_obj, std::unique_ptr<std::vector<uint32_t>>& vars);
+
+PyDoc_STRVAR(get_model_buffer_doc,
+"get_model_buffer(out=None, packed=False, vars=None)\n\
+Return the model found by the last satisfiable solve(...) as a buffer.\n\
+\n\
+The buffer is indexed by variable number, index 0 is a placeholder. It can\n\
+be wrapped without copying by e.g. numpy.asarray() or memoryview().\n\
+\n\
+:param out: (Optional) A writable, contiguous buffer with 1-byte items to\n\
+    write the model into instead of allocating a new one. It must be at\n\
+    least nb_vars()+1 bytes long, or (nb_vars()+8)//8 bytes when packed\n\
+    (len(vars) and (len(vars)+7)//8 bytes with vars).\n\
+:type out: <bytearray> or other writable buffer\n\
+:param packed: (Optional) If False, one int8 per variable: 1 for True, 0 for\n\
+    False, -1 if unassigned. If True, one bit per variable, least\n\
+    significant bit first, set if the variable is True.\n\
+:type packed: <bool>\n\
+:param vars: (Optional) Only return the values of these variables, in this\n\
+    order and without placeholder: an iterable or a 1-D buffer of ints,\n\
+    or 'sampling' for the sampling variables of the solver.\n\
+:type vars: <list>, <array> or <str>\n\
+:return: The model, written into out if it was given\n\
+:rtype: <pycryptosat.Buffer>"
+);
+
+static PyObject* get_model_buffer(Solver *self, PyObject *args, PyObject *kwds)
+{
+    static char const* kwlist[] = {"out", "packed", "vars", NULL};
+    PyObject *out = NULL;
+    int packed = 0;
+    PyObject *vars_obj = NULL;
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|OpO", const_cast<char**>(kwlist), &out, &packed, &vars_obj)) {
+        return NULL;
+    }
+    if (self->last_result != l_True) {
+        PyErr_SetString(PyExc_RuntimeError, "no model: the last call to solve() was not satisfiable");
+        return NULL;
+    }
+    std::unique_ptr<std::vector<uint32_t>> vars;
+    if (!parse_model_vars(self, vars_obj, vars)) {
+        return NULL;
+    }
+
+    const ModelFormat fmt = packed ? ModelFormat::packed : ModelFormat::buffer;
+    if (out == NULL || out == Py_None) {
+        return get_model_buffer_new(solver_model(self), self->cmsat->nVars(), fmt, vars.get());
+    }
+
+    Py_buffer view;
+    if (PyObject_GetBuffer(out, &view, PyBUF_CONTIG) != 0) {
+        return NULL;
+    }
+    const size_t needed = model_buffer_size(self->cmsat->nVars(), fmt, vars.get());
+    if (view.itemsize != 1) {
+        PyErr_Format(PyExc_ValueError, "invalid out buffer: expected itemsize 1, got %zd", view.itemsize);
+        PyBuffer_Release(&view);
+        return NULL;
+    }
+    if ((size_t)view.len < needed) {
+        PyErr_Format(PyExc_ValueError, "out buffer too small: need %zu bytes, got %zd", needed, view.len);
+        PyBuffer_Release(&view);
+        return NULL;
+    }
+    write_model_buffer(solver_model(self), self->cmsat->nVars(), fmt, view.buf, vars.get());
+    PyBuffer_Release(&view);
+
+    Py_INCREF(out);
+    return out;
+}
+
+PyDoc_STRVAR(nb_vars_doc,
+"nb_vars()\n\
+Return the number of literals in the solver.\n\
+\n\
+:return: Number of literals\n\
+:rtype: <int>"
+);
+
+static PyObject* nb_vars(Solver *self)
+{
+    return PyLong_FromLong(self->cmsat->nVars());
+
+}
+
+// Parses an iterable of literals. Their variables must already be used in
+// cmsat, unless it is NULL.
+static int parse_assumption_lits(PyObject* assumptions, SATSolver* cmsat, std::vector<Lit>& assumption_lits)
+{
+    PyObject *iterator = PyObject_GetIter(assumptions);
+    if (iterator == NULL) {
+        PyErr_SetString(PyExc_TypeError, "interable object expected");
+        return 0;
+    }
+
+    PyObject *lit;
+    while ((lit = PyIter_Next(iterator)) != NULL) {
+        long var;
+        bool sign;
+        int ret = convert_lit_to_sign_and_var(lit, var, sign);
+        Py_DECREF(lit);
+        if (!ret) {
+            Py_DECREF(iterator);
+            return 0;
+        }
+
+        if (cmsat != NULL && var >= cmsat->nVars()) {
+            Py_DECREF(iterator);
+            PyErr_Format(PyExc_ValueError, "Variable %ld not used in clauses", var+1);
+            return 0;
+        }
+
+        assumption_lits.push_back(Lit(var, sign));
+    }
+    Py_DECREF(iterator);
+    if (PyErr_Occurred()) {
+        return 0;
+    }
+
+    return 1;
+}
+
+// Parses an iterable of (1-based) variable numbers into 0-based variables.
+// All of them must already be used in the solver.
+static int parse_var_list(PyObject* vars_obj, SATSolver* cmsat, std::vector<uint32_t>& vars)
+{
+    PyObject *iterator = PyObject_GetIter(vars_obj);
+    if (iterator == NULL) {
+        PyErr_SetString(PyExc_TypeError, "iterable object expected");
+        return 0;
+    }
+
+    PyObject *lit;
+    while ((lit = PyIter_Next(iterator)) != NULL) {
+        long var;
+        bool sign;
+        int ret = convert_lit_to_sign_and_var(lit, var, sign);
+        Py_DECREF(lit);
+        if (!ret) {
+            Py_DECREF(iterator);
+            return 0;
+        }
+        if (sign) {
+            Py_DECREF(iterator);
+            PyErr_SetString(PyExc_ValueError, "variables must be positive integers");
+            return 0;
+        }
+        if (var >= cmsat->nVars()) {
+            Py_DECREF(iterator);
+            PyErr_Format(PyExc_ValueError, "Variable %ld not used in clauses", var+1);
+            return 0;
+        }
+
+        vars.push_back(var);
+    }
+    Py_DECREF(iterator);
+    if (PyErr_Occurred()) {
+        return 0;
+    }
+
+    return 1;
+}
+
+// Parses the vars= argument of solve() and get_model_buffer(): the
+// variables whose values are returned instead of the whole model. vars
+// stays NULL if it is None.
+static int parse_model_vars(Solver *self, PyObject *vars_obj, std::unique_ptr<std::vector<uint32_t>>& vars)
+{
+    if (vars_obj == NULL || vars_obj == Py_None) {
+        return 1;
+    }
+    vars.reset(new std::vector<uint32_t>);
+
+    if (PyUnicode_Check(vars_obj)) {
+        if (PyUnicode_CompareWithASCIIString(vars_obj, "sampling") != 0) {
+            PyErr_SetString(PyExc_ValueError, "vars must be variables or 'sampling'");
+            return 0;
+        }
+        if (!self->cmsat->get_sampl_vars_set()) {
+            PyErr_SetString(PyExc_RuntimeError, "no sampling variables are set");
+            return 0;
+        }
+        *vars = self->cmsat->get_sampl_vars();
+        return 1;
+    }
+
+    if (!PyObject_CheckBuffer(vars_obj)) {
+        return parse_var_list(vars_obj, self->cmsat, *vars);
+    }
+    Py_buffer view;
+    if (PyObject_GetBuffer(vars_obj, &view, PyBUF_CONTIG_RO | PyBUF_FORMAT) != 0) {
+        return 0;
+    }
+    int ret = check_int_buffer(&view, "vars array");
+    if (ret) {
+        const size_t length = view.len / view.itemsize;
+        const long num_vars = self->cmsat->nVars();
+        ret = with_int_array(&view, [&](auto array) {
+            vars->reserve(length);
+            for (size_t i = 0; i < length; i++) {
+                if (array[i] <= 0) {
+                    PyErr_SetString(PyExc_ValueError, "variables must be positive integers");
+                    return 0;
+                }
+                if (array[i] > num_vars) {
+                    PyErr_Format(PyExc_ValueError, "Variable %ld not used in clauses", (long)array[i]);
+                    return 0;
+                }
+                vars->push_back(array[i] - 1);
+            }
+            return 1;
+        });
+    }
+    PyBuffer_Release(&view);
+    return ret;
+}
+
+PyDoc_STRVAR(solve_doc,
+"solve(assumptions=None, verbose=None, time_limit=None, confl_limit=None, model_format='tuple', vars=None)\n\
+Solve the system of equations that have been added with add_clause();\n\
+\n\
+.. example:: \n\
+    from pycryptosat import Solver\n\
+    >>> s = Solver()\n\
+    >>> s.add_clause([1])\n\
+    >>> s.add_clause([-2])\n\
+    >>> s.add_clause([3])\n\
+    >>> s.add_clause([-1, 2, 3])\n\
+    >>> sat, solution = s.solve()\n\
+    >>> print sat\n\
+    True\n\
+    >>> print solution\n\
+    (None, True, False, True)\n\
+    \n\
+    We can also try to assume any variable values for a single solver run:\n\
+    \n\
+    sat, solution = s.solve([-3])\n\
+    >>> print sat\n\
+    False\n\
+    >>> print solution\n\
+    None\n\
+\n\
+:param assumptions: (Optional) Allows the user to set values to specific\n\
+    ariables in the solver in a temporary fashion. This means that in case\n\
+    the problem is satisfiable but e.g it's unsatisfiable if variable 2 is\n\
+    FALSE, then solve([-2]) will return UNSAT. However, a subsequent call to\n\
+    solve() will still return a solution.\n\
+:type assumptions: <list>\n\
+:param verbose: (Optional) Allows the user to set a verbosity for just this\n\
+    solve.\n\
+:type verbose: <int>\n\
+:param time_limit: (Optional) Allows the user to set a timeout for just this\n\
+    solve.\n\
+:type time_limit: <double>\n\
+:param confl_limit: (Optional) Allows the user to set a conflict limit for just\n\
+    this solve.\n\
+:type confl_limit: <long>\n\
+:param model_format: (Optional) How the solution is returned: 'tuple',\n\
+    'buffer' or 'packed' (see get_model_buffer()), or 'none' to not return\n\
+    it at all, e.g. when it is read later with get_model_buffer(out=...).\n\
+:type model_format: <str>\n\
+:param vars: (Optional) Only return the values of these variables, in this\n\
+    order and without the None placeholder, so that the cost does not grow\n\
+    with the number of (e.g. auxiliary) variables of the solver: an\n\
+    iterable or a 1-D buffer of ints, or 'sampling' for the sampling\n\
+    variables of the solver.\n\
+:type vars: <list>, <array> or <str>\n\
+:return: A tuple. First part of the tuple indicates whether the problem\n\
+    is satisfiable. The second part is a tuple contains the solution,\n\
+    preceded by None, so you can index into it with the variable number.\n\
+    E.g. solution[1] returns the value for variable 1.\n\
+:rtype: <tuple <tuple>>"
+);
+
+
+// Checks the verbose, time_limit and confl_limit arguments of a solve
+static int check_solve_limits(int verbose, double time_limit, long confl_limit)
+{
+    if (verbose < 0) {
+        PyErr_SetString(PyExc_ValueError, "verbosity must be at least 0");
+        return 0;
+    }
+    if (time_limit < 0) {
+        PyErr_SetString(PyExc_ValueError, "time_limit must be at least 0");
+        return 0;
+    }
+    if (confl_limit < 0) {
+        PyErr_SetString(PyExc_ValueError, "conflict limit must be at least 0");
+        return 0;
+    }
+    return 1;
+}
+
+// Parses the arguments of solve() and applies the verbosity and limits
+// given for this call to the solver. restore_solver_limits() undoes it.
+static int prepare_solve(
+    Solver *self
+    , PyObject *args
+    , PyObject *kwds
+    , std::vector<Lit>& assumption_lits
+    , ModelFormat& fmt
+    , std::unique_ptr<std::vector<uint32_t>>& vars
+) {
+    PyObject* assumptions = NULL;
+    PyObject* vars_obj = NULL;
+
+    int verbose = self->verbose;
+    double time_limit = self->time_limit;
+    long confl_limit = self->confl_limit;
+    const char* model_format = NULL;
+
+    static char const* kwlist[] = {"assumptions", "verbose", "time_limit", "confl_limit", "model_format", "vars", NULL};
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|OidlzO", const_cast<char**>(kwlist), &assumptions, &verbose, &time_limit, &confl_limit, &model_format, &vars_obj)) {
+        return 0;
+    }
+    if (!parse_model_format(model_format, fmt)) {
+        return 0;
+    }
+    if (!parse_model_vars(self, vars_obj, vars)) {
+        return 0;
+    }
+    if (!check_solve_limits(verbose, time_limit, confl_limit)) {
+        return 0;
+    }
+
+    if (assumptions) {
+        if (!parse_assumption_lits(assumptions, self->cmsat, assumption_lits)) {
+            return 0;
+        }
+    }
+
+    self->cmsat->set_verbosity(verbose);
+    self->cmsat->set_max_time(time_limit);
+    self->cmsat->set_max_confl(confl_limit);
+    return 1;
+}
+
+// Does not need the GIL
+static void restore_solver_limits(Solver *self)
+{
+    self->cmsat->set_verbosity(self->verbose);
+    self->cmsat->set_max_time(self->time_limit);
+    self->cmsat->set_max_confl(self->confl_limit);
+}
+
+// The (satisfiable, solution) tuple returned by solve(). The solution is
+// model if given, otherwise the model of self, restricted to vars if given.
+static PyObject* build_solve_result(Solver *self, lbool res, ModelFormat fmt, const std::vector<lbool>* model = NULL,
+    const std::vector<uint32_t>* vars = NULL)
+{
+    PyObject *result = PyTuple_New((Py_ssize_t) 2);
+    if (result == NULL) {
+        PyErr_SetString(PyExc_SystemError, "failed to create a tuple");
+        return NULL;
+    }
+
+    if (res == l_True) {
+        PyObject* solution = get_model_as(model != NULL ? *model : solver_model(self), self->cmsat->nVars(), fmt, vars);
+        if (!solution) {
+            Py_DECREF(result);
+            return NULL;
+        }
+        Py_INCREF(Py_True);
+
+        PyTuple_SET_ITEM(result, 0, Py_True);
+        PyTuple_SET_ITEM(result, 1, solution);
+
+    } else if (res == l_False) {
+        Py_INCREF(Py_False);
+        Py_INCREF(Py_None);
+
+        PyTuple_SET_ITEM(result, 0, Py_False);
+        PyTuple_SET_ITEM(result, 1, Py_None);
+
+    } else if (res == l_Undef) {
+        Py_INCREF(Py_None);
+        Py_INCREF(Py_None);
+
+        PyTuple_SET_ITEM(result, 0, Py_None);
+        PyTuple_SET_ITEM(result, 1, Py_None);
+    } else {
+        // res can only be l_False, l_True, l_Undef
+        assert((res == l_False) || (res == l_True) || (res == l_Undef));
+        Py_DECREF(result);
+        return PyErr_NewExceptionWithDoc("pycryptosat.IllegalState", "Error Occurred in CyrptoMiniSat", NULL, NULL);
+    }
+
+    return result;
+}
+
+static PyObject* solve(Solver *self, PyObject *args, PyObject *kwds)
+{
+    if (!check_single_run(self)) {
+        return NULL;
+    }
+    std::vector<Lit> assumption_lits;
+    ModelFormat fmt;
+    std::unique_ptr<std::vector<uint32_t>> vars;
+    if (!prepare_solve(self, args, kwds, assumption_lits, fmt, vars)) {
+        return NULL;
+    }
+
+    lbool res;
+    clear_interrupt(self);
+    set_solving(self, true);
+    Py_BEGIN_ALLOW_THREADS      /* release GIL */
+    const CallStatsTimer timer(self->cmsat);
+    res = self->cmsat->solve(&assumption_lits);
+    extend_solver_model(self, res);
+    timer.stop(self->cmsat, "solve", self->last_stats);
+    Py_END_ALLOW_THREADS
+    set_solving(self, false);
+    self->last_result = res;
+    restore_solver_limits(self);
+
+    return build_solve_result(self, res, fmt, NULL, vars.get());
+}
+
+// Reads sets of literals given as a CSR pair of buffers into lits, set i
+// being lits[starts[i]:starts[i+1]]. All variables must exist in the solver.
+template <typename T, typename P>
+static int _read_csr_lits(
+    SATSolver *cmsat
+    , const size_t indptr_length
+    , const P *indptr
+    , const size_t lits_length
+    , const T *array
+    , std::vector<Lit>& lits
+    , std::vector<size_t>& starts
+) {
+    ClauseBatch batch;
+    long max_var = 0;
+    if (!_read_csr_batch(indptr_length, indptr, lits_length, array, batch, max_var)) {
+        return 0;
+    }
+    if (max_var > (long)cmsat->nVars()) {
+        PyErr_Format(PyExc_ValueError, "Variable %ld not used in clauses", max_var);
+        return 0;
+    }
+    lits = std::move(batch.lits);
+    starts = std::move(batch.starts);
+    return 1;
+}
+
+// Reads sets of literals, either an iterable of iterables of literals, or a
+// CSR pair of buffers if indptr is given. See _read_csr_lits().
+static int parse_lit_sets(
+    PyObject *sets
+    , PyObject *indptr
+    , SATSolver *cmsat
+    , std::vector<Lit>& lits
+    , std::vector<size_t>& starts
+) {
+    if (indptr != NULL && indptr != Py_None) {
+        Py_buffer view;
+        if (PyObject_GetBuffer(sets, &view, PyBUF_CONTIG_RO | PyBUF_FORMAT) != 0) {
+            return 0;
+        }
+        Py_buffer indptr_view;
+        if (PyObject_GetBuffer(indptr, &indptr_view, PyBUF_CONTIG_RO | PyBUF_FORMAT) != 0) {
+            PyBuffer_Release(&view);
+            return 0;
+        }
+        int ret = check_int_buffer(&view, "literal array") && check_int_buffer(&indptr_view, "indptr");
+        if (ret) {
+            const size_t lits_length = view.len / view.itemsize;
+            const size_t indptr_length = indptr_view.len / indptr_view.itemsize;
+            ret = with_int_array(&view, [&](auto array) {
+                return with_int_array(&indptr_view, [&](auto ptr) {
+                    return _read_csr_lits(cmsat, indptr_length, ptr, lits_length, array, lits, starts);
+                });
+            });
+        }
+        PyBuffer_Release(&indptr_view);
+        PyBuffer_Release(&view);
+        return ret;
+    }
+
+    PyObject *iterator = PyObject_GetIter(sets);
+    if (iterator == NULL) {
+        PyErr_SetString(PyExc_TypeError, "iterable object expected");
+        return 0;
+    }
+    PyObject *set;
+    while ((set = PyIter_Next(iterator)) != NULL) {
+        starts.push_back(lits.size());
+        int ret = parse_assumption_lits(set, cmsat, lits);
+        Py_DECREF(set);
+        if (!ret) {
+            Py_DECREF(iterator);
+            return 0;
+        }
+    }
+    Py_DECREF(iterator);
+    if (PyErr_Occurred()) {
+        return 0;
+    }
+    starts.push_back(lits.size());
+    return 1;
+}
+
+// Converts literals to DIMACS ints, e.g. for the conflicts
+static void append_dimacs_lits(const std::vector<Lit>& lits, std::vector<int32_t>& out)
+{
+    for (const Lit lit: lits) {
+        out.push_back(lit.sign() ? -(int32_t)(lit.var()+1) : (int32_t)(lit.var()+1));
+    }
+}
+
+PyDoc_STRVAR(solve_many_doc,
+"solve_many(cubes, indptr=None, verbose=None, time_limit=None, confl_limit=None, model_format='none', conflicts=False)\n\
+Solve the system once for each set of assumptions in cubes.\n\
+\n\
+All the calls run back-to-back in C++ with the GIL released, so the per\n\
+call overhead of solve() is only paid once.\n\
+\n\
+:param cubes: Sets of assumptions. Either an iterable of lists of literals,\n\
+    or, if indptr is given, a flat buffer of literals where set i is\n\
+    cubes[indptr[i]:indptr[i+1]].\n\
+:type cubes: <list> or <array.array>\n\
+:param indptr: (Optional) Offsets of the sets of assumptions in cubes\n\
+:type indptr: <array.array> or other buffer\n\
+:param verbose: (Optional) Verbosity for these solves\n\
+:type verbose: <int>\n\
+:param time_limit: (Optional) Time limit for each of these solves. It is\n\
+    a budget per set of assumptions, not for the whole batch.\n\
+:type time_limit: <double>\n\
+:param confl_limit: (Optional) Conflict limit for each of these solves,\n\
+    also per set of assumptions\n\
+:type confl_limit: <long>\n\
+:param model_format: (Optional) 'none' to not return models, 'buffer' or\n\
+    'packed' to return them as a 2-D buffer with one row per set of\n\
+    assumptions, in the format of get_model_buffer(). Rows of sets that\n\
+    were not satisfiable are all -1 ('buffer') or 0 ('packed').\n\
+:type model_format: <str>\n\
+:param conflicts: (Optional) Also return the conflicts, as get_conflict()\n\
+    would, of the sets that were not satisfiable\n\
+:type conflicts: <bool>\n\
+:return: A tuple (status, models, conflicts). status is an int8 buffer\n\
+    with 1 for satisfiable, 0 for unsatisfiable, -1 for out of budget or\n\
+    not run because of interrupt().\n\
+    models is the 2-D buffer of models or None. conflicts is None, or a\n\
+    CSR pair (literals, indptr) of buffers, the conflict of set i being\n\
+    literals[indptr[i]:indptr[i+1]], empty unless it was unsatisfiable.\n\
+:rtype: <tuple>"
+);
+
+static PyObject* solve_many(Solver *self, PyObject *args, PyObject *kwds)
+{
+    PyObject* cubes = NULL;
+    PyObject* indptr = NULL;
+    int verbose = self->verbose;
+    double time_limit = self->time_limit;
+    long confl_limit = self->confl_limit;
+    const char* model_format = "none";
+    int want_conflicts = 0;
+
+    static char const* kwlist[] = {"cubes", "indptr", "verbose", "time_limit", "confl_limit", "model_format", "conflicts", NULL};
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "O|Oidlzp", const_cast<char**>(kwlist),
+        &cubes, &indptr, &verbose, &time_limit, &confl_limit, &model_format, &want_conflicts))
+    {
+        return NULL;
+    }
+    if (!check_solve_limits(verbose, time_limit, confl_limit)) {
+        return NULL;
+    }
+    ModelFormat fmt = ModelFormat::none;
+    if (model_format != NULL && !parse_model_format(model_format, fmt)) {
+        return NULL;
+    }
+    if (fmt == ModelFormat::tuple) {
+        PyErr_SetString(PyExc_ValueError, "model_format must be 'none', 'buffer' or 'packed'");
+        return NULL;
+    }
+
+    std::vector<Lit> lits;
+    std::vector<size_t> starts;
+    if (!parse_lit_sets(cubes, indptr, self->cmsat, lits, starts)) {
+        return NULL;
+    }
+    const size_t num_cubes = starts.size() - 1;
+    if (!check_single_run(self, num_cubes)) {
+        return NULL;
+    }
+
+    std::vector<int8_t> status(num_cubes, -1);
+    const size_t width = (fmt == ModelFormat::none) ? 0 : model_buffer_size(self->cmsat->nVars(), fmt);
+    std::vector<uint8_t> models(num_cubes * width, fmt == ModelFormat::buffer ? 0xff : 0);
+    std::vector<int64_t> confl_indptr(1, 0);
+    std::vector<int32_t> confl_lits;
+    lbool res = l_Undef;
+
+    clear_interrupt(self);
+    set_solving(self, true);
+    Py_BEGIN_ALLOW_THREADS      /* release GIL */
+    const CallStatsTimer timer(self->cmsat);
+    std::vector<Lit> assumption_lits;
+    self->cmsat->set_verbosity(verbose);
+    for (size_t i = 0; i < num_cubes && !is_interrupted(self); i++) {
+        assumption_lits.assign(lits.begin() + starts[i], lits.begin() + starts[i+1]);
+        // The limits are deadlines counted from when they are set
+        self->cmsat->set_max_time(time_limit);
+        self->cmsat->set_max_confl(confl_limit);
+        res = self->cmsat->solve(&assumption_lits);
+        if (res == l_True) {
+            status[i] = 1;
+            if (width) {
+                extend_solver_model(self, res);
+                write_model_buffer(solver_model(self), self->cmsat->nVars(), fmt, models.data() + i*width);
+            }
+        } else if (res == l_False) {
+            status[i] = 0;
+            if (want_conflicts) {
+                append_dimacs_lits(self->cmsat->get_conflict(), confl_lits);
+            }
+        }
+        confl_indptr.push_back(confl_lits.size());
+    }
+    // Sets not run because of interrupt() have no conflict
+    confl_indptr.resize(num_cubes + 1, confl_lits.size());
+    timer.stop(self->cmsat, "solve_many", self->last_stats);
+    Py_END_ALLOW_THREADS
+    set_solving(self, false);
+    self->last_result = res;
+    restore_solver_limits(self);
+
+    PyObject *status_obj = new_buffer(std::move(status), "b");
+    if (status_obj == NULL) {
+        return NULL;
+    }
+    PyObject *models_obj;
+    if (width) {
+        models_obj = new_buffer(std::move(models), fmt == ModelFormat::packed ? "B" : "b", num_cubes);
+        if (models_obj == NULL) {
+            Py_DECREF(status_obj);
+            return NULL;
+        }
+    } else {
+        Py_INCREF(Py_None);
+        models_obj = Py_None;
+    }
+    PyObject *conflicts_obj;
+    if (want_conflicts) {
+        PyObject *indptr_obj = new_buffer(std::move(confl_indptr), "q");
+        PyObject *lits_obj = indptr_obj ? new_buffer(std::move(confl_lits), "i") : NULL;
+        conflicts_obj = lits_obj ? PyTuple_Pack(2, lits_obj, indptr_obj) : NULL;
+        Py_XDECREF(indptr_obj);
+        Py_XDECREF(lits_obj);
+        if (conflicts_obj == NULL) {
+            Py_DECREF(status_obj);
+            Py_DECREF(models_obj);
+            return NULL;
+        }
+    } else {
+        Py_INCREF(Py_None);
+        conflicts_obj = Py_None;
+    }
+
+    return Py_BuildValue("(NNN)", status_obj, models_obj, conflicts_obj);
+}
+
+/*************************** Asynchronous solve *************************/
+
+// One solve_async() run. Also serves as the token identifying the run, so a
+// late cancellation can never interrupt a later solve on the same solver.
+struct AsyncSolveTask {
+    enum State { queued, running, done };
+
+    Solver *self;
+    std::vector<Lit> assumption_lits;
+    ModelFormat fmt;
+    std::unique_ptr<std::vector<uint32_t>> vars;
+    State state = queued;
+};
+
+// The run is over, or will never start: give the solver back
+static void finish_async_solve(AsyncSolveTask *task)
+{
+    task->state = AsyncSolveTask::done;
+    restore_solver_limits(task->self);
+    task->self->async_running = 0;
+}
+
+static void delete_async_solve_task(AsyncSolveTask *task)
+{
+    if (task->state == AsyncSolveTask::queued) {
+        finish_async_solve(task);
+    }
+    Py_DECREF(task->self);
+    delete task;
+}
+
+static void AsyncSolveTask_destroy(PyObject *capsule)
+{
+    delete_async_solve_task((AsyncSolveTask *)PyCapsule_GetPointer(capsule, NULL));
+}
+
+// Runs on the executor's thread. The GIL is only released around the solve.
+static PyObject* async_solve_run(PyObject *capsule, PyObject *)
+{
+    AsyncSolveTask *task = (AsyncSolveTask *)PyCapsule_GetPointer(capsule, NULL);
+    if (task->state != AsyncSolveTask::queued) {
+        // Cancelled before it started
+        Py_INCREF(Py_None);
+        return Py_None;
+    }
+    task->state = AsyncSolveTask::running;
+
+    Solver *self = task->self;
+    lbool res = l_Undef;
+    set_solving(self, true);
+    Py_BEGIN_ALLOW_THREADS      /* release GIL */
+    const CallStatsTimer timer(self->cmsat);
+    if (!is_interrupted(self)) {
+        res = self->cmsat->solve(&task->assumption_lits);
+        extend_solver_model(self, res);
+    }
+    timer.stop(self->cmsat, "solve_async", self->last_stats);
+    Py_END_ALLOW_THREADS
+    set_solving(self, false);
+    self->last_result = res;
+    finish_async_solve(task);
+
+    return build_solve_result(self, res, task->fmt, NULL, task->vars.get());
+}
+
+// Done callback of the future: interrupts the solve if the future was
+// cancelled while the run was still going
+static PyObject* interrupt_if_cancelled(PyObject *capsule, PyObject *fut)
+{
+    AsyncSolveTask *task = (AsyncSolveTask *)PyCapsule_GetPointer(capsule, NULL);
+    PyObject *cancelled = PyObject_CallMethod(fut, "cancelled", NULL);
+    if (cancelled == NULL) {
+        return NULL;
+    }
+    if (PyObject_IsTrue(cancelled)) {
+        if (task->state == AsyncSolveTask::queued) {
+            finish_async_solve(task);
+        } else if (task->state == AsyncSolveTask::running) {
+            request_interrupt(task->self);
+        }
+    }
+    Py_DECREF(cancelled);
+    Py_INCREF(Py_None);
+    return Py_None;
+}
+
+static PyMethodDef async_solve_run_def = {
+    "_async_solve_run", (PyCFunction) async_solve_run, METH_NOARGS, NULL
+};
+static PyMethodDef interrupt_if_cancelled_def = {
+    "_interrupt_if_cancelled", (PyCFunction) interrupt_if_cancelled, METH_O, NULL
+};
+
+PyDoc_STRVAR(solve_async_doc,
+"solve_async(assumptions=None, verbose=None, time_limit=None, confl_limit=None, model_format='tuple', executor=None)\n\
+Solve the system in an executor, for use with asyncio.\n\
+\n\
+Takes the same arguments as solve(...). Must be called with an asyncio\n\
+event loop running. The solve runs with loop.run_in_executor(executor, ...)\n\
+and releases the GIL, so solves on different solvers run in parallel, up to\n\
+the number of workers of the executor. The solver must not be used\n\
+otherwise until the returned future is done. Cancelling the future, e.g. by\n\
+cancelling the task awaiting it, interrupts the solve.\n\
+\n\
+.. example:: \n\
+    >>> sat, solution = await s.solve_async([-2])\n\
+\n\
+:param executor: (Optional) concurrent.futures.Executor to run the solve\n\
+    in. Default: the event loop's default executor.\n\
+:return: An asyncio future with the same result as solve(...)\n\
+:rtype: <asyncio.Future>"
+);
+
+// Submits the task to the executor. Takes ownership of the task.
+static PyObject* submit_async_solve(PyObject *loop, PyObject *executor, AsyncSolveTask *task)
+{
+    PyObject *capsule = PyCapsule_New(task, NULL, AsyncSolveTask_destroy);
+    if (capsule == NULL) {
+        delete_async_solve_task(task);
+        return NULL;
+    }
+    PyObject *run = PyCFunction_New(&async_solve_run_def, capsule);
+    PyObject *callback = PyCFunction_New(&interrupt_if_cancelled_def, capsule);
+    Py_DECREF(capsule);
+    if (run == NULL || callback == NULL) {
+        Py_XDECREF(run);
+        Py_XDECREF(callback);
+        return NULL;
+    }
+
+    PyObject *fut = PyObject_CallMethod(loop, "run_in_executor", "OO", executor, run);
+    Py_DECREF(run);
+    if (fut != NULL) {
+        PyObject *ret = PyObject_CallMethod(fut, "add_done_callback", "(O)", callback);
+        if (ret == NULL) {
+            Py_CLEAR(fut);
+        }
+        Py_XDECREF(ret);
+    }
+    Py_DECREF(callback);
+    return fut;
+}
+
+static PyObject* solve_async(Solver *self, PyObject *args, PyObject *kwds)
+{
+    if (!check_single_run(self)) {
+        return NULL;
+    }
+    if (self->async_running) {
+        PyErr_SetString(PyExc_RuntimeError, "solve_async() is already running on this solver");
+        return NULL;
+    }
+
+    // Takes the arguments of solve(), plus executor
+    PyObject *executor = kwds ? PyDict_GetItemString(kwds, "executor") : NULL;
+    if (executor != NULL) {
+        kwds = PyDict_Copy(kwds);
+        if (kwds == NULL) {
+            return NULL;
+        }
+        PyDict_DelItemString(kwds, "executor");
+    } else {
+        executor = Py_None;
+        Py_XINCREF(kwds);
+    }
+    Py_INCREF(executor);
+
+    AsyncSolveTask *task = new AsyncSolveTask;
+    const int ok = prepare_solve(self, args, kwds, task->assumption_lits, task->fmt, task->vars);
+    Py_XDECREF(kwds);
+    if (!ok) {
+        delete task;
+        Py_DECREF(executor);
+        return NULL;
+    }
+
+    PyObject *loop = NULL;
+    PyObject *asyncio = PyImport_ImportModule("asyncio");
+    if (asyncio != NULL) {
+        loop = PyObject_CallMethod(asyncio, "get_running_loop", NULL);
+        Py_DECREF(asyncio);
+    }
+    if (loop == NULL) {
+        restore_solver_limits(self);
+        delete task;
+        Py_DECREF(executor);
+        return NULL;
+    }
+
+    Py_INCREF(self);
+    task->self = self;
+    self->async_running = 1;
+    clear_interrupt(self);
+    PyObject *fut = submit_async_solve(loop, executor, task);
+    Py_DECREF(loop);
+    Py_DECREF(executor);
+    return fut;
+}
+
+// Tokens of SATSolver::simplify() strategies. Unknown ones would make the
+// library exit, and some, e.g. "card-find" or "sls", are not meant to be
+// called from the outside, so only these are accepted.
+static const char* const simplify_strategy_tokens[] = {
+    "scc-vrepl", "must-scc-vrepl",
+    "full-probe", "intree-probe", "backbone",
+    "sub-impl", "str-impl", "sub-str-cls-with-bin", "sub-cls-with-bin",
+    "distill-bins", "distill-litrem", "distill-cls", "distill-cls-onlyrem",
+    "must-distill-cls", "must-distill-cls-onlyrem",
+    "oracle-vivif", "oracle-vivif-fast", "oracle-vivif-veryfast",
+    "oracle-vivif-sparsify", "oracle-vivif-sparsify-mustfinish",
+    "oracle-sparsify", "oracle-sparsify-fast",
+    "clean-cls", "cl-consolidate", "renumber", "must-renumber", "breakid",
+    "occ-backw-sub-str", "occ-backw-sub", "occ-del-elimed", "occ-rem-unconn-assumps",
+    "occ-ternary-res", "occ-xor", "occ-lit-rem", "occ-clean-implicit",
+    "occ-gate-based-eqlit", "occ-bve-empty", "occ-bve", "occ-rem-with-orgates",
+    "occ-cl-rem-with-orgates", "occ-bva", "occ-resolv-subs",
+    NULL
+};
+
+// Checks that strategy is a comma separated list of known tokens
+static int check_simplify_strategy(const std::string& strategy)
+{
+    size_t begin = 0;
+    while (begin <= strategy.size()) {
+        size_t end = strategy.find(',', begin);
+        if (end == std::string::npos) {
+            end = strategy.size();
+        }
+        std::string token = strategy.substr(begin, end - begin);
+        const size_t first = token.find_first_not_of(" \t\n");
+        token = first == std::string::npos ? "" : token.substr(first, token.find_last_not_of(" \t\n") - first + 1);
+        std::transform(token.begin(), token.end(), token.begin(), ::tolower);
+
+        bool known = token.empty();
+        for (size_t i = 0; !known && simplify_strategy_tokens[i] != NULL; i++) {
+            known = token == simplify_strategy_tokens[i];
+        }
+        if (!known) {
+            PyErr_Format(PyExc_ValueError, "unknown simplification strategy '%s'", token.c_str());
+            return 0;
+        }
+        begin = end + 1;
+    }
+    return 1;
+}
+
+PyDoc_STRVAR(simplify_doc,
+"simplify(assumptions=None, strategy=None, time_limit=None, confl_limit=None)\n\
+Simplify the system without solving it.\n\
+\n\
+Runs the inprocessing steps (variable elimination, distillation, probing,\n\
+...) once, with the GIL released, so that many later incremental solve(...)\n\
+calls on the same formula do not each pay for them.\n\
+\n\
+.. example:: \n\
+    >>> s.simplify(strategy='occ-bve, distill-cls, scc-vrepl')\n\
+    >>> for assumptions in queries:\n\
+    ...     s.solve(assumptions)\n\
+\n\
+:param assumptions: (Optional) Literals that will be assumed by later\n\
+    solves. Their variables are not eliminated.\n\
+:type assumptions: <list>\n\
+:param strategy: (Optional) Comma separated list of simplification steps,\n\
+    e.g. 'occ-bve, distill-cls, scc-vrepl'. Default: the solver's own\n\
+    inprocessing schedule.\n\
+:type strategy: <str>\n\
+:param time_limit: (Optional) Time limit for this call\n\
+:type time_limit: <double>\n\
+:param confl_limit: (Optional) Conflict limit for this call\n\
+:type confl_limit: <long>\n\
+:return: False if the system was found unsatisfiable, otherwise None\n\
+:rtype: <bool> or <None>"
+);
+
+static PyObject* simplify(Solver *self, PyObject *args, PyObject *kwds)
+{
+    if (!check_single_run(self)) {
+        return NULL;
+    }
+    static char const* kwlist[] = {"assumptions", "strategy", "time_limit", "confl_limit", NULL};
+    PyObject* assumptions = NULL;
+    const char* strategy_str = NULL;
+    double time_limit = self->time_limit;
+    long confl_limit = self->confl_limit;
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|Ozdl", const_cast<char**>(kwlist),
+        &assumptions, &strategy_str, &time_limit, &confl_limit))
+    {
+        return NULL;
+    }
+    if (!check_solve_limits(self->verbose, time_limit, confl_limit)) {
+        return NULL;
+    }
+    std::string strategy;
+    if (strategy_str != NULL) {
+        strategy = strategy_str;
+        if (!check_simplify_strategy(strategy)) {
+            return NULL;
+        }
+    }
+    std::vector<Lit> assumption_lits;
+    if (assumptions != NULL && assumptions != Py_None) {
+        if (!parse_assumption_lits(assumptions, self->cmsat, assumption_lits)) {
+            return NULL;
+        }
+    }
+
+    lbool res;
+    clear_interrupt(self);
+    set_solving(self, true);
+    Py_BEGIN_ALLOW_THREADS      /* release GIL */
+    const CallStatsTimer timer(self->cmsat);
+    self->cmsat->set_max_time(time_limit);
+    self->cmsat->set_max_confl(confl_limit);
+    res = self->cmsat->simplify(&assumption_lits, strategy_str != NULL ? &strategy : NULL);
+    restore_solver_limits(self);
+    timer.stop(self->cmsat, "simplify", self->last_stats);
+    Py_END_ALLOW_THREADS
+    set_solving(self, false);
+    self->last_result = l_Undef;
+
+    if (res == l_False) {
+        Py_INCREF(Py_False);
+        return Py_False;
+    }
+    Py_INCREF(Py_None);
+    return Py_None;
+}
+
+// Copies the irredundant clauses of from, as simplified so far, into to, a
+// SATSolver or a Formula. They come out in the internal numbering of from, so
+// they are mapped back to the variables of the user, and the fixed and
+// replaced variables, which are not in them, are added as unit and binary
+// clauses. The variables that are left out, the eliminated ones, are added
+// to rec with their constraints. Does not need the GIL.
+template <typename T>
+static void copy_simplified_clauses(SATSolver *from, T *to, Reconstruction& rec)
+{
+    const uint32_t num_vars = from->nVars();
+    std::map<uint32_t, VarMap> var_map;
+    for (uint32_t var = 0; var < num_vars; var++) {
+        var_map[var] = VarMap(Lit(var, false));
+    }
+    var_map = from->update_var_mapping(var_map);
+
+    to->new_vars(num_vars);
+    std::vector<Lit> inter_to_outer(from->simplified_nvars(), lit_Undef);
+    std::vector<Lit> lits;
+    for (const auto& mapped: var_map) {
+        const Lit lit(mapped.first, false);
+        if (mapped.second.lit == lit_Undef) {
+            lits.assign(1, mapped.second.val == l_True ? lit : ~lit);
+            to->add_clause(lits);
+            continue;
+        }
+        const Lit inter = mapped.second.lit;
+        Lit& outer = inter_to_outer[inter.var()];
+        if (outer == lit_Undef) {
+            outer = lit ^ inter.sign();
+        } else {
+            lits = {~lit, outer ^ inter.sign()};
+            to->add_clause(lits);
+            lits = {lit, ~outer ^ inter.sign()};
+            to->add_clause(lits);
+        }
+    }
+
+    bool is_xor;
+    bool rhs;
+    from->start_getting_constraints(false, true);
+    while (from->get_next_constraint(lits, is_xor, rhs)) {
+        if (lits.size() == 1 && !is_xor && inter_to_outer[lits[0].var()] == lit_Undef) {
+            // Value of a fixed variable, already added above
+            continue;
+        }
+        for (Lit& l: lits) {
+            Lit& outer = inter_to_outer[l.var()];
+            if (outer == lit_Undef) {
+                // Not the image of any variable of the user
+                to->new_var();
+                outer = Lit(to->nVars() - 1, false);
+            }
+            l = outer ^ l.sign();
+        }
+        if (is_xor) {
+            to->add_xor_clause(lits, rhs);
+        } else {
+            to->add_clause(lits);
+        }
+    }
+    from->end_getting_constraints();
+
+    rec.constraints.num_vars = num_vars;
+    rec.removed.assign(num_vars, true);
+    bool any_removed = false;
+    for (uint32_t var = 0; var < num_vars; var++) {
+        rec.removed[var] = var_map.find(var) == var_map.end();
+        any_removed |= rec.removed[var];
+    }
+    if (!any_removed) {
+        return;
+    }
+    from->start_getting_constraints(false);
+    while (from->get_next_constraint(lits, is_xor, rhs)) {
+        bool has_removed = false;
+        for (const Lit l: lits) {
+            has_removed |= rec.removed[l.var()];
+        }
+        if (!has_removed) {
+            continue;
+        }
+        if (is_xor) {
+            rec.constraints.add_xor_clause(lits, rhs);
+        } else {
+            rec.constraints.add_clause(lits);
+        }
+    }
+    from->end_getting_constraints();
+}
+
+// Reconstruction for a simplified copy of self: the one made by the copy,
+// followed by the one self already had. Returns NULL if none is needed.
+static Reconstruction* copy_reconstruction(Solver *self, Reconstruction& rec)
+{
+    if (self->reconstruction != NULL) {
+        rec.add(*self->reconstruction);
+    }
+    for (const bool removed: rec.removed) {
+        if (removed) {
+            return new Reconstruction(std::move(rec));
+        }
+    }
+    return NULL;
+}
+
+PyDoc_STRVAR(clone_doc,
+"clone(simplified=True)\n\
+Create a new Solver with the same configuration and the same clauses.\n\
+\n\
+The clauses are copied in C++ with the GIL released, which is much faster\n\
+than adding them again. Learnt clauses are not copied.\n\
+\n\
+:param simplified: Copy the clauses as simplified so far, e.g. by\n\
+    simplify(...), instead of the clauses as added. Variables eliminated\n\
+    by the simplification are then only given values when the models of\n\
+    the clone are extended to them, so assumptions on them are not taken\n\
+    into account: pass the variables to assume on to simplify(...) first\n\
+    to keep them.\n\
+:return: The new solver.\n\
+:rtype: <Solver>"
+);
+
+static PyObject* clone_solver(Solver *self, PyObject *args, PyObject *kwds)
+{
+    int simplified = 1;
+    static char const* kwlist[] = {"simplified", NULL};
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|p", const_cast<char**>(kwlist), &simplified)) {
+        return NULL;
+    }
+
+    PyTypeObject *type = solver_type();
+    Solver *copy = (Solver*) type->tp_alloc(type, 0);
+    if (copy == NULL) {
+        return NULL;
+    }
+    init_solver(copy, *self->config);
+
+    Py_BEGIN_ALLOW_THREADS      /* release GIL */
+    if (simplified) {
+        Reconstruction rec;
+        copy_simplified_clauses(self->cmsat, copy->cmsat, rec);
+        copy->reconstruction = copy_reconstruction(self, rec);
+    } else {
+        copy_solver_to_solver(self->cmsat, copy->cmsat);
+        if (self->reconstruction != NULL) {
+            copy->reconstruction = new Reconstruction(*self->reconstruction);
+        }
+    }
+    Py_END_ALLOW_THREADS
+
+    return (PyObject*) copy;
+}
+
+// Layout of dumps(), in native byte order: the header, the configuration of
+// the solver, then the formula: the number of variables, the clauses and the
+// XOR constraints, each as their sizes followed by their literals. Last comes
+// a flag telling whether a reconstruction follows, as its removed variables
+// and its formula.
+static const char dump_magic[4] = {'C', 'M', 'S', 'D'};
+static const uint32_t dump_version = 1;
+static const uint32_t dump_byte_order = 0x01020304;
+static_assert(sizeof(Lit) == sizeof(uint32_t), "literals are dumped as they are in memory");
+
+struct DumpWriter {
+    std::string out;
+
+    template <typename T>
+    void put(const T value) { out.append((const char*)&value, sizeof(value)); }
+    void put_bytes(const void* data, size_t size) { out.append((const char*)data, size); }
+};
+
+struct DumpReader {
+    const char* at;
+    const char* end;
+
+    template <typename T>
+    bool get(T& value) { return get_bytes(&value, sizeof(value)); }
+    bool get_bytes(void* data, size_t size)
+    {
+        if ((size_t)(end - at) < size) {
+            return false;
+        }
+        memcpy(data, at, size);
+        at += size;
+        return true;
+    }
+    // Upper bound of the number of items of the given size left, to check
+    // counts before allocating memory for them
+    size_t left(size_t size) const { return (size_t)(end - at) / size; }
+};
+
+static void dump_batch(DumpWriter& writer, const ClauseBatch& batch)
+{
+    std::vector<uint32_t> sizes(batch.size());
+    for (size_t i = 0; i < batch.size(); i++) {
+        sizes[i] = batch.starts[i+1] - batch.starts[i];
+    }
+    writer.put<uint64_t>(sizes.size());
+    writer.put_bytes(sizes.data(), sizes.size() * sizeof(uint32_t));
+    writer.put<uint64_t>(batch.lits.size());
+    writer.put_bytes(batch.lits.data(), batch.lits.size() * sizeof(Lit));
+}
+
+static bool load_batch(DumpReader& reader, ClauseBatch& batch, uint32_t num_vars)
+{
+    uint64_t num_clauses;
+    if (!reader.get(num_clauses) || num_clauses > reader.left(sizeof(uint32_t))) {
+        return false;
+    }
+    std::vector<uint32_t> sizes(num_clauses);
+    if (!reader.get_bytes(sizes.data(), sizes.size() * sizeof(uint32_t))) {
+        return false;
+    }
+    batch.starts.reserve(sizes.size() + 1);
+    for (const uint32_t size: sizes) {
+        batch.starts.push_back(batch.starts.back() + size);
+    }
+
+    uint64_t num_lits;
+    if (!reader.get(num_lits) || num_lits != batch.starts.back() || num_lits > reader.left(sizeof(Lit))) {
+        return false;
+    }
+    batch.lits.resize(num_lits);
+    if (!reader.get_bytes(batch.lits.data(), batch.lits.size() * sizeof(Lit))) {
+        return false;
+    }
+    for (const Lit lit: batch.lits) {
+        if (lit.var() >= num_vars) {
+            return false;
+        }
+    }
+    return true;
+}
+
+static void dump_formula(DumpWriter& writer, const Formula& formula)
+{
+    writer.put<uint32_t>(formula.num_vars);
+    dump_batch(writer, formula.clauses);
+    dump_batch(writer, formula.xors);
+    for (const bool rhs: formula.xor_rhs) {
+        writer.put<uint8_t>(rhs);
+    }
+}
+
+static bool load_formula(DumpReader& reader, Formula& formula)
+{
+    uint32_t num_vars;
+    if (!reader.get(num_vars)) {
+        return false;
+    }
+    if (num_vars >= max_num_vars) {
+        return false;
+    }
+    formula.num_vars = num_vars;
+    if (!load_batch(reader, formula.clauses, num_vars) || !load_batch(reader, formula.xors, num_vars)) {
+        return false;
+    }
+    for (size_t i = 0; i < formula.xors.size(); i++) {
+        uint8_t rhs;
+        if (!reader.get(rhs) || rhs > 1) {
+            return false;
+        }
+        formula.xor_rhs.push_back(rhs);
+    }
+    return true;
+}
+
+// Does not need the GIL
+static std::string dump_solver(const SolverConfig& config, const Formula& formula, const Reconstruction* rec)
+{
+    DumpWriter writer;
+    writer.put_bytes(dump_magic, sizeof(dump_magic));
+    writer.put(dump_version);
+    writer.put(dump_byte_order);
+
+    writer.put<int32_t>(config.verbose);
+    writer.put<double>(config.time_limit);
+    writer.put<int64_t>(config.confl_limit);
+    writer.put<int32_t>(config.num_threads);
+    writer.put<uint32_t>(config.options.size());
+    for (const auto& option: config.options) {
+        writer.put<uint32_t>(strlen(option.first->name));
+        writer.put_bytes(option.first->name, strlen(option.first->name));
+        writer.put<double>(option.second);
+    }
+
+    dump_formula(writer, formula);
+    writer.put<uint8_t>(rec != NULL);
+    if (rec != NULL) {
+        std::vector<uint32_t> removed;
+        for (uint32_t var = 0; var < rec->removed.size(); var++) {
+            if (rec->removed[var]) {
+                removed.push_back(var);
+            }
+        }
+        writer.put<uint32_t>(removed.size());
+        writer.put_bytes(removed.data(), removed.size() * sizeof(uint32_t));
+        dump_formula(writer, rec->constraints);
+    }
+    return std::move(writer.out);
+}
+
+// Reads the output of dump_solver(). Returns false if it is not valid. If
+// there is a reconstruction, rec is set to a new one.
+static bool load_solver(const char* data, size_t size, SolverConfig& config, Formula& formula, Reconstruction*& rec)
+{
+    DumpReader reader = {data, data + size};
+    char magic[sizeof(dump_magic)];
+    uint32_t version;
+    uint32_t byte_order;
+    if (!reader.get_bytes(magic, sizeof(magic))
+        || memcmp(magic, dump_magic, sizeof(magic)) != 0
+        || !reader.get(version) || version != dump_version
+        || !reader.get(byte_order) || byte_order != dump_byte_order
+    ) {
+        return false;
+    }
+
+    int32_t verbose;
+    int64_t confl_limit;
+    int32_t num_threads;
+    uint32_t num_options;
+    if (!reader.get(verbose) || !reader.get(config.time_limit) || !reader.get(confl_limit)
+        || !reader.get(num_threads) || !reader.get(num_options)
+    ) {
+        return false;
+    }
+    config.verbose = verbose;
+    config.confl_limit = confl_limit;
+    config.num_threads = num_threads;
+    for (uint32_t i = 0; i < num_options; i++) {
+        uint32_t name_size;
+        double value;
+        if (!reader.get(name_size) || name_size > reader.left(1)) {
+            return false;
+        }
+        std::string name(name_size, '\0');
+        const SolverOption* opt;
+        if (!reader.get_bytes(&name[0], name_size)
+            || (opt = find_solver_option(name.c_str())) == NULL
+            || !reader.get(value)
+        ) {
+            return false;
+        }
+        config.options.push_back(std::make_pair(opt, value));
+    }
+
+    uint8_t has_rec;
+    if (!load_formula(reader, formula) || !reader.get(has_rec) || has_rec > 1) {
+        return false;
+    }
+    if (has_rec) {
+        std::unique_ptr<Reconstruction> loaded(new Reconstruction);
+        uint32_t num_removed;
+        if (!reader.get(num_removed) || num_removed > reader.left(sizeof(uint32_t))) {
+            return false;
+        }
+        std::vector<uint32_t> removed(num_removed);
+        if (!reader.get_bytes(removed.data(), removed.size() * sizeof(uint32_t))
+            || !load_formula(reader, loaded->constraints)
+        ) {
+            return false;
+        }
+        loaded->removed.assign(loaded->constraints.num_vars, false);
+        for (const uint32_t var: removed) {
+            if (var >= loaded->removed.size()) {
+                return false;
+            }
+            loaded->removed[var] = true;
+        }
+        rec = loaded.release();
+    }
+    return reader.at == reader.end;
+}
+
+static PyObject* dump_to_bytes(Solver *self, bool simplified)
+{
+    std::string data;
+    Py_BEGIN_ALLOW_THREADS      /* release GIL */
+    Formula formula;
+    Reconstruction rec;
+    std::unique_ptr<Reconstruction> copied_rec;
+    if (simplified) {
+        copy_simplified_clauses(self->cmsat, &formula, rec);
+        copied_rec.reset(copy_reconstruction(self, rec));
+    } else {
+        copy_solver_to_solver(self->cmsat, &formula);
+    }
+    data = dump_solver(*self->config, formula, simplified ? copied_rec.get() : self->reconstruction);
+    Py_END_ALLOW_THREADS
+
+    return PyBytes_FromStringAndSize(data.data(), data.size());
+}
+
+PyDoc_STRVAR(dumps_doc,
+"dumps(simplified=False)\n\
+Serialize the configuration and the clauses of the solver to bytes.\n\
+\n\
+Solver.loads() turns them back into a solver without going through Python\n\
+objects per clause, e.g. to send a loaded formula to the workers of a\n\
+process pool. Solvers can also be pickled, which uses this format. It is\n\
+in the native byte order of the machine, and learnt clauses are not kept.\n\
+\n\
+:param simplified: Serialize the clauses as simplified so far, with the\n\
+    same caveats as for clone(simplified=True).\n\
+:return: The serialized solver.\n\
+:rtype: <bytes>"
+);
+
+static PyObject* dumps(Solver *self, PyObject *args, PyObject *kwds)
+{
+    int simplified = 0;
+    static char const* kwlist[] = {"simplified", NULL};
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|p", const_cast<char**>(kwlist), &simplified)) {
+        return NULL;
+    }
+    return dump_to_bytes(self, simplified);
+}
+
+PyDoc_STRVAR(loads_doc,
+"loads(data)\n\
+Create a Solver from the output of dumps(...).\n\
+\n\
+:param data: Bytes-like object returned by dumps(...).\n\
+:return: The new solver.\n\
+:rtype: <Solver>"
+);
+
+static PyObject* loads(PyObject *, PyObject *args, PyObject *kwds)
+{
+    Py_buffer view;
+    static char const* kwlist[] = {"data", NULL};
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "y*", const_cast<char**>(kwlist), &view)) {
+        return NULL;
+    }
+    // Read while holding the GIL, so that data does not change under us
+    SolverConfig config;
+    Formula formula;
+    Reconstruction* rec = NULL;
+    const bool loaded = load_solver((const char*)view.buf, view.len, config, formula, rec);
+    PyBuffer_Release(&view);
+    std::unique_ptr<Reconstruction> loaded_rec(rec);
+    if (!loaded || config.num_threads <= 0) {
+        PyErr_SetString(PyExc_ValueError, "data is not a serialized solver");
+        return NULL;
+    }
+    if (!check_solve_limits(config.verbose, config.time_limit, config.confl_limit)) {
+        return NULL;
+    }
+
+    PyTypeObject *type = solver_type();
+    Solver *solver = (Solver*) type->tp_alloc(type, 0);
+    if (solver == NULL) {
+        return NULL;
+    }
+    init_solver(solver, config);
+    solver->reconstruction = loaded_rec.release();
+
+    AddError error;
+    Py_BEGIN_ALLOW_THREADS      /* release GIL */
+    error = catch_add_error([&] { add_formula(solver->cmsat, formula); });
+    Py_END_ALLOW_THREADS
+    if (!check_add_error(error)) {
+        Py_DECREF(solver);
+        return NULL;
+    }
+
+    return (PyObject*) solver;
+}
+
+// 64 bit FNV-1a hash, continued from hash
+static uint64_t fnv1a(const void* data, size_t size, uint64_t hash = 0xcbf29ce484222325ULL)
+{
+    const unsigned char* bytes = (const unsigned char*)data;
+    for (size_t i = 0; i < size; i++) {
+        hash = (hash ^ bytes[i]) * 0x100000001b3ULL;
+    }
+    return hash;
+}
+
+// Continues hash with the options of config that a simplification depends
+// on, in an order that does not depend on the order they were given in
+static uint64_t hash_solver_options(const SolverConfig& config, uint64_t hash)
+{
+    std::vector<std::pair<std::string, double>> options;
+    for (const auto& option: config.options) {
+        options.push_back(std::make_pair(std::string(option.first->name), option.second));
+    }
+    std::sort(options.begin(), options.end());
+    for (const auto& option: options) {
+        hash = fnv1a(option.first.c_str(), option.first.size() + 1, hash);
+        hash = fnv1a(&option.second, sizeof(option.second), hash);
+    }
+    const int32_t num_threads = config.num_threads;
+    return fnv1a(&num_threads, sizeof(num_threads), hash);
+}
+
+// Reads the whole file into out. Does not need the GIL.
+static bool read_file(const char* fname, std::string& out)
+{
+    FILE *in = fopen(fname, "rb");
+    if (in == NULL) {
+        return false;
+    }
+    char buf[1 << 16];
+    size_t num;
+    while ((num = fread(buf, 1, sizeof(buf), in)) > 0) {
+        out.append(buf, num);
+    }
+    const bool ok = !ferror(in);
+    fclose(in);
+    return ok;
+}
+
+// Writes data to fname through a temporary file, so that concurrent
+// readers never see a partial file. The temporary name is unique per
+// process and thread. Does not need the GIL.
+static bool write_file_atomic(const std::string& fname, const std::string& data)
+{
+    const std::string tmp_fname = fname + ".tmp" + std::to_string(getpid())
+        + "." + std::to_string(std::hash<std::thread::id>()(std::this_thread::get_id()));
+    FILE *out = fopen(tmp_fname.c_str(), "wb");
+    if (out == NULL) {
+        return false;
+    }
+    const bool written = fwrite(data.data(), 1, data.size(), out) == data.size();
+    if (fclose(out) != 0 || !written) {
+        remove(tmp_fname.c_str());
+        return false;
+    }
+    #ifdef _WIN32
+    remove(fname.c_str());
+    #endif
+    if (rename(tmp_fname.c_str(), fname.c_str()) != 0) {
+        remove(tmp_fname.c_str());
+        return false;
+    }
+    return true;
+}
+
+// The work of load_simplified(), once its arguments are parsed
+static PyObject* load_simplified_paths(
+    Solver *self, PyObject *path, PyObject *cache_dir, PyObject *assumptions,
+    const char* strategy_str, double time_limit, long confl_limit)
+{
+    if (self->cmsat->nVars() != 0) {
+        PyErr_SetString(PyExc_RuntimeError, "load_simplified() needs an empty solver");
+        return NULL;
+    }
+    if (!check_solve_limits(self->verbose, time_limit, confl_limit)) {
+        return NULL;
+    }
+    std::string strategy;
+    if (strategy_str != NULL) {
+        strategy = strategy_str;
+        if (!check_simplify_strategy(strategy)) {
+            return NULL;
+        }
+    }
+    std::vector<Lit> assumption_lits;
+    if (assumptions != NULL && assumptions != Py_None) {
+        if (!parse_assumption_lits(assumptions, NULL, assumption_lits)) {
+            return NULL;
+        }
+    }
+
+    const auto start = std::chrono::steady_clock::now();
+    std::string contents;
+    bool read;
+    Py_BEGIN_ALLOW_THREADS      /* release GIL */
+    read = read_file(PyBytes_AS_STRING(path), contents);
+    Py_END_ALLOW_THREADS
+    if (!read) {
+        PyErr_SetFromErrnoWithFilenameObject(PyExc_OSError, path);
+        return NULL;
+    }
+
+    // The key covers everything the simplified formula depends on, the
+    // configuration of self included. The polarities of the assumptions do
+    // not matter, only their variables.
+    std::vector<uint32_t> assumption_vars;
+    for (const Lit lit: assumption_lits) {
+        assumption_vars.push_back(lit.var());
+    }
+    std::sort(assumption_vars.begin(), assumption_vars.end());
+    assumption_vars.erase(std::unique(assumption_vars.begin(), assumption_vars.end()), assumption_vars.end());
+    uint64_t hash = fnv1a(contents.data(), contents.size());
+    hash = fnv1a(strategy.c_str(), strategy_str != NULL ? strategy.size() + 1 : 0, hash);
+    hash = fnv1a(assumption_vars.data(), assumption_vars.size() * sizeof(uint32_t), hash);
+    hash = fnv1a(&time_limit, sizeof(time_limit), hash);
+    hash = fnv1a(&confl_limit, sizeof(confl_limit), hash);
+    hash = hash_solver_options(*self->config, hash);
+    char key[17];
+    snprintf(key, sizeof(key), "%016llx", (unsigned long long)hash);
+    const std::string cache_fname = std::string(PyBytes_AS_STRING(cache_dir)) + "/" + key + ".cms";
+
+    SolverConfig config;
+    Formula formula;
+    Reconstruction* rec = NULL;
+    bool cache_hit;
+    AddError error = AddError::none;
+    Py_BEGIN_ALLOW_THREADS      /* release GIL */
+    std::string cached;
+    // A cache file that is not valid, e.g. with too many variables, is a
+    // cache miss
+    cache_hit = read_file(cache_fname.c_str(), cached)
+        && load_solver(cached.data(), cached.size(), config, formula, rec);
+    if (cache_hit) {
+        error = catch_add_error([&] { add_formula(self->cmsat, formula); });
+    }
+    Py_END_ALLOW_THREADS
+    std::unique_ptr<Reconstruction> loaded_rec(rec);
+    if (!check_add_error(error)) {
+        return NULL;
+    }
+
+    if (cache_hit) {
+        // The configuration stored with the formula is the one it was
+        // simplified with, self keeps its own
+        self->reconstruction = loaded_rec.release();
+    } else {
+        // Also when the cache file is there but not valid, it is replaced
+        PyObject *stats = parse_dimacs_file(self, path, false);
+        if (stats == NULL) {
+            return NULL;
+        }
+        Py_DECREF(stats);
+        for (const uint32_t var: assumption_vars) {
+            if (var >= self->cmsat->nVars()) {
+                PyErr_Format(PyExc_ValueError, "Variable %ld not used in clauses", (long)var+1);
+                return NULL;
+            }
+        }
+
+        bool written;
+        clear_interrupt(self);
+        set_solving(self, true);
+        Py_BEGIN_ALLOW_THREADS      /* release GIL */
+        const CallStatsTimer timer(self->cmsat);
+        self->cmsat->set_max_time(time_limit);
+        self->cmsat->set_max_confl(confl_limit);
+        const lbool res = self->cmsat->simplify(&assumption_lits, strategy_str != NULL ? &strategy : NULL);
+        restore_solver_limits(self);
+        timer.stop(self->cmsat, "load_simplified", self->last_stats);
+
+        Formula simplified;
+        Reconstruction simplified_rec;
+        std::unique_ptr<Reconstruction> copied_rec;
+        if (res == l_False) {
+            simplified.new_vars(self->cmsat->nVars());
+            simplified.add_clause(std::vector<Lit>());
+        } else {
+            copy_simplified_clauses(self->cmsat, &simplified, simplified_rec);
+            copied_rec.reset(copy_reconstruction(self, simplified_rec));
+        }
+        written = write_file_atomic(cache_fname, dump_solver(*self->config, simplified, copied_rec.get()));
+        Py_END_ALLOW_THREADS
+        set_solving(self, false);
+        self->last_result = l_Undef;
+        if (!written) {
+            PyErr_SetFromErrnoWithFilename(PyExc_OSError, cache_fname.c_str());
+            return NULL;
+        }
+    }
+    const std::chrono::duration<double> load_time = std::chrono::steady_clock::now() - start;
+
+    return Py_BuildValue("{s:s,s:O,s:d}",
+        "key", key,
+        "cache_hit", cache_hit ? Py_True : Py_False,
+        "load_time", load_time.count());
+}
+
+PyDoc_STRVAR(load_simplified_doc,
+"load_simplified(path, cache_dir, assumptions=None, strategy=None, time_limit=None, confl_limit=None)\n\
+Load a DIMACS CNF file in simplified form, simplifying it only once.\n\
+\n\
+The simplified formula is cached in cache_dir, under a hash of the\n\
+contents of the file, of the arguments of the simplification and of the\n\
+configuration options of the solver. If it is\n\
+there, it is loaded instead of the file, together with what is needed to\n\
+extend its models to the variables eliminated by the simplification, so the\n\
+models returned by the solver are models of the original formula. If not,\n\
+the file is loaded and simplified as by load_dimacs(path) and\n\
+simplify(assumptions, strategy, time_limit, confl_limit), and the result is\n\
+written to the cache.\n\
+\n\
+The solver must be empty. The formula loaded from the cache is the same for\n\
+all later calls, so only assume on the variables given in assumptions.\n\
+\n\
+:param path: Path of the DIMACS file\n\
+:type path: <str> or <os.PathLike>\n\
+:param cache_dir: Existing directory holding the simplified formulas\n\
+:type cache_dir: <str> or <os.PathLike>\n\
+:param assumptions: (Optional) Literals that will be assumed by later\n\
+    solves. Their variables are not eliminated.\n\
+:type assumptions: <list>\n\
+:param strategy: (Optional) Simplification steps, as for simplify(...)\n\
+:type strategy: <str>\n\
+:param time_limit: (Optional) Time limit of the simplification\n\
+:type time_limit: <double>\n\
+:param confl_limit: (Optional) Conflict limit of the simplification\n\
+:type confl_limit: <long>\n\
+:return: The cache key, whether the formula came from the cache, and the\n\
+    wall clock time taken, in seconds\n\
+:rtype: <dict>"
+);
+
+static PyObject* load_simplified(Solver *self, PyObject *args, PyObject *kwds)
+{
+    if (!check_single_run(self)) {
+        return NULL;
+    }
+    static char const* kwlist[] = {"path", "cache_dir", "assumptions", "strategy", "time_limit", "confl_limit", NULL};
+    PyObject *path = NULL;
+    PyObject *cache_dir = NULL;
+    PyObject *assumptions = NULL;
+    const char* strategy_str = NULL;
+    double time_limit = self->time_limit;
+    long confl_limit = self->confl_limit;
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "O&O&|Ozdl", const_cast<char**>(kwlist),
+        PyUnicode_FSConverter, &path, PyUnicode_FSConverter, &cache_dir,
+        &assumptions, &strategy_str, &time_limit, &confl_limit))
+    {
+        Py_XDECREF(path);
+        Py_XDECREF(cache_dir);
+        return NULL;
+    }
+    PyObject *ret = load_simplified_paths(self, path, cache_dir, assumptions, strategy_str, time_limit, confl_limit);
+    Py_DECREF(path);
+    Py_DECREF(cache_dir);
+    return ret;
+}
+
+static PyObject* Solver_reduce(Solver *self)
+{
+    PyObject *load = PyObject_GetAttrString((PyObject*) solver_type(), "loads");
+    if (load == NULL) {
+        return NULL;
+    }
+    PyObject *data = dump_to_bytes(self, false);
+    PyObject *load_args = data != NULL ? PyTuple_Pack(1, data) : NULL;
+    PyObject *result = load_args != NULL ? PyTuple_Pack(2, load, load_args) : NULL;
+    Py_XDECREF(load_args);
+    Py_XDECREF(data);
+    Py_DECREF(load);
+    return result;
+}
+
+PyDoc_STRVAR(is_satisfiable_doc,
+"is_satisfiable()\n\
+Return satisfiability of the system.\n\
+\n\
+:return: True or False\n\
+:rtype: <boolean>"
+);
+
+static PyObject* is_satisfiable(Solver *self)
+{
+    if (!check_single_run(self)) {
+        return NULL;
+    }
+    lbool res;
+    clear_interrupt(self);
+    set_solving(self, true);
+    Py_BEGIN_ALLOW_THREADS      /* release GIL */
+    const CallStatsTimer timer(self->cmsat);
+    res = self->cmsat->solve();
+    extend_solver_model(self, res);
+    timer.stop(self->cmsat, "is_satisfiable", self->last_stats);
+    Py_END_ALLOW_THREADS
+    set_solving(self, false);
+    self->last_result = res;
+
+    if (res == l_True) {
+        Py_INCREF(Py_True);
+        return Py_True;
+    } else if (res == l_False) {
+        Py_INCREF(Py_False);
+        return Py_False;
+    } else if (res == l_Undef) {
+        Py_INCREF(Py_None);
+        return Py_None;
+    } else {
+        // res can only be l_False, l_True, l_Undef
+        assert((res == l_False) || (res == l_True) || (res == l_Undef));
+        return NULL;
+    }
+}
+
+PyDoc_STRVAR(get_conflict_doc,
+"get_conflict()\n\
+Returns the conflicts in the assumptions when the last call to solve(...)\n\
+was unsatisfiable.\n\
+\n\
+:return: Which assumptions (as passed to solve(...)) are incorrect\n\
+:rtype: <list <int>>"
+);
+
+static PyObject* get_conflict(Solver *self)
+{
+    const std::vector<Lit> conflicts = self->cmsat->get_conflict();
+    PyObject *result = PyList_New(0);
+
+    for (unsigned long i = 0; i < conflicts.size(); i++) {
+        Lit lit = conflicts[i];
+        long value = lit.var() + 1;
+
+        if (lit.sign()) {
+            value *= -1;
+        }
+
+        PyObject *item = PyLong_FromLong(value);
+        PyList_Append(result, item);
+    }
+
+    return result;
+}
+
+PyDoc_STRVAR(last_stats_doc,
+"last_stats()\n\
+Statistics of the last solve(...), solve_many(...), solve_async(...),\n\
+is_satisfiable(), simplify(...), backbone(...), sample_sls(...) or\n\
+itersolve(...) step.\n\
+\n\
+Collecting them only reads a few counters, so it is cheap enough to log\n\
+for every call. solve_many(...) counts the whole batch. The CPU times are\n\
+for the whole process, summed over all threads.\n\
+\n\
+:return: None before the first call, otherwise a dict with: 'call', the\n\
+    name of the call; 'wall_time' and 'cpu_time' in seconds; 'search_time',\n\
+    the CPU time spent in CDCL search, and 'simplify_time', the rest of the\n\
+    CPU time, mostly simplification; 'conflicts', 'propagations' and\n\
+    'decisions' made during the call; 'peak_memory', the peak resident\n\
+    memory of the process in bytes, or None where it is not known.\n\
+:rtype: <dict>"
+);
+
+static PyObject* last_stats(Solver *self)
+{
+    const CallStats& stats = self->last_stats;
+    if (stats.call == NULL) {
+        Py_INCREF(Py_None);
+        return Py_None;
+    }
+
+    PyObject *peak_memory;
+    if (stats.peak_memory < 0) {
+        Py_INCREF(Py_None);
+        peak_memory = Py_None;
+    } else {
+        peak_memory = PyLong_FromLongLong(stats.peak_memory);
+        if (peak_memory == NULL) {
+            return NULL;
+        }
+    }
+    return Py_BuildValue("{s:s,s:d,s:d,s:d,s:d,s:K,s:K,s:K,s:N}",
+        "call", stats.call,
+        "wall_time", stats.wall_time,
+        "cpu_time", stats.cpu_time,
+        "search_time", stats.search_time,
+        "simplify_time", std::max(0.0, stats.cpu_time - stats.search_time),
+        "conflicts", (unsigned long long)stats.conflicts,
+        "propagations", (unsigned long long)stats.propagations,
+        "decisions", (unsigned long long)stats.decisions,
+        "peak_memory", peak_memory);
+}
+
+PyDoc_STRVAR(interrupt_doc,
+"interrupt()\n\
+Abort the solve(...) currently running on this solver as soon as possible.\n\
+\n\
+Meant to be called from another thread, while solve(...), is_satisfiable(),\n\
+solve_many(...) or an itersolve(...) iteration runs with the GIL released.\n\
+The interrupted call returns as if it had run out of budget, e.g. solve()\n\
+returns (None, None), solve_many() does not run the remaining sets of\n\
+assumptions and itersolve() stops. Calls made after it are not affected.\n\
+\n\
+:return: None\n\
+:rtype: <None>"
+);
+
+static PyObject* interrupt(Solver *self)
+{
+    request_interrupt(self);
+
+    Py_INCREF(Py_None);
+    return Py_None;
+}
+
+/*************************** Model iterator *************************/
+
+typedef struct {
+    PyObject_HEAD
+    Solver* solver;
+    std::vector<Lit>* assumptions;
+    std::vector<uint32_t>* projection;
+    ModelFormat fmt;
+    long limit;
+    int verbose;
+    double time_limit;
+    long confl_limit;
+    long num_models;
+    char finished;
+} ModelIterator;
+
+static const char model_iterator_docstring[] = \
+"Iterator over the models of a Solver, returned by Solver.itersolve().\n\
+\n\
+:ivar num_models: Number of models returned so far\n\
+:ivar finished: True once all models have been enumerated, i.e. the\n\
+    iteration did not stop because of the limit, a time/conflict limit or\n\
+    Solver.interrupt()";
+
+static void ModelIterator_dealloc(ModelIterator* self)
+{
+    delete self->assumptions;
+    delete self->projection;
+    Py_XDECREF(self->solver);
+    PyObject_Del(self);
+}
+
+// Bans the model of the last solve() over the projection, or over all
+// variables if there is no projection
+static void ban_found_model(Solver* self, const std::vector<uint32_t>* projection)
+{
+    const std::vector<lbool>& model = self->cmsat->get_model();
+    std::vector<Lit> lits;
+    auto ban = [&](const uint32_t var) {
+        if (model[var] != l_Undef) {
+            lits.push_back(Lit(var, model[var] == l_True));
+        }
+    };
+    if (projection == NULL) {
+        for (uint32_t var = 0; var < model.size(); var++) {
+            ban(var);
+        }
+    } else {
+        for (const uint32_t var: *projection) {
+            ban(var);
+        }
+    }
+    self->cmsat->add_clause(lits);
+}
+
+// Whether the enumeration over the projection, or over all variables if
+// there is no projection, covers variables removed by a simplification
+// elsewhere
+static bool projection_has_removed(const Reconstruction* rec, const std::vector<uint32_t>* projection)
+{
+    if (projection == NULL) {
+        return true;
+    }
+    for (const uint32_t var: *projection) {
+        if (var < rec->removed.size() && rec->removed[var]) {
+            return true;
+        }
+    }
+    return false;
+}
+
+// Adds the constraints of the variables removed by a simplification
+// elsewhere back to the solver, which then holds a formula with the same
+// models as the original one and needs no reconstruction. Does not need the
+// GIL.
+static void restore_removed_constraints(Solver* self)
+{
+    const Formula& constraints = self->reconstruction->constraints;
+    ensure_vars(self->cmsat, constraints.num_vars);
+    _add_clause_batch(self->cmsat, constraints.clauses);
+    std::vector<Lit> lits;
+    for (size_t i = 0; i < constraints.xors.size(); i++) {
+        lits.assign(constraints.xors.lits.begin() + constraints.xors.starts[i], constraints.xors.lits.begin() + constraints.xors.starts[i+1]);
+        self->cmsat->add_xor_clause(lits, constraints.xor_rhs[i]);
+    }
+    delete_reconstruction(self->reconstruction);
+    self->reconstruction = NULL;
+}
+
+static PyObject* ModelIterator_next(ModelIterator* self)
+{
+    if (self->finished
+        || self->num_models >= self->limit
+        || is_interrupted(self->solver)
+    ) {
+        return NULL;
+    }
+
+    Solver* solver = self->solver;
+    if (!check_single_run(solver)) {
+        return NULL;
+    }
+    lbool res;
+    set_solving(solver, true);
+    Py_BEGIN_ALLOW_THREADS      /* release GIL */
+    const CallStatsTimer timer(solver->cmsat);
+    solver->cmsat->set_verbosity(self->verbose);
+    solver->cmsat->set_max_time(self->time_limit);
+    solver->cmsat->set_max_confl(self->confl_limit);
+    res = solver->cmsat->solve(self->assumptions, self->projection != NULL);
+    extend_solver_model(solver, res);
+    restore_solver_limits(solver);
+    timer.stop(solver->cmsat, "itersolve", solver->last_stats);
+    Py_END_ALLOW_THREADS
+    set_solving(solver, false);
+    solver->last_result = res;
+
+    if (res == l_False) {
+        self->finished = 1;
+        return NULL;
+    }
+    if (res != l_True) {
+        return NULL;
+    }
+    self->num_models++;
+
+    PyObject* model = get_model_as(solver_model(solver), solver->cmsat->nVars(), self->fmt);
+    if (model == NULL) {
+        return NULL;
+    }
+    Py_BEGIN_ALLOW_THREADS      /* release GIL */
+    ban_found_model(solver, self->projection);
+    Py_END_ALLOW_THREADS
+    return model;
+}
+
+static PyMemberDef ModelIterator_members[] = {
+    {const_cast<char*>("num_models"), T_LONG, offsetof(ModelIterator, num_models), READONLY, NULL},
+    {const_cast<char*>("finished"), T_BOOL, offsetof(ModelIterator, finished), READONLY, NULL},
+    {NULL}  /* Sentinel */
+};
+
+static PyTypeObject pycryptosat_ModelIteratorType = {
+    PyVarObject_HEAD_INIT(NULL, 0) /*ob_size*/
+    "pycryptosat.ModelIterator",       /*tp_name*/
+    sizeof(ModelIterator),             /*tp_basicsize*/
+    0,                                 /*tp_itemsize*/
+    (destructor)ModelIterator_dealloc, /*tp_dealloc*/
+    0,                          /*tp_print*/
+    0,                          /*tp_getattr*/
+    0,                          /*tp_setattr*/
+    0,                          /*tp_compare*/
+    0,                          /*tp_repr*/
+    0,                          /*tp_as_number*/
+    0,                          /*tp_as_sequence*/
+    0,                          /*tp_as_mapping*/
+    0,                          /*tp_hash */
+    0,                          /*tp_call*/
+    0,                          /*tp_str*/
+    0,                          /*tp_getattro*/
+    0,                          /*tp_setattro*/
+    0,                          /*tp_as_buffer*/
+    Py_TPFLAGS_DEFAULT,         /*tp_flags*/
+    model_iterator_docstring,   /* tp_doc */
+    0,                          /* tp_traverse */
+    0,                          /* tp_clear */
+    0,                          /* tp_richcompare */
+    0,                          /* tp_weaklistoffset */
+    PyObject_SelfIter,          /* tp_iter */
+    (iternextfunc)ModelIterator_next, /* tp_iternext */
+    0,                          /* tp_methods */
+    ModelIterator_members,      /* tp_members */
+};
+
+PyDoc_STRVAR(itersolve_doc,
+"itersolve(assumptions=None, projection=None, limit=None, model_format='tuple', verbose=None, time_limit=None, confl_limit=None)\n\
+Iterate over the models of the system.\n\
+\n\
+After each model is found, a clause banning it is added to the solver, in\n\
+C++ and with the GIL released. These clauses stay in the solver after the\n\
+iteration.\n\
+\n\
+If the formula of the solver was simplified elsewhere, by load_simplified()\n\
+or clone(), and the enumeration covers variables the simplification\n\
+removed, the constraints of these variables are added back to the solver\n\
+first. The models are then the same as for the original formula, at the\n\
+cost of the removed variables. A projection that avoids them keeps the\n\
+simplified formula.\n\
+\n\
+.. example:: \n\
+    >>> s = Solver()\n\
+    >>> s.add_clause([1, 2])\n\
+    >>> len(list(s.itersolve()))\n\
+    3\n\
+\n\
+:param assumptions: (Optional) Literals assumed during the enumeration,\n\
+    as in solve().\n\
+:type assumptions: <list>\n\
+:param projection: (Optional) Variables to enumerate the models over.\n\
+    Models that only differ outside of them are returned only once, and\n\
+    variables outside of them may be unassigned in the models. This sets\n\
+    the sampling variables of the solver.\n\
+:type projection: <list>\n\
+:param limit: (Optional) Maximum number of models to return\n\
+:type limit: <long>\n\
+:param model_format: (Optional) Format of the models, as in solve()\n\
+:type model_format: <str>\n\
+:param verbose: (Optional) Verbosity for the solves of the iteration\n\
+:type verbose: <int>\n\
+:param time_limit: (Optional) Time limit for finding each model. The\n\
+    iteration stops when it runs out.\n\
+:type time_limit: <double>\n\
+:param confl_limit: (Optional) Conflict limit for finding each model. The\n\
+    iteration stops when it runs out.\n\
+:type confl_limit: <long>\n\
+:return: Iterator over the models\n\
+:rtype: <pycryptosat.ModelIterator>"
+);
+
+static PyObject* itersolve(Solver *self, PyObject *args, PyObject *kwds)
+{
+    static char const* kwlist[] = {"assumptions", "projection", "limit", "model_format", "verbose", "time_limit", "confl_limit", NULL};
+    PyObject* assumptions = NULL;
+    PyObject* projection = NULL;
+    PyObject* limit_obj = NULL;
+    const char* model_format = NULL;
+    int verbose = self->verbose;
+    double time_limit = self->time_limit;
+    long confl_limit = self->confl_limit;
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|OOOzidl", const_cast<char**>(kwlist),
+        &assumptions, &projection, &limit_obj, &model_format, &verbose, &time_limit, &confl_limit))
+    {
+        return NULL;
+    }
+    if (!check_solve_limits(verbose, time_limit, confl_limit)) {
+        return NULL;
+    }
+
+    ModelFormat fmt;
+    if (!parse_model_format(model_format, fmt)) {
+        return NULL;
+    }
+    long limit = std::numeric_limits<long>::max();
+    if (limit_obj != NULL && limit_obj != Py_None) {
+        limit = PyLong_AsLong(limit_obj);
+        if (limit == -1 && PyErr_Occurred()) {
+            return NULL;
+        }
+        if (limit < 0) {
+            PyErr_SetString(PyExc_ValueError, "limit must be at least 0");
+            return NULL;
+        }
+    }
+
+    std::vector<Lit> assumption_lits;
+    if (assumptions && assumptions != Py_None) {
+        if (!parse_assumption_lits(assumptions, self->cmsat, assumption_lits)) {
+            return NULL;
+        }
+    }
+    std::vector<uint32_t> projection_vars;
+    const bool has_projection = projection != NULL && projection != Py_None;
+    if (has_projection) {
+        if (!parse_var_list(projection, self->cmsat, projection_vars)) {
+            return NULL;
+        }
+        self->cmsat->set_sampl_vars(projection_vars);
+    }
+
+    ModelIterator* it = PyObject_New(ModelIterator, &pycryptosat_ModelIteratorType);
+    if (it == NULL) {
+        return NULL;
+    }
+    if (self->reconstruction != NULL
+        && projection_has_removed(self->reconstruction, has_projection ? &projection_vars : NULL)
+    ) {
+        // Banning models over the removed variables only works on the
+        // original constraints: extending the models would undo the bans
+        Py_BEGIN_ALLOW_THREADS      /* release GIL */
+        restore_removed_constraints(self);
+        Py_END_ALLOW_THREADS
+    }
+    clear_interrupt(self);
+    Py_INCREF(self);
+    it->solver = self;
+    it->assumptions = new std::vector<Lit>(std::move(assumption_lits));
+    it->projection = has_projection ? new std::vector<uint32_t>(std::move(projection_vars)) : NULL;
+    it->fmt = fmt;
+    it->limit = limit;
+    it->verbose = verbose;
+    it->time_limit = time_limit;
+    it->confl_limit = confl_limit;
+    it->num_models = 0;
+    it->finished = 0;
+    return (PyObject*)it;
+}
+
+/*************************** Constraint iterator *************************/
+
+typedef struct {
+    PyObject_HEAD
+    ClauseBatch* clauses;
+    Py_ssize_t chunk;
+    Py_ssize_t num_clauses;
+    Py_ssize_t at;
+} ConstraintIterator;
+
+static const char constraint_iterator_docstring[] = \
+"Iterator over chunks of the clauses of a Solver, returned by\n\
+Solver.iter_constraints().\n\
+\n\
+:ivar num_clauses: Number of clauses, over all chunks";
+
+static void ConstraintIterator_dealloc(ConstraintIterator* self)
+{
+    delete self->clauses;
+    PyObject_Del(self);
+}
+
+static PyObject* ConstraintIterator_next(ConstraintIterator* self)
+{
+    if (self->at >= self->num_clauses) {
+        return NULL;
+    }
+    const ClauseBatch& clauses = *self->clauses;
+    const size_t begin = self->at;
+    const size_t end = std::min(self->at + self->chunk, self->num_clauses);
+    const size_t lits_begin = clauses.starts[begin];
+
+    std::vector<int32_t> lits;
+    std::vector<int64_t> indptr;
+    Py_BEGIN_ALLOW_THREADS      /* release GIL */
+    lits.reserve(clauses.starts[end] - lits_begin);
+    for (size_t i = lits_begin; i < clauses.starts[end]; i++) {
+        const Lit lit = clauses.lits[i];
+        lits.push_back(lit.sign() ? -(int32_t)(lit.var()+1) : (int32_t)(lit.var()+1));
+    }
+    indptr.reserve(end - begin + 1);
+    for (size_t i = begin; i <= end; i++) {
+        indptr.push_back(clauses.starts[i] - lits_begin);
+    }
+    Py_END_ALLOW_THREADS
+    self->at = end;
+
+    PyObject *lits_obj = new_buffer(std::move(lits), "i");
+    PyObject *indptr_obj = lits_obj != NULL ? new_buffer(std::move(indptr), "q") : NULL;
+    PyObject *chunk = indptr_obj != NULL ? PyTuple_Pack(2, lits_obj, indptr_obj) : NULL;
+    Py_XDECREF(indptr_obj);
+    Py_XDECREF(lits_obj);
+    return chunk;
+}
+
+static PyMemberDef ConstraintIterator_members[] = {
+    {const_cast<char*>("num_clauses"), T_PYSSIZET, offsetof(ConstraintIterator, num_clauses), READONLY, NULL},
+    {NULL}  /* Sentinel */
+};
+
+static PyTypeObject pycryptosat_ConstraintIteratorType = {
+    PyVarObject_HEAD_INIT(NULL, 0) /*ob_size*/
+    "pycryptosat.ConstraintIterator",       /*tp_name*/
+    sizeof(ConstraintIterator),             /*tp_basicsize*/
+    0,                                      /*tp_itemsize*/
+    (destructor)ConstraintIterator_dealloc, /*tp_dealloc*/
+    0,                          /*tp_print*/
+    0,                          /*tp_getattr*/
+    0,                          /*tp_setattr*/
+    0,                          /*tp_compare*/
+    0,                          /*tp_repr*/
+    0,                          /*tp_as_number*/
+    0,                          /*tp_as_sequence*/
+    0,                          /*tp_as_mapping*/
+    0,                          /*tp_hash */
+    0,                          /*tp_call*/
+    0,                          /*tp_str*/
+    0,                          /*tp_getattro*/
+    0,                          /*tp_setattro*/
+    0,                          /*tp_as_buffer*/
+    Py_TPFLAGS_DEFAULT,         /*tp_flags*/
+    constraint_iterator_docstring, /* tp_doc */
+    0,                          /* tp_traverse */
+    0,                          /* tp_clear */
+    0,                          /* tp_richcompare */
+    0,                          /* tp_weaklistoffset */
+    PyObject_SelfIter,          /* tp_iter */
+    (iternextfunc)ConstraintIterator_next, /* tp_iternext */
+    0,                          /* tp_methods */
+    ConstraintIterator_members, /* tp_members */
+};
+
+PyDoc_STRVAR(iter_constraints_doc,
+"iter_constraints(red=True, max_len=None, max_glue=None, chunk=65536)\n\
+Iterate over the learnt or the irredundant clauses of the solver.\n\
+\n\
+The clauses are collected in C++ with the GIL released when this is\n\
+called, so later changes to the solver do not show up in the iteration.\n\
+They are returned in chunks, each a pair of buffers (literals, indptr) in\n\
+the CSR layout taken by add_clauses(literals, indptr=indptr): clause i of\n\
+a chunk is literals[indptr[i]:indptr[i+1]]. This is the way to hand the\n\
+lemmas learnt by one solver to another without Python objects per clause.\n\
+\n\
+.. example:: \n\
+    >>> for lits, indptr in s.iter_constraints(max_len=10, max_glue=4):\n\
+    ...     sibling.add_clauses(lits, indptr=indptr)\n\
+\n\
+The variables fixed at decision level 0 come first, as unit clauses. XOR\n\
+constraints are not returned.\n\
+\n\
+:param red: (Optional) Return the learnt (redundant) clauses. Otherwise,\n\
+    return the irredundant ones, including those removed by variable\n\
+    elimination.\n\
+:type red: <bool>\n\
+:param max_len: (Optional) Leave out the clauses longer than this. Unit\n\
+    and binary clauses are always returned.\n\
+:type max_len: <long>\n\
+:param max_glue: (Optional) Leave out the learnt clauses with a larger\n\
+    glue (LBD) than this.\n\
+:type max_glue: <long>\n\
+:param chunk: (Optional) Maximum number of clauses per chunk\n\
+:type chunk: <long>\n\
+:return: Iterator over (literals, indptr) pairs of int32 and int64 buffers\n\
+:rtype: <pycryptosat.ConstraintIterator>"
+);
+
+static PyObject* iter_constraints(Solver *self, PyObject *args, PyObject *kwds)
+{
+    static char const* kwlist[] = {"red", "max_len", "max_glue", "chunk", NULL};
+    int red = 1;
+    PyObject* max_len_obj = NULL;
+    PyObject* max_glue_obj = NULL;
+    Py_ssize_t chunk = 65536;
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|pOOn", const_cast<char**>(kwlist),
+        &red, &max_len_obj, &max_glue_obj, &chunk))
+    {
+        return NULL;
+    }
+    uint32_t max_len = std::numeric_limits<uint32_t>::max();
+    uint32_t max_glue = std::numeric_limits<uint32_t>::max();
+    const std::pair<PyObject*, uint32_t*> limits[] = {{max_len_obj, &max_len}, {max_glue_obj, &max_glue}};
+    for (const auto& limit: limits) {
+        if (limit.first == NULL || limit.first == Py_None) {
+            continue;
+        }
+        const long value = PyLong_AsLong(limit.first);
+        if (value == -1 && PyErr_Occurred()) {
+            return NULL;
+        }
+        if (value < 0) {
+            PyErr_SetString(PyExc_ValueError, "max_len and max_glue must be at least 0");
+            return NULL;
+        }
+        *limit.second = (uint32_t) std::min<unsigned long>(value, std::numeric_limits<uint32_t>::max());
+    }
+    if (chunk <= 0) {
+        PyErr_SetString(PyExc_ValueError, "chunk must be at least 1");
+        return NULL;
+    }
+
+    ClauseBatch* clauses = new ClauseBatch;
+    Py_BEGIN_ALLOW_THREADS      /* release GIL */
+    std::vector<Lit> lits;
+    bool is_xor;
+    bool rhs;
+    self->cmsat->start_getting_constraints(red, false, std::max<uint32_t>(max_len, 2), max_glue);
+    while (self->cmsat->get_next_constraint(lits, is_xor, rhs)) {
+        if (is_xor) {
+            continue;
+        }
+        clauses->lits.insert(clauses->lits.end(), lits.begin(), lits.end());
+        clauses->end_clause();
+    }
+    self->cmsat->end_getting_constraints();
+    Py_END_ALLOW_THREADS
+
+    ConstraintIterator* it = PyObject_New(ConstraintIterator, &pycryptosat_ConstraintIteratorType);
+    if (it == NULL) {
+        delete clauses;
+        return NULL;
+    }
+    it->clauses = clauses;
+    it->chunk = chunk;
+    it->num_clauses = clauses->size();
+    it->at = 0;
+    return (PyObject*)it;
+}
+
+/*************************** Structural analysis *************************/
+
+static int32_t dimacs_lit(const Lit lit)
+{
+    return lit.sign() ? -(int32_t)(lit.var()+1) : (int32_t)(lit.var()+1);
+}
+
+PyDoc_STRVAR(get_zero_assigned_lits_doc,
+"get_zero_assigned_lits()\n\
+Return the literals fixed by the solving and simplification so far.\n\
+\n\
+:return: The literals that are True in every model, as int32\n\
+:rtype: <pycryptosat.Buffer>"
+);
+
+static PyObject* get_zero_assigned_lits(Solver *self)
+{
+    std::vector<Lit> lits;
+    Py_BEGIN_ALLOW_THREADS      /* release GIL */
+    lits = self->cmsat->get_zero_assigned_lits();
+    Py_END_ALLOW_THREADS
+
+    std::vector<int32_t> out;
+    append_dimacs_lits(lits, out);
+    return new_buffer(std::move(out), "i");
+}
+
+PyDoc_STRVAR(get_all_binary_xors_doc,
+"get_all_binary_xors()\n\
+Return the equivalent literals found by the solving and simplification so\n\
+far.\n\
+\n\
+:return: A (n, 2) int32 buffer, each row a pair of literals that have the\n\
+    same value in every model\n\
+:rtype: <pycryptosat.Buffer>"
+);
+
+static PyObject* get_all_binary_xors(Solver *self)
+{
+    std::vector<std::pair<Lit, Lit>> pairs;
+    Py_BEGIN_ALLOW_THREADS      /* release GIL */
+    pairs = self->cmsat->get_all_binary_xors();
+    Py_END_ALLOW_THREADS
+
+    std::vector<int32_t> out;
+    for (const auto& pair: pairs) {
+        out.push_back(dimacs_lit(pair.first));
+        out.push_back(dimacs_lit(pair.second));
+    }
+    return new_buffer(std::move(out), "i", pairs.size());
+}
+
+// Runs find(), which searches for structure in the formula, with the GIL
+// released and with the budgets of the library scaled by effort
+template <typename F>
+static void run_structure_finder(Solver *self, double effort, F&& find)
+{
+    Py_BEGIN_ALLOW_THREADS      /* release GIL */
+    const double multiplier = self->cmsat->get_orig_global_timeout_multiplier();
+    self->cmsat->set_orig_global_timeout_multiplier(multiplier * effort);
+    find();
+    self->cmsat->set_orig_global_timeout_multiplier(multiplier);
+    Py_END_ALLOW_THREADS
+}
+
+static int parse_effort(PyObject *args, PyObject *kwds, double& effort)
+{
+    static char const* kwlist[] = {"effort", NULL};
+    effort = 1.0;
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|d", const_cast<char**>(kwlist), &effort)) {
+        return 0;
+    }
+    if (!(effort > 0)) {
+        PyErr_SetString(PyExc_ValueError, "effort must be positive");
+        return 0;
+    }
+    return 1;
+}
+
+PyDoc_STRVAR(get_recovered_xors_doc,
+"get_recovered_xors(effort=1.0)\n\
+Find the XOR constraints encoded by the clauses.\n\
+\n\
+The XOR finder of the library runs with the GIL released. The result can\n\
+be passed to add_xor_clauses(xors, rhs, indptr=indptr).\n\
+\n\
+:param effort: (Optional) Scales the budget of the search, like the\n\
+    timeout_multiplier option.\n\
+:type effort: <float>\n\
+:return: A tuple (xors, indptr, rhs): XOR i is over the variables\n\
+    xors[indptr[i]:indptr[i+1]] (int32, indptr int64), and rhs[i] is True\n\
+    if an odd number of them are True\n\
+:rtype: <tuple>"
+);
+
+static PyObject* get_recovered_xors(Solver *self, PyObject *args, PyObject *kwds)
+{
+    double effort;
+    if (!parse_effort(args, kwds, effort)) {
+        return NULL;
+    }
+    std::vector<std::pair<std::vector<uint32_t>, bool>> xors;
+    run_structure_finder(self, effort, [&]() {
+        xors = self->cmsat->get_recovered_xors(false);
+    });
+
+    std::vector<int32_t> vars;
+    std::vector<int64_t> indptr(1, 0);
+    std::vector<uint8_t> rhs;
+    for (const auto& x: xors) {
+        for (const uint32_t var: x.first) {
+            vars.push_back(var + 1);
+        }
+        indptr.push_back(vars.size());
+        rhs.push_back(x.second);
+    }
+    PyObject *vars_obj = new_buffer(std::move(vars), "i");
+    PyObject *indptr_obj = vars_obj != NULL ? new_buffer(std::move(indptr), "q") : NULL;
+    PyObject *rhs_obj = indptr_obj != NULL ? new_buffer(std::move(rhs), "?") : NULL;
+    PyObject *result = rhs_obj != NULL ? PyTuple_Pack(3, vars_obj, indptr_obj, rhs_obj) : NULL;
+    Py_XDECREF(vars_obj);
+    Py_XDECREF(indptr_obj);
+    Py_XDECREF(rhs_obj);
+    return result;
+}
+
+PyDoc_STRVAR(get_recovered_or_gates_doc,
+"get_recovered_or_gates(effort=1.0)\n\
+Find the OR gates encoded by the clauses.\n\
+\n\
+The gate finder of the library runs with the GIL released. AND gates are\n\
+found too, as OR gates over the negated literals.\n\
+\n\
+:param effort: (Optional) Scales the budget of the search, like the\n\
+    timeout_multiplier option.\n\
+:type effort: <float>\n\
+:return: A tuple (inputs, indptr, outputs) of int32 literals (indptr\n\
+    int64): outputs[i] is equivalent to the OR of the literals\n\
+    inputs[indptr[i]:indptr[i+1]]\n\
+:rtype: <tuple>"
+);
+
+static PyObject* get_recovered_or_gates(Solver *self, PyObject *args, PyObject *kwds)
+{
+    double effort;
+    if (!parse_effort(args, kwds, effort)) {
+        return NULL;
+    }
+    std::vector<OrGate> gates;
+    run_structure_finder(self, effort, [&]() {
+        gates = self->cmsat->get_recovered_or_gates();
+    });
+
+    std::vector<int32_t> inputs;
+    std::vector<int64_t> indptr(1, 0);
+    std::vector<int32_t> outputs;
+    for (const OrGate& gate: gates) {
+        append_dimacs_lits(gate.lits, inputs);
+        indptr.push_back(inputs.size());
+        outputs.push_back(dimacs_lit(gate.rhs));
+    }
+    PyObject *inputs_obj = new_buffer(std::move(inputs), "i");
+    PyObject *indptr_obj = inputs_obj != NULL ? new_buffer(std::move(indptr), "q") : NULL;
+    PyObject *outputs_obj = indptr_obj != NULL ? new_buffer(std::move(outputs), "i") : NULL;
+    PyObject *result = outputs_obj != NULL ? PyTuple_Pack(3, inputs_obj, indptr_obj, outputs_obj) : NULL;
+    Py_XDECREF(inputs_obj);
+    Py_XDECREF(indptr_obj);
+    Py_XDECREF(outputs_obj);
+    return result;
+}
+
+PyDoc_STRVAR(get_recovered_ite_gates_doc,
+"get_recovered_ite_gates(effort=1.0)\n\
+Find the if-then-else gates encoded by the clauses.\n\
+\n\
+The gate finder of the library runs with the GIL released. Each gate is\n\
+found in both polarities of its output.\n\
+\n\
+:param effort: (Optional) Scales the budget of the search, like the\n\
+    timeout_multiplier option.\n\
+:type effort: <float>\n\
+:return: A (n, 4) int32 buffer of literals. A row (a, s, b, out) means\n\
+    that the clauses (out or a or s) and (out or b or -s) are in the\n\
+    formula, i.e. -out implies (b if s else a).\n\
+:rtype: <pycryptosat.Buffer>"
+);
 
-            sign = (cmsat->get_model()[var] == l_True) ? 1 : -1;
+static PyObject* get_recovered_ite_gates(Solver *self, PyObject *args, PyObject *kwds)
+{
+    double effort;
+    if (!parse_effort(args, kwds, effort)) {
+        return NULL;
+    }
+    std::vector<ITEGate> gates;
+    run_structure_finder(self, effort, [&]() {
+        gates = self->cmsat->get_recovered_ite_gates();
+    });
 
-            py_value = PyLong_FromLong((var + 1) * sign);
-            PyTuple_SET_ITEM(tuple, (Py_ssize_t)var, py_value);
+    std::vector<int32_t> out;
+    for (const ITEGate& gate: gates) {
+        for (const Lit lit: gate.get_all()) {
+            out.push_back(dimacs_lit(lit));
         }
     }
-    return tuple;
+    return new_buffer(std::move(out), "i", gates.size());
 }
 
-PyDoc_STRVAR(nb_vars_doc,
-"nb_vars()\n\
-Return the number of literals in the solver.\n\
+PyDoc_STRVAR(get_vsids_scores_doc,
+"get_vsids_scores()\n\
+Return the VSIDS activities of the variables.\n\
 \n\
-:return: Number of literals\n\
-:rtype: <int>"
+They are bumped by the conflicts while the solver branches with VSIDS,\n\
+one of the branching strategies it switches between, and decay over time.\n\
+\n\
+:return: The activity of variable i+1 at index i, as float64\n\
+:rtype: <pycryptosat.Buffer>"
 );
 
-static PyObject* nb_vars(Solver *self)
+// Resizes per-variable data from the library, which may cover more or less
+// variables than there are in self, to nb_vars() * width entries
+template <typename T>
+static PyObject* var_data_buffer(Solver *self, std::vector<T>&& data, const char* format, size_t width = 1)
 {
-    return PyLong_FromLong(self->cmsat->nVars());
+    data.resize(self->cmsat->nVars() * width, 0);
+    return new_buffer(std::move(data), format, width == 1 ? -1 : (Py_ssize_t)self->cmsat->nVars());
+}
 
+static PyObject* get_vsids_scores(Solver *self)
+{
+    std::vector<double> scores;
+    Py_BEGIN_ALLOW_THREADS      /* release GIL */
+    scores = self->cmsat->get_vsids_scores();
+    Py_END_ALLOW_THREADS
+    return var_data_buffer(self, std::move(scores), "d");
 }
 
-static int parse_assumption_lits(PyObject* assumptions, SATSolver* cmsat, std::vector<Lit>& assumption_lits)
+PyDoc_STRVAR(get_var_incidence_doc,
+"get_var_incidence(red=False)\n\
+Return the number of clauses each variable occurs in.\n\
+\n\
+Counts the clauses as simplified so far, not the XOR constraints.\n\
+\n\
+:param red: (Optional) Count the learnt clauses too\n\
+:type red: <bool>\n\
+:return: The count of variable i+1 at index i, as uint32\n\
+:rtype: <pycryptosat.Buffer>"
+);
+
+static PyObject* get_var_incidence(Solver *self, PyObject *args, PyObject *kwds)
 {
-    PyObject *iterator = PyObject_GetIter(assumptions);
-    if (iterator == NULL) {
-        PyErr_SetString(PyExc_TypeError, "interable object expected");
-        return 0;
+    int red = 0;
+    static char const* kwlist[] = {"red", NULL};
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|p", const_cast<char**>(kwlist), &red)) {
+        return NULL;
     }
 
-    PyObject *lit;
-    while ((lit = PyIter_Next(iterator)) != NULL) {
-        long var;
-        bool sign;
-        int ret = convert_lit_to_sign_and_var(lit, var, sign);
-        Py_DECREF(lit);
-        if (!ret) {
-            Py_DECREF(iterator);
-            return 0;
-        }
-
-        if (var >= cmsat->nVars()) {
-            Py_DECREF(iterator);
-            PyErr_Format(PyExc_ValueError, "Variable %ld not used in clauses", var+1);
-            return 0;
-        }
+    std::vector<uint32_t> inc;
+    Py_BEGIN_ALLOW_THREADS      /* release GIL */
+    inc = red ? self->cmsat->get_var_incidence_also_red() : self->cmsat->get_var_incidence();
+    Py_END_ALLOW_THREADS
+    return var_data_buffer(self, std::move(inc), "I");
+}
 
-        assumption_lits.push_back(Lit(var, sign));
-    }
-    Py_DECREF(iterator);
-    if (PyErr_Occurred()) {
-        return 0;
-    }
+PyDoc_STRVAR(get_lit_incidence_doc,
+"get_lit_incidence()\n\
+Return the number of irredundant clauses each literal occurs in.\n\
+\n\
+:return: A (nb_vars(), 2) uint32 buffer, row i holding the counts of the\n\
+    literals i+1 and -(i+1)\n\
+:rtype: <pycryptosat.Buffer>"
+);
 
-    return 1;
+static PyObject* get_lit_incidence(Solver *self)
+{
+    std::vector<uint32_t> inc;
+    Py_BEGIN_ALLOW_THREADS      /* release GIL */
+    inc = self->cmsat->get_lit_incidence();
+    Py_END_ALLOW_THREADS
+    return var_data_buffer(self, std::move(inc), "I", 2);
 }
 
-PyDoc_STRVAR(solve_doc,
-"solve(assumptions=None, verbose=None, time_limit=None, confl_limit=None)\n\
-Solve the system of equations that have been added with add_clause();\n\
+PyDoc_STRVAR(backbone_doc,
+"backbone(vars=None, time_limit=None, confl_limit=None)\n\
+Compute the backbone, the literals that are True in every model.\n\
 \n\
-.. example:: \n\
-    from pycryptosat import Solver\n\
-    >>> s = Solver()\n\
-    >>> s.add_clause([1])\n\
-    >>> s.add_clause([-2])\n\
-    >>> s.add_clause([3])\n\
-    >>> s.add_clause([-1, 2, 3])\n\
-    >>> sat, solution = s.solve()\n\
-    >>> print sat\n\
-    True\n\
-    >>> print solution\n\
-    (None, True, False, True)\n\
-    \n\
-    We can also try to assume any variable values for a single solver run:\n\
-    \n\
-    sat, solution = s.solve([-3])\n\
-    >>> print sat\n\
-    False\n\
-    >>> print solution\n\
-    None\n\
+The formula is solved once, the literals of the model are the candidates.\n\
+The candidates fixed by failed literal probing are taken first, then each\n\
+remaining one is refuted by a solve with its negation assumed, and every\n\
+model found this way drops all the candidates it contradicts. Runs with\n\
+the GIL released, see backbone_progress() for the progress and\n\
+interrupt() to stop it. Single-run solvers are not supported.\n\
 \n\
-:param assumptions: (Optional) Allows the user to set values to specific\n\
-    ariables in the solver in a temporary fashion. This means that in case\n\
-    the problem is satisfiable but e.g it's unsatisfiable if variable 2 is\n\
-    FALSE, then solve([-2]) will return UNSAT. However, a subsequent call to\n\
-    solve() will still return a solution.\n\
-:type assumptions: <list>\n\
-:param verbose: (Optional) Allows the user to set a verbosity for just this\n\
-    solve.\n\
-:type verbose: <int>\n\
-:param time_limit: (Optional) Allows the user to set a timeout for just this\n\
-    solve.\n\
-:type time_limit: <double>\n\
-:param confl_limit: (Optional) Allows the user to set a conflict limit for just\n\
-    this solve.\n\
-:type confl_limit: <long>\n\
-:return: A tuple. First part of the tuple indicates whether the problem\n\
-    is satisfiable. The second part is a tuple contains the solution,\n\
-    preceded by None, so you can index into it with the variable number.\n\
-    E.g. solution[1] returns the value for variable 1.\n\
-:rtype: <tuple <tuple>>"
+The backbone literals found are added to the solver as unit clauses.\n\
+Variables removed by a simplification elsewhere are left out.\n\
+\n\
+:param vars: (Optional) The variables to compute the backbone over, an\n\
+    iterable or int buffer, or 'sampling' for the sampling variables.\n\
+    All variables by default.\n\
+:param time_limit: (Optional) CPU time limit of the whole call, in seconds\n\
+:param confl_limit: (Optional) Conflict limit of the whole call\n\
+:type vars: <list>, <pycryptosat.Buffer> or <str>\n\
+:type time_limit: <float>\n\
+:type confl_limit: <int>\n\
+:return: A tuple (lits, finished): lits are the backbone literals found,\n\
+    as int32, and None if the formula is unsatisfiable. finished is False\n\
+    if a limit or interrupt() stopped the call first, lits then holds the\n\
+    part of the backbone found so far.\n\
+:rtype: <tuple>"
 );
 
+// States of a variable in backbone()
+enum class BackboneState : uint8_t { none, candidate, found, rejected };
 
-static PyObject* solve(Solver *self, PyObject *args, PyObject *kwds)
-{
-    PyObject* assumptions = NULL;
+// Does not need the GIL. Returns the result of the first solve.
+static lbool compute_backbone(
+    Solver *self
+    , const std::vector<uint32_t>* vars
+    , std::vector<Lit>& backbone
+    , bool& finished
+) {
+    SATSolver *cmsat = self->cmsat;
+    SolveControl *ctl = self->control->get();
+    ctl->backbone_solves++;
+    const lbool res = cmsat->solve();
+    if (res != l_True) {
+        finished = (res == l_False);
+        return res;
+    }
 
-    int verbose = self->verbose;
+    const Reconstruction* rec = self->reconstruction;
+    std::vector<lbool> model = cmsat->get_model();
+    std::vector<BackboneState> state(model.size(), BackboneState::none);
+    std::vector<Lit> candidates;
+    auto add_candidate = [&](const uint32_t var) {
+        if (state[var] != BackboneState::none || model[var] == l_Undef
+            || (rec != NULL && var < rec->removed.size() && rec->removed[var])
+        ) {
+            return;
+        }
+        state[var] = BackboneState::candidate;
+        candidates.push_back(Lit(var, model[var] == l_False));
+    };
+    if (vars == NULL) {
+        for (uint32_t var = 0; var < model.size(); var++) {
+            add_candidate(var);
+        }
+    } else {
+        for (const uint32_t var: *vars) {
+            add_candidate(var);
+        }
+    }
+    ctl->backbone_candidates.store(candidates.size());
+
+    auto decide = [&](const Lit lit, const BackboneState decision) {
+        state[lit.var()] = decision;
+        if (decision == BackboneState::found) {
+            backbone.push_back(lit);
+            ctl->backbone_found++;
+        } else {
+            ctl->backbone_rejected++;
+        }
+    };
+    for (const Lit lit: cmsat->get_zero_assigned_lits()) {
+        if (lit.var() < state.size() && state[lit.var()] == BackboneState::candidate) {
+            decide(lit, BackboneState::found);
+        }
+    }
+    // Failed literals become units, the solves below then refute them at
+    // once
+    for (const Lit lit: candidates) {
+        if (state[lit.var()] == BackboneState::candidate && !is_interrupted(self)) {
+            uint32_t min_props = 0;
+            cmsat->probe(~lit, min_props);
+        }
+    }
+
+    finished = true;
+    std::vector<Lit> assumption(1);
+    for (const Lit lit: candidates) {
+        if (state[lit.var()] != BackboneState::candidate) {
+            continue;
+        }
+        if (is_interrupted(self)) {
+            finished = false;
+            break;
+        }
+        assumption[0] = ~lit;
+        ctl->backbone_solves++;
+        const lbool ret = cmsat->solve(&assumption);
+        if (ret == l_False) {
+            decide(lit, BackboneState::found);
+            assumption[0] = lit;
+            cmsat->add_clause(assumption);
+        } else if (ret == l_True) {
+            const std::vector<lbool>& other = cmsat->get_model();
+            for (const Lit cand: candidates) {
+                if (state[cand.var()] == BackboneState::candidate
+                    && other[cand.var()] != (cand.sign() ? l_False : l_True)
+                ) {
+                    decide(cand, BackboneState::rejected);
+                }
+            }
+        } else {
+            finished = false;
+            break;
+        }
+    }
+    return res;
+}
+
+static PyObject* backbone(Solver *self, PyObject *args, PyObject *kwds)
+{
+    PyObject* vars_obj = NULL;
     double time_limit = self->time_limit;
     long confl_limit = self->confl_limit;
-
-    static char const* kwlist[] = {"assumptions", "verbose", "time_limit", "confl_limit", NULL};
-    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|Oidl", const_cast<char**>(kwlist), &assumptions, &verbose, &time_limit, &confl_limit)) {
+    static char const* kwlist[] = {"vars", "time_limit", "confl_limit", NULL};
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|Odl", const_cast<char**>(kwlist), &vars_obj, &time_limit, &confl_limit)) {
         return NULL;
     }
-    if (verbose < 0) {
-        PyErr_SetString(PyExc_ValueError, "verbosity must be at least 0");
+    if (self->single_run) {
+        PyErr_SetString(PyExc_RuntimeError, "backbone() needs several solves, it cannot run on a single_run solver");
         return NULL;
     }
-    if (time_limit < 0) {
-        PyErr_SetString(PyExc_ValueError, "time_limit must be at least 0");
+    if (!check_solve_limits(self->verbose, time_limit, confl_limit)) {
         return NULL;
     }
-    if (confl_limit < 0) {
-        PyErr_SetString(PyExc_ValueError, "conflict limit must be at least 0");
+    std::unique_ptr<std::vector<uint32_t>> vars;
+    if (!parse_model_vars(self, vars_obj, vars)) {
         return NULL;
     }
 
-    std::vector<Lit> assumption_lits;
-    if (assumptions) {
-        if (!parse_assumption_lits(assumptions, self->cmsat, assumption_lits)) {
-            return 0;
-        }
-    }
-
-    self->cmsat->set_verbosity(verbose);
-    self->cmsat->set_max_time(time_limit);
-    self->cmsat->set_max_confl(confl_limit);
-
-    PyObject *result = PyTuple_New((Py_ssize_t) 2);
-    if (result == NULL) {
-        PyErr_SetString(PyExc_SystemError, "failed to create a tuple");
-        return NULL;
-    }
+    SolveControl *ctl = self->control->get();
+    ctl->backbone_candidates.store(0);
+    ctl->backbone_found.store(0);
+    ctl->backbone_rejected.store(0);
+    ctl->backbone_solves.store(0);
 
+    std::vector<Lit> lits;
+    bool finished;
     lbool res;
+    clear_interrupt(self);
+    set_solving(self, true);
     Py_BEGIN_ALLOW_THREADS      /* release GIL */
-    res = self->cmsat->solve(&assumption_lits);
+    const CallStatsTimer timer(self->cmsat);
+    self->cmsat->set_max_time(time_limit);
+    self->cmsat->set_max_confl(confl_limit);
+    res = compute_backbone(self, vars.get(), lits, finished);
+    extend_solver_model(self, res);
+    timer.stop(self->cmsat, "backbone", self->last_stats);
     Py_END_ALLOW_THREADS
+    set_solving(self, false);
+    self->last_result = res;
+    restore_solver_limits(self);
 
-    self->cmsat->set_verbosity(self->verbose);
-    self->cmsat->set_max_time(self->time_limit);
-    self->cmsat->set_max_confl(self->confl_limit);
-
-    if (res == l_True) {
-        PyObject* solution = get_solution(self->cmsat);
-        if (!solution) {
-            Py_DECREF(result);
-            return NULL;
-        }
-        Py_INCREF(Py_True);
-
-        PyTuple_SET_ITEM(result, 0, Py_True);
-        PyTuple_SET_ITEM(result, 1, solution);
-
-    } else if (res == l_False) {
-        Py_INCREF(Py_False);
-        Py_INCREF(Py_None);
-
-        PyTuple_SET_ITEM(result, 0, Py_False);
-        PyTuple_SET_ITEM(result, 1, Py_None);
-
-    } else if (res == l_Undef) {
-        Py_INCREF(Py_None);
+    PyObject *lits_obj;
+    if (res == l_False) {
         Py_INCREF(Py_None);
-
-        PyTuple_SET_ITEM(result, 0, Py_None);
-        PyTuple_SET_ITEM(result, 1, Py_None);
+        lits_obj = Py_None;
     } else {
-        // res can only be l_False, l_True, l_Undef
-        assert((res == l_False) || (res == l_True) || (res == l_Undef));
-        Py_DECREF(result);
-        return PyErr_NewExceptionWithDoc("pycryptosat.IllegalState", "Error Occurred in CyrptoMiniSat", NULL, NULL);
+        std::vector<int32_t> out;
+        append_dimacs_lits(lits, out);
+        lits_obj = new_buffer(std::move(out), "i");
+        if (lits_obj == NULL) {
+            return NULL;
+        }
     }
-
-    return result;
+    return Py_BuildValue("(NO)", lits_obj, finished ? Py_True : Py_False);
 }
 
-PyDoc_STRVAR(is_satisfiable_doc,
-"is_satisfiable()\n\
-Return satisfiability of the system.\n\
+PyDoc_STRVAR(backbone_progress_doc,
+"backbone_progress()\n\
+Progress of the running or last backbone(...) call.\n\
 \n\
-:return: True or False\n\
-:rtype: <boolean>"
+Can be called from another thread while backbone(...) runs.\n\
+\n\
+:return: A dict with: 'candidates', the number of literals to decide;\n\
+    'found' and 'rejected', how many of them were found to be in the\n\
+    backbone and not to be in it so far; 'solves', the number of solves\n\
+    made\n\
+:rtype: <dict>"
 );
 
-static PyObject* is_satisfiable(Solver *self)
+static PyObject* backbone_progress(Solver *self)
 {
-    lbool res;
-    Py_BEGIN_ALLOW_THREADS      /* release GIL */
-    res = self->cmsat->solve();
-    Py_END_ALLOW_THREADS
-
-    if (res == l_True) {
-        Py_INCREF(Py_True);
-        return Py_True;
-    } else if (res == l_False) {
-        Py_INCREF(Py_False);
-        return Py_False;
-    } else if (res == l_Undef) {
-        return Py_None;
-    } else {
-        // res can only be l_False, l_True, l_Undef
-        assert((res == l_False) || (res == l_True) || (res == l_Undef));
-        return NULL;
-    }
+    const SolveControl *ctl = self->control->get();
+    return Py_BuildValue("{s:K,s:K,s:K,s:K}",
+        "candidates", (unsigned long long)ctl->backbone_candidates.load(),
+        "found", (unsigned long long)ctl->backbone_found.load(),
+        "rejected", (unsigned long long)ctl->backbone_rejected.load(),
+        "solves", (unsigned long long)ctl->backbone_solves.load());
 }
 
-PyDoc_STRVAR(get_conflict_doc,
-"get_conflict()\n\
-Returns the conflicts in the assumptions when the last call to solve(...)\n\
-was unsatisfiable.\n\
+/*************************** Local search *************************/
+
+PyDoc_STRVAR(sample_sls_doc,
+"sample_sls(num, mems=20000000, oracle=False)\n\
+Sample satisfying assignments with the CCNR local search.\n\
 \n\
-:return: Which assumptions (as passed to solve(...)) are incorrect\n\
-:rtype: <list <int>>"
+Runs num local searches with different seeds, with the GIL released, and\n\
+returns the assignments they found. This is much cheaper than solving\n\
+num times, e.g. to warm-start or to seed a sampler, but the samples are\n\
+not uniform and searches may fail. Assumptions and the constraints only\n\
+kept as XORs are not seen by the search, assignments breaking the XORs\n\
+are dropped.\n\
+\n\
+:param num: The number of local searches to run\n\
+:param mems: (Optional) The budget of each search, in memory accesses\n\
+:param oracle: (Optional) Use the local search of the oracle instead of\n\
+    the one used while solving. The latter needs at least 50 variables.\n\
+:type num: <int>\n\
+:type mems: <int>\n\
+:type oracle: <bool>\n\
+:return: A (k, nb_vars()) uint8 buffer of 0/1 values, one row per search\n\
+    that found a satisfying assignment, k <= num\n\
+:rtype: <pycryptosat.Buffer>"
 );
 
-static PyObject* get_conflict(Solver *self)
+static PyObject* sample_sls(Solver *self, PyObject *args, PyObject *kwds)
 {
-    const std::vector<Lit> conflicts = self->cmsat->get_conflict();
-    PyObject *result = PyList_New(0);
-
-    for (unsigned long i = 0; i < conflicts.size(); i++) {
-        Lit lit = conflicts[i];
-        long value = lit.var() + 1;
+    long num;
+    long long mems = 20LL*1000LL*1000LL;
+    int oracle = 0;
+    static char const* kwlist[] = {"num", "mems", "oracle", NULL};
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "l|Lp", const_cast<char**>(kwlist), &num, &mems, &oracle)) {
+        return NULL;
+    }
+    if (num < 0 || num > std::numeric_limits<uint32_t>::max()) {
+        PyErr_SetString(PyExc_ValueError, "num must be a non-negative 32-bit integer");
+        return NULL;
+    }
+    if (mems <= 0) {
+        PyErr_SetString(PyExc_ValueError, "mems must be positive");
+        return NULL;
+    }
 
-        if (lit.sign()) {
-            value *= -1;
+    std::vector<uint8_t> out;
+    size_t rows = 0;
+    Py_BEGIN_ALLOW_THREADS      /* release GIL */
+    const CallStatsTimer timer(self->cmsat);
+    const std::vector<std::vector<uint8_t>> sols = self->cmsat->many_sls(mems, num, oracle);
+    const size_t num_vars = self->cmsat->nVars();
+    std::vector<lbool> values;
+    std::vector<lbool> extended;
+    for (const auto& sol: sols) {
+        if (self->reconstruction != NULL) {
+            values.assign(num_vars, l_Undef);
+            for (size_t var = 0; var < num_vars && var < sol.size(); var++) {
+                values[var] = boolToLBool(sol[var]);
+            }
+            extended_model(self->reconstruction, values, extended);
+            for (size_t var = 0; var < num_vars; var++) {
+                out.push_back(extended[var] == l_True);
+            }
+        } else {
+            out.insert(out.end(), sol.begin(), sol.begin() + std::min(num_vars, sol.size()));
+            out.resize(out.size() + num_vars - std::min(num_vars, sol.size()), 0);
         }
-
-        PyObject *item = PyLong_FromLong(value);
-        PyList_Append(result, item);
+        rows++;
     }
+    timer.stop(self->cmsat, "sample_sls", self->last_stats);
+    Py_END_ALLOW_THREADS
+
+    return new_buffer(std::move(out), "B", rows);
+}
+
+PyDoc_STRVAR(cube_and_conquer_doc,
+"cube_and_conquer(depth=None, n_cubes=None, workers=None, time_limit=None, confl_limit=None, model_format=None, vars=None)\n\
+Split the search space into cubes and solve them in parallel.\n\
+\n\
+The cubes are made by lookahead: every split is on the variable whose two\n\
+literals propagate the most under the cube so far, among the variables in\n\
+the most clauses. Cubes refuted by the lookahead are left out, and failed\n\
+literals are added to the cube without a split. The formula is then copied\n\
+into one new solver per worker, set up like this one, and the workers\n\
+solve the cubes with the GIL released, each on its own thread, taking the\n\
+next cube when done with one. The first model found stops all of them.\n\
+interrupt() stops them too. When interrupt() is called or the time limit\n\
+runs out while the cubes are made, the parts of the search space not split\n\
+yet are returned as open cubes and no worker is started. Single-run solvers\n\
+are not supported.\n\
+\n\
+:param depth: (Optional) The number of splits, at most 2**depth cubes\n\
+:param n_cubes: (Optional) The number of cubes wanted instead of depth,\n\
+    rounded up to a power of two. Default: 8 per worker.\n\
+:param workers: (Optional) The number of worker threads. Default: the\n\
+    number of CPUs.\n\
+:param time_limit: (Optional) Limit in seconds of CPU time for every\n\
+    worker. It is measured for the whole process, so it runs out faster\n\
+    with more workers. Making the cubes counts against it too.\n\
+:param confl_limit: (Optional) Conflict limit for every worker\n\
+:param model_format: Format of the solution, as for solve().\n\
+:param vars: Variables to return the values of, as for solve().\n\
+:type depth: <int>\n\
+:type n_cubes: <int>\n\
+:type workers: <int>\n\
+:type time_limit: <double>\n\
+:type confl_limit: <long>\n\
+:return: A tuple (sat, solution, cubes). sat and solution are as for\n\
+    solve(). cubes is a dict with: 'depth'; 'cubes', the number of cubes\n\
+    made; 'unsat', how many of them were found to be unsatisfiable; and\n\
+    'open', how many were not decided.\n\
+:rtype: <tuple>"
+);
 
-    return result;
-}
+static PyObject* cube_and_conquer(Solver *self, PyObject *args, PyObject *kwds);
 
 /*************************** Method definitions *************************/
 
@@ -717,16 +5196,55 @@ static PyMethodDef Solver_methods[] = {
     {"add_clause",(PyCFunction) add_clause,  METH_VARARGS | METH_KEYWORDS, add_clause_doc},
     {"add_clauses", (PyCFunction) add_clauses,  METH_VARARGS | METH_KEYWORDS, add_clauses_doc},
     {"add_xor_clause",(PyCFunction) add_xor_clause,  METH_VARARGS | METH_KEYWORDS, "adds an XOR clause to the system"},
+    {"add_xor_clauses", (PyCFunction) add_xor_clauses,  METH_VARARGS | METH_KEYWORDS, add_xor_clauses_doc},
+    {"add_atmost", (PyCFunction) add_atmost,  METH_VARARGS | METH_KEYWORDS, add_atmost_doc},
+    {"add_atleast", (PyCFunction) add_atleast,  METH_VARARGS | METH_KEYWORDS, add_atleast_doc},
+    {"add_pb", (PyCFunction) add_pb,  METH_VARARGS | METH_KEYWORDS, add_pb_doc},
+    {"add_pb_constraints", (PyCFunction) add_pb_constraints,  METH_VARARGS | METH_KEYWORDS, add_pb_constraints_doc},
+    {"load_dimacs", (PyCFunction) load_dimacs, METH_VARARGS | METH_KEYWORDS, load_dimacs_doc},
+    {"load_opb", (PyCFunction) load_opb, METH_VARARGS | METH_KEYWORDS, load_opb_doc},
     {"nb_vars", (PyCFunction) nb_vars, METH_VARARGS | METH_KEYWORDS, nb_vars_doc},
     //{"nb_clauses", (PyCFunction) nb_clauses, METH_VARARGS | METH_KEYWORDS, "returns number of clauses"},
     {"is_satisfiable", (PyCFunction) is_satisfiable, METH_VARARGS | METH_KEYWORDS, is_satisfiable_doc},
     {"get_conflict", (PyCFunction) get_conflict, METH_VARARGS | METH_KEYWORDS, get_conflict_doc},
+    {"get_model_buffer", (PyCFunction) get_model_buffer, METH_VARARGS | METH_KEYWORDS, get_model_buffer_doc},
+    {"itersolve", (PyCFunction) itersolve, METH_VARARGS | METH_KEYWORDS, itersolve_doc},
+    {"solve_many", (PyCFunction) solve_many, METH_VARARGS | METH_KEYWORDS, solve_many_doc},
+    {"interrupt", (PyCFunction) interrupt, METH_NOARGS, interrupt_doc},
+    {"solve_async", (PyCFunction) solve_async, METH_VARARGS | METH_KEYWORDS, solve_async_doc},
+    {"last_stats", (PyCFunction) last_stats, METH_NOARGS, last_stats_doc},
+    {"simplify", (PyCFunction) simplify, METH_VARARGS | METH_KEYWORDS, simplify_doc},
+    {"clone", (PyCFunction) clone_solver, METH_VARARGS | METH_KEYWORDS, clone_doc},
+    {"dumps", (PyCFunction) dumps, METH_VARARGS | METH_KEYWORDS, dumps_doc},
+    {"loads", (PyCFunction) loads, METH_VARARGS | METH_KEYWORDS | METH_STATIC, loads_doc},
+    {"load_simplified", (PyCFunction) load_simplified, METH_VARARGS | METH_KEYWORDS, load_simplified_doc},
+    {"iter_constraints", (PyCFunction) iter_constraints, METH_VARARGS | METH_KEYWORDS, iter_constraints_doc},
+    {"get_zero_assigned_lits", (PyCFunction) get_zero_assigned_lits, METH_NOARGS, get_zero_assigned_lits_doc},
+    {"get_all_binary_xors", (PyCFunction) get_all_binary_xors, METH_NOARGS, get_all_binary_xors_doc},
+    {"get_recovered_xors", (PyCFunction) get_recovered_xors, METH_VARARGS | METH_KEYWORDS, get_recovered_xors_doc},
+    {"get_recovered_or_gates", (PyCFunction) get_recovered_or_gates, METH_VARARGS | METH_KEYWORDS, get_recovered_or_gates_doc},
+    {"get_recovered_ite_gates", (PyCFunction) get_recovered_ite_gates, METH_VARARGS | METH_KEYWORDS, get_recovered_ite_gates_doc},
+    {"get_vsids_scores", (PyCFunction) get_vsids_scores, METH_NOARGS, get_vsids_scores_doc},
+    {"get_var_incidence", (PyCFunction) get_var_incidence, METH_VARARGS | METH_KEYWORDS, get_var_incidence_doc},
+    {"get_lit_incidence", (PyCFunction) get_lit_incidence, METH_NOARGS, get_lit_incidence_doc},
+    {"backbone", (PyCFunction) backbone, METH_VARARGS | METH_KEYWORDS, backbone_doc},
+    {"backbone_progress", (PyCFunction) backbone_progress, METH_NOARGS, backbone_progress_doc},
+    {"sample_sls", (PyCFunction) sample_sls, METH_VARARGS | METH_KEYWORDS, sample_sls_doc},
+    {"cube_and_conquer", (PyCFunction) cube_and_conquer, METH_VARARGS | METH_KEYWORDS, cube_and_conquer_doc},
+    {"__reduce__", (PyCFunction) Solver_reduce, METH_NOARGS, NULL},
     {NULL,        NULL}  /* sentinel - marks the end of this structure */
 };
 
 static void
 Solver_dealloc(Solver* self)
 {
+    if (self->control != NULL) {
+        std::lock_guard<std::mutex> lock((*self->control)->mu);
+        (*self->control)->cmsat = NULL;
+    }
+    delete self->control;
+    delete self->config;
+    delete self->reconstruction;
     delete self->cmsat;
     Py_TYPE(self)->tp_free ((PyObject*) self);
 }
@@ -784,6 +5302,688 @@ static PyTypeObject pycryptosat_SolverType = {
     (initproc)Solver_init,      /* tp_init */
 };
 
+static PyTypeObject* solver_type()
+{
+    return &pycryptosat_SolverType;
+}
+
+/*************************** Portfolio *************************/
+
+typedef struct {
+    Solver solver;              // holds the formula, see Portfolio_init()
+    std::vector<SolverConfig>* configs;
+    int winner;                 // index into configs, -1 if none
+} Portfolio;
+
+// One solver of a portfolio. cmsat is only touched by the thread running it,
+// apart from interrupt_asap().
+struct PortfolioMember {
+    SATSolver* cmsat = NULL;
+    double time_limit;
+    long confl_limit;
+    lbool result = l_Undef;
+    CallStats stats = CallStats();
+    std::atomic<bool> finished{false};
+};
+
+// State shared by the threads of one Portfolio.solve(...)
+struct PortfolioRace {
+    Formula formula;
+    std::vector<Lit> assumptions;
+    std::vector<PortfolioMember> members;
+    std::atomic<int> winner{-1};
+
+    explicit PortfolioRace(size_t num_members) : members(num_members) {}
+};
+
+static void run_portfolio_member(PortfolioRace *race, size_t i)
+{
+    PortfolioMember& member = race->members[i];
+    const CallStatsTimer timer(member.cmsat);
+    add_formula(member.cmsat, race->formula);
+    if (race->winner.load() < 0) {
+        // The limits are deadlines, so set them once the formula is in
+        member.cmsat->set_max_time(member.time_limit);
+        member.cmsat->set_max_confl(member.confl_limit);
+        member.result = member.cmsat->solve(&race->assumptions);
+    }
+    timer.stop(member.cmsat, "solve", member.stats);
+    int none = -1;
+    if (member.result != l_Undef) {
+        race->winner.compare_exchange_strong(none, (int)i);
+    }
+    member.finished.store(true);
+}
+
+// Runs run_member(i) for every member on its own thread. Once winner is
+// set, or interrupt() is called, the members still running are interrupted,
+// again every millisecond like in watch_interrupt(), until they have all
+// returned. Returns false if the threads could not be started. Does not need
+// the GIL.
+template <typename F>
+static bool run_member_threads(
+    std::vector<PortfolioMember>& members
+    , const std::atomic<int>& winner
+    , SolveControl& ctl
+    , F run_member
+) {
+    std::vector<std::thread> threads;
+    bool started = true;
+    for (size_t i = 0; i < members.size(); i++) {
+        try {
+            threads.emplace_back(run_member, i);
+        } catch (const std::system_error&) {
+            started = false;
+            for (; i < members.size(); i++) {
+                members[i].finished.store(true);
+            }
+        }
+    }
+
+    for (;;) {
+        const bool stop = !started || winner.load() >= 0 || ctl.interrupted.load();
+        bool running = false;
+        for (PortfolioMember& member: members) {
+            if (!member.finished.load()) {
+                running = true;
+                if (stop) {
+                    member.cmsat->interrupt_asap();
+                }
+            }
+        }
+        if (!running) {
+            break;
+        }
+        std::this_thread::sleep_for(std::chrono::milliseconds(1));
+    }
+    for (std::thread& thread: threads) {
+        thread.join();
+    }
+    return started;
+}
+
+// Runs every solver of the race on its own thread, see run_member_threads()
+static bool run_portfolio_race(PortfolioRace& race, SolveControl& ctl)
+{
+    return run_member_threads(race.members, race.winner, ctl,
+        [&race](size_t i) { run_portfolio_member(&race, i); });
+}
+
+PyDoc_STRVAR(portfolio_solve_doc,
+"solve(assumptions=None, time_limit=None, confl_limit=None, model_format=None, vars=None)\n\
+Solve the formula with every configuration of the portfolio at once.\n\
+\n\
+The clauses added so far are read once and copied into a new solver per\n\
+configuration. The solvers then run on their own threads with the GIL\n\
+released, the first answer is returned and the other solvers are\n\
+interrupted. interrupt() stops all of them. last_stats() describes the\n\
+solver that answered, or the first one if none did.\n\
+\n\
+:param assumptions: Literals assumed to be True during this call.\n\
+:param time_limit: Limit in seconds of CPU time for every solver of this\n\
+    call. It is measured for the whole process, so it runs out faster\n\
+    with more configurations. Default: the limit of the Portfolio.\n\
+:param confl_limit: Conflict limit for every solver of this call.\n\
+    Default: the limit of the Portfolio.\n\
+:param model_format: Format of the solution, as for Solver.solve().\n\
+:param vars: Variables to return the values of, as for Solver.solve().\n\
+:return: A tuple like the one of Solver.solve(). The index of the\n\
+    configuration that answered is then in the winner attribute.\n\
+:rtype: <tuple <bool>, <tuple>>"
+);
+
+static PyObject* Portfolio_solve(Portfolio *self, PyObject *args, PyObject *kwds)
+{
+    Solver *solver = &self->solver;
+    PyObject* assumptions = NULL;
+    double time_limit = solver->time_limit;
+    long confl_limit = solver->confl_limit;
+    const char* model_format = NULL;
+    PyObject* vars_obj = NULL;
+
+    static char const* kwlist[] = {"assumptions", "time_limit", "confl_limit", "model_format", "vars", NULL};
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|OdlzO", const_cast<char**>(kwlist), &assumptions, &time_limit, &confl_limit, &model_format, &vars_obj)) {
+        return NULL;
+    }
+    ModelFormat fmt;
+    if (!parse_model_format(model_format, fmt)) {
+        return NULL;
+    }
+    std::unique_ptr<std::vector<uint32_t>> vars;
+    if (!parse_model_vars(solver, vars_obj, vars)) {
+        return NULL;
+    }
+    if (!check_solve_limits(0, time_limit, confl_limit)) {
+        return NULL;
+    }
+
+    const std::vector<SolverConfig>& configs = *self->configs;
+    PortfolioRace race(configs.size());
+    if (assumptions) {
+        if (!parse_assumption_lits(assumptions, solver->cmsat, race.assumptions)) {
+            return NULL;
+        }
+    }
+
+    bool started;
+    const std::vector<lbool>* model = NULL;
+    std::vector<lbool> extended;
+    self->winner = -1;
+    clear_interrupt(solver);
+    set_solving(solver, true);
+    Py_BEGIN_ALLOW_THREADS      /* release GIL */
+    copy_solver_to_solver(solver->cmsat, &race.formula);
+    for (size_t i = 0; i < configs.size(); i++) {
+        PortfolioMember& member = race.members[i];
+        member.cmsat = new_configured_solver(configs[i]);
+        member.time_limit = std::min(time_limit, configs[i].time_limit);
+        member.confl_limit = std::min(confl_limit, configs[i].confl_limit);
+    }
+    started = run_portfolio_race(race, **solver->control);
+    // The winner's model is extended here rather than with the GIL held
+    if (started && race.winner.load() >= 0) {
+        const PortfolioMember& member = race.members[race.winner.load()];
+        if (member.result == l_True) {
+            model = &extended_model(solver->reconstruction, member.cmsat->get_model(), extended);
+        }
+    }
+    Py_END_ALLOW_THREADS
+    set_solving(solver, false);
+
+    // The model and the conflict of the base solver are not those of this call
+    solver->last_result = l_Undef;
+    const int winner = race.winner.load();
+    solver->last_stats = race.members[winner >= 0 ? winner : 0].stats;
+    PyObject* result = NULL;
+    if (!started) {
+        PyErr_SetString(PyExc_RuntimeError, "could not start the threads of the portfolio");
+    } else if (winner >= 0) {
+        self->winner = winner;
+        result = build_solve_result(solver, race.members[winner].result, fmt, model, vars.get());
+    } else {
+        result = build_solve_result(solver, l_Undef, fmt);
+    }
+    for (PortfolioMember& member: race.members) {
+        delete member.cmsat;
+    }
+    return result;
+}
+
+static PyObject* Portfolio_get_winner(Portfolio *self, void *)
+{
+    if (self->winner < 0) {
+        Py_INCREF(Py_None);
+        return Py_None;
+    }
+    return PyLong_FromLong(self->winner);
+}
+
+// Solver.loads() would make a Solver out of it
+static PyObject* Portfolio_reduce(Portfolio *)
+{
+    PyErr_SetString(PyExc_TypeError, "cannot pickle a Portfolio, pickle its configs and a Solver instead");
+    return NULL;
+}
+
+static PyMethodDef Portfolio_methods[] = {
+    {"solve", (PyCFunction) Portfolio_solve, METH_VARARGS | METH_KEYWORDS, portfolio_solve_doc},
+    {"__reduce__", (PyCFunction) Portfolio_reduce, METH_NOARGS, NULL},
+    {NULL,        NULL}  /* sentinel - marks the end of this structure */
+};
+
+static PyGetSetDef Portfolio_getset[] = {
+    {(char*)"winner", (getter)Portfolio_get_winner, NULL,
+        (char*)"Index of the configuration that answered the last solve(...), None if none did.", NULL},
+    {NULL, NULL, NULL, NULL, NULL}  /* sentinel */
+};
+
+static const char portfolio_create_docstring[] = \
+"Portfolio(configs, verbose=0, time_limit=max_numeric_limits, confl_limit=max_numeric_limits, **options)\n\
+Solver that races differently configured solvers on the same formula.\n\
+\n\
+Clauses are added once, with the methods inherited from Solver, to a\n\
+solver set up by the other arguments as for Solver(). solve(...) copies\n\
+them into one new solver per configuration and returns the first answer.\n\
+The other inherited methods, e.g. solve_many(...), use that solver only.\n\
+\n\
+:param configs: Keyword arguments of Solver() for every solver of the\n\
+    race, e.g. [{'seed': 1}, {'polarity': 'rnd', 'sls': False}].\n\
+:type configs: <list <dict>>";
+
+static void
+Portfolio_dealloc(Portfolio* self)
+{
+    delete self->configs;
+    Solver_dealloc(&self->solver);
+}
+
+// Parses the configs argument, checking every config as Solver() would
+static int parse_portfolio_configs(PyObject *configs, std::vector<SolverConfig>& out)
+{
+    PyObject *seq = PySequence_Fast(configs, "configs must be a sequence of dicts");
+    if (seq == NULL) {
+        return 0;
+    }
+    const Py_ssize_t size = PySequence_Fast_GET_SIZE(seq);
+    if (size == 0) {
+        PyErr_SetString(PyExc_ValueError, "configs must not be empty");
+        Py_DECREF(seq);
+        return 0;
+    }
+    PyObject *no_args = PyTuple_New(0);
+    if (no_args == NULL) {
+        Py_DECREF(seq);
+        return 0;
+    }
+    out.resize(size);
+    int ok = 1;
+    for (Py_ssize_t i = 0; ok && i < size; i++) {
+        PyObject *config = PySequence_Fast_GET_ITEM(seq, i);
+        if (!PyDict_Check(config)) {
+            PyErr_SetString(PyExc_TypeError, "configs must be a sequence of dicts");
+            ok = 0;
+        } else {
+            ok = parse_solver_config(no_args, config, out[i]);
+        }
+    }
+    Py_DECREF(no_args);
+    Py_DECREF(seq);
+    return ok;
+}
+
+static int
+Portfolio_init(Portfolio *self, PyObject *args, PyObject *kwds)
+{
+    PyObject *solver_kwds = kwds != NULL ? PyDict_Copy(kwds) : PyDict_New();
+    if (solver_kwds == NULL) {
+        return -1;
+    }
+    PyObject *configs = PyDict_GetItemString(solver_kwds, "configs");
+    PyObject *solver_args;
+    if (PyTuple_GET_SIZE(args) > 0) {
+        if (configs != NULL) {
+            PyErr_SetString(PyExc_TypeError, "argument configs given by name and position");
+            Py_DECREF(solver_kwds);
+            return -1;
+        }
+        configs = PyTuple_GET_ITEM(args, 0);
+        Py_INCREF(configs);
+        solver_args = PyTuple_GetSlice(args, 1, PyTuple_GET_SIZE(args));
+    } else if (configs != NULL) {
+        Py_INCREF(configs);
+        if (PyDict_DelItemString(solver_kwds, "configs") != 0) {
+            Py_DECREF(configs);
+            Py_DECREF(solver_kwds);
+            return -1;
+        }
+        solver_args = PyTuple_New(0);
+    } else {
+        PyErr_SetString(PyExc_TypeError, "missing required argument 'configs'");
+        Py_DECREF(solver_kwds);
+        return -1;
+    }
+
+    std::vector<SolverConfig> parsed;
+    const int ok = solver_args != NULL && parse_portfolio_configs(configs, parsed);
+    Py_DECREF(configs);
+    if (ok) {
+        delete self->solver.cmsat;
+        setup_solver(&self->solver, solver_args, solver_kwds);
+    }
+    Py_XDECREF(solver_args);
+    Py_DECREF(solver_kwds);
+    if (!ok || !self->solver.cmsat) {
+        return -1;
+    }
+
+    delete self->configs;
+    self->configs = new std::vector<SolverConfig>(std::move(parsed));
+    self->winner = -1;
+    return 0;
+}
+
+static PyTypeObject pycryptosat_PortfolioType = {
+    PyVarObject_HEAD_INIT(NULL, 0) /*ob_size*/
+    "pycryptosat.Portfolio",    /*tp_name*/
+    sizeof(Portfolio),          /*tp_basicsize*/
+    0,                          /*tp_itemsize*/
+    (destructor)Portfolio_dealloc, /*tp_dealloc*/
+    0,                          /*tp_print*/
+    0,                          /*tp_getattr*/
+    0,                          /*tp_setattr*/
+    0,                          /*tp_compare*/
+    0,                          /*tp_repr*/
+    0,                          /*tp_as_number*/
+    0,                          /*tp_as_sequence*/
+    0,                          /*tp_as_mapping*/
+    0,                          /*tp_hash */
+    0,                          /*tp_call*/
+    0,                          /*tp_str*/
+    0,                          /*tp_getattro*/
+    0,                          /*tp_setattro*/
+    0,                          /*tp_as_buffer*/
+    Py_TPFLAGS_DEFAULT,         /*tp_flags*/
+    portfolio_create_docstring, /* tp_doc */
+    0,                          /* tp_traverse */
+    0,                          /* tp_clear */
+    0,                          /* tp_richcompare */
+    0,                          /* tp_weaklistoffset */
+    0,                          /* tp_iter */
+    0,                          /* tp_iternext */
+    Portfolio_methods,          /* tp_methods */
+    0,                          /* tp_members */
+    Portfolio_getset,           /* tp_getset */
+    &pycryptosat_SolverType,    /* tp_base */
+    0,                          /* tp_dict */
+    0,                          /* tp_descr_get */
+    0,                          /* tp_descr_set */
+    0,                          /* tp_dictoffset */
+    (initproc)Portfolio_init,   /* tp_init */
+};
+
+/*************************** Cube and conquer *************************/
+
+// Number of variables, those in the most clauses, that the lookahead of
+// cube_and_conquer() considers for every split
+static const size_t cube_lookahead_vars = 64;
+
+// Makes the cubes of cube_and_conquer() by lookahead on cmsat. Once the CPU
+// time deadline passes or interrupted is set, the parts of the search space
+// not split yet are left as they are, as open cubes. Does not need the GIL.
+struct CubeMaker {
+    SATSolver *cmsat;
+    const double deadline;
+    const std::atomic<bool>& interrupted;
+    bool stopped = false;
+    std::vector<uint32_t> candidates;
+    std::vector<char> assigned;     // by var, only used in split()
+    std::vector<Lit> implied;
+    std::vector<std::vector<Lit>> cubes;
+
+    CubeMaker(
+        SATSolver *_cmsat
+        , const Reconstruction *rec
+        , const double _deadline
+        , const std::atomic<bool>& _interrupted
+    ) : cmsat(_cmsat), deadline(_deadline), interrupted(_interrupted)
+    {
+        // Also adds the pending clauses to the solver
+        const std::vector<uint32_t> inc = cmsat->get_var_incidence();
+        const uint32_t num_vars = std::min<size_t>(inc.size(), cmsat->nVars());
+        for (uint32_t var = 0; var < num_vars; var++) {
+            if (inc[var] > 0 && !cmsat->removed_var(var)
+                && !(rec != NULL && var < rec->removed.size() && rec->removed[var])
+            ) {
+                candidates.push_back(var);
+            }
+        }
+        std::stable_sort(candidates.begin(), candidates.end(),
+            [&inc](uint32_t a, uint32_t b) { return inc[a] > inc[b]; });
+        if (candidates.size() > cube_lookahead_vars) {
+            candidates.resize(cube_lookahead_vars);
+        }
+        assigned.resize(cmsat->nVars(), 0);
+    }
+
+    // Number of literals propagated by cube, -1 if it fails
+    long lookahead(const std::vector<Lit>& cube)
+    {
+        if (!cmsat->implied_by(cube, implied)) {
+            return -1;
+        }
+        return implied.size();
+    }
+
+    void split(std::vector<Lit>& cube, unsigned depth)
+    {
+        if (stopped || interrupted.load() || cpuTime() > deadline) {
+            stopped = true;
+            cubes.push_back(cube);
+            return;
+        }
+        if (lookahead(cube) < 0) {
+            return;
+        }
+        if (depth == 0) {
+            cubes.push_back(cube);
+            return;
+        }
+
+        // The candidates not yet set by the cube
+        for (const std::vector<Lit>* lits: {&implied, &cube}) {
+            for (const Lit lit: *lits) {
+                assigned[lit.var()] = 1;
+            }
+        }
+        std::vector<uint32_t> free_vars;
+        for (const uint32_t var: candidates) {
+            if (!assigned[var]) {
+                free_vars.push_back(var);
+            }
+        }
+        for (const std::vector<Lit>* lits: {&implied, &cube}) {
+            for (const Lit lit: *lits) {
+                assigned[lit.var()] = 0;
+            }
+        }
+
+        int64_t best_var = -1;
+        uint64_t best_score = 0;
+        Lit forced = lit_Undef;
+        for (const uint32_t var: free_vars) {
+            cube.push_back(Lit(var, false));
+            const long pos = lookahead(cube);
+            cube.back() = Lit(var, true);
+            const long neg = lookahead(cube);
+            cube.pop_back();
+            if (pos < 0 && neg < 0) {
+                return;
+            }
+            if (pos < 0 || neg < 0) {
+                forced = Lit(var, pos < 0);
+                break;
+            }
+            const uint64_t score = (uint64_t)(pos + 1) * (uint64_t)(neg + 1);
+            if (best_var < 0 || score > best_score) {
+                best_var = var;
+                best_score = score;
+            }
+        }
+
+        if (forced != lit_Undef) {
+            cube.push_back(forced);
+            split(cube, depth);
+            cube.pop_back();
+        } else if (best_var < 0) {
+            cubes.push_back(cube);
+        } else {
+            cube.push_back(Lit(best_var, false));
+            split(cube, depth - 1);
+            cube.back() = Lit(best_var, true);
+            split(cube, depth - 1);
+            cube.pop_back();
+        }
+    }
+};
+
+// State shared by the workers of one cube_and_conquer(...)
+struct CubeAndConquer {
+    Formula formula;
+    std::vector<std::vector<Lit>> cubes;
+    std::vector<PortfolioMember> members;
+    std::atomic<size_t> next_cube{0};
+    std::atomic<size_t> num_unsat{0};
+    std::atomic<int> winner{-1};
+
+    explicit CubeAndConquer(size_t num_workers) : members(num_workers) {}
+};
+
+// Solves cubes until there are none left, one is satisfiable or the worker
+// runs out of budget
+static void run_cube_worker(CubeAndConquer *cc, size_t i)
+{
+    PortfolioMember& member = cc->members[i];
+    const CallStatsTimer timer(member.cmsat);
+    add_formula(member.cmsat, cc->formula);
+    member.cmsat->set_max_time(member.time_limit);
+    member.cmsat->set_max_confl(member.confl_limit);
+    member.result = l_False;
+    while (cc->winner.load() < 0) {
+        const size_t cube = cc->next_cube++;
+        if (cube >= cc->cubes.size()) {
+            break;
+        }
+        const lbool res = member.cmsat->solve(&cc->cubes[cube]);
+        if (res == l_False) {
+            cc->num_unsat++;
+            continue;
+        }
+        member.result = res;
+        if (res == l_True) {
+            int none = -1;
+            cc->winner.compare_exchange_strong(none, (int)i);
+        }
+        break;
+    }
+    timer.stop(member.cmsat, "cube_and_conquer", member.stats);
+    member.finished.store(true);
+}
+
+static PyObject* cube_and_conquer(Solver *self, PyObject *args, PyObject *kwds)
+{
+    long depth = -1;
+    long n_cubes = -1;
+    long workers = -1;
+    double time_limit = self->time_limit;
+    long confl_limit = self->confl_limit;
+    const char* model_format = NULL;
+    PyObject* vars_obj = NULL;
+
+    static char const* kwlist[] = {"depth", "n_cubes", "workers", "time_limit", "confl_limit", "model_format", "vars", NULL};
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|llldlzO", const_cast<char**>(kwlist), &depth, &n_cubes, &workers, &time_limit, &confl_limit, &model_format, &vars_obj)) {
+        return NULL;
+    }
+    if (self->single_run) {
+        PyErr_SetString(PyExc_RuntimeError, "cube_and_conquer() solves many cubes, it cannot run on a single_run solver");
+        return NULL;
+    }
+    if (workers < 0) {
+        workers = std::max(1u, std::thread::hardware_concurrency());
+    } else if (workers == 0) {
+        PyErr_SetString(PyExc_ValueError, "workers must be at least 1");
+        return NULL;
+    }
+    if (depth >= 0 && n_cubes >= 0) {
+        PyErr_SetString(PyExc_ValueError, "give depth or n_cubes, not both");
+        return NULL;
+    }
+    if (depth < 0) {
+        if (n_cubes < 0) {
+            n_cubes = 8 * workers;
+        } else if (n_cubes == 0) {
+            PyErr_SetString(PyExc_ValueError, "n_cubes must be at least 1");
+            return NULL;
+        }
+        depth = 0;
+        while (depth < 30 && (1L << depth) < n_cubes) {
+            depth++;
+        }
+    }
+    if (depth > 20) {
+        PyErr_SetString(PyExc_ValueError, "depth must be at most 20, i.e. at most 2**20 cubes");
+        return NULL;
+    }
+    ModelFormat fmt;
+    if (!parse_model_format(model_format, fmt)) {
+        return NULL;
+    }
+    std::unique_ptr<std::vector<uint32_t>> vars;
+    if (!parse_model_vars(self, vars_obj, vars)) {
+        return NULL;
+    }
+    if (!check_solve_limits(0, time_limit, confl_limit)) {
+        return NULL;
+    }
+
+    CubeAndConquer cc(workers);
+    bool started = true;
+    const std::vector<lbool>* model = NULL;
+    std::vector<lbool> extended;
+    clear_interrupt(self);
+    set_solving(self, true);
+    Py_BEGIN_ALLOW_THREADS      /* release GIL */
+    const CallStatsTimer timer(self->cmsat);
+    // Making the cubes counts against the time limit of the workers
+    const double cube_start = cpuTime();
+    bool cubing_stopped;
+    {
+        CubeMaker maker(self->cmsat, self->reconstruction, cube_start + time_limit, (*self->control)->interrupted);
+        std::vector<Lit> cube;
+        if (self->cmsat->okay()) {
+            maker.split(cube, depth);
+        }
+        cc.cubes = std::move(maker.cubes);
+        cubing_stopped = maker.stopped;
+    }
+    if (!cubing_stopped) {
+        copy_solver_to_solver(self->cmsat, &cc.formula);
+        for (PortfolioMember& member: cc.members) {
+            member.cmsat = new_configured_solver(*self->config);
+            member.time_limit = std::max(0.0, time_limit - (cpuTime() - cube_start));
+            member.confl_limit = confl_limit;
+        }
+        started = run_member_threads(cc.members, cc.winner, **self->control,
+            [&cc](size_t i) { run_cube_worker(&cc, i); });
+        if (started && cc.winner.load() >= 0) {
+            model = &extended_model(self->reconstruction,
+                cc.members[cc.winner.load()].cmsat->get_model(), extended);
+        }
+    }
+    timer.stop(self->cmsat, "cube_and_conquer", self->last_stats);
+    Py_END_ALLOW_THREADS
+    set_solving(self, false);
+
+    // The workers did the search
+    CallStats& stats = self->last_stats;
+    stats.search_time = 0;
+    stats.conflicts = stats.propagations = stats.decisions = 0;
+    for (const PortfolioMember& member: cc.members) {
+        stats.search_time += member.stats.search_time;
+        stats.conflicts += member.stats.conflicts;
+        stats.propagations += member.stats.propagations;
+        stats.decisions += member.stats.decisions;
+    }
+
+    // The model and the conflict of this solver are not those of this call
+    self->last_result = l_Undef;
+    const int winner = cc.winner.load();
+    const size_t num_unsat = cc.num_unsat.load();
+    PyObject* result = NULL;
+    if (!started) {
+        PyErr_SetString(PyExc_RuntimeError, "could not start the threads of the workers");
+    } else if (winner >= 0) {
+        result = build_solve_result(self, l_True, fmt, model, vars.get());
+    } else {
+        result = build_solve_result(self, num_unsat == cc.cubes.size() ? l_False : l_Undef, fmt);
+    }
+    for (PortfolioMember& member: cc.members) {
+        delete member.cmsat;
+    }
+    if (result == NULL) {
+        return NULL;
+    }
+
+    const size_t num_open = winner >= 0 ? cc.cubes.size() - num_unsat - 1 : cc.cubes.size() - num_unsat;
+    PyObject* full = Py_BuildValue("(OO{s:l,s:n,s:n,s:n})",
+        PyTuple_GET_ITEM(result, 0), PyTuple_GET_ITEM(result, 1),
+        "depth", depth,
+        "cubes", (Py_ssize_t)cc.cubes.size(),
+        "unsat", (Py_ssize_t)num_unsat,
+        "open", (Py_ssize_t)num_open);
+    Py_DECREF(result);
+    return full;
+}
+
 MODULE_INIT_FUNC(pycryptosat)
 {
     PyObject* m;
@@ -794,6 +5994,19 @@ MODULE_INIT_FUNC(pycryptosat)
         // In pure Python2: return nothing.
         return NULL;
     }
+    pycryptosat_PortfolioType.tp_new = PyType_GenericNew;
+    if (PyType_Ready(&pycryptosat_PortfolioType) < 0) {
+        return NULL;
+    }
+    if (PyType_Ready(&pycryptosat_BufferType) < 0) {
+        return NULL;
+    }
+    if (PyType_Ready(&pycryptosat_ModelIteratorType) < 0) {
+        return NULL;
+    }
+    if (PyType_Ready(&pycryptosat_ConstraintIteratorType) < 0) {
+        return NULL;
+    }
 
     static struct PyModuleDef moduledef = {
         PyModuleDef_HEAD_INIT,  /* m_base */
@@ -837,5 +6050,17 @@ MODULE_INIT_FUNC(pycryptosat)
         return NULL;
     }
 
+    Py_INCREF(&pycryptosat_PortfolioType);
+    if (PyModule_AddObject(m, "Portfolio", (PyObject *)&pycryptosat_PortfolioType)) {
+        Py_DECREF(m);
+        return NULL;
+    }
+
+    Py_INCREF(&pycryptosat_BufferType);
+    if (PyModule_AddObject(m, "Buffer", (PyObject *)&pycryptosat_BufferType)) {
+        Py_DECREF(m);
+        return NULL;
+    }
+
     return m;
 }
@@ -23,14 +23,21 @@
 from __future__ import unicode_literals
 from __future__ import print_function
 from array import array as _array
+import asyncio
+import gzip
+import itertools
 import os
+import pickle
+import random
 import sys
+import tempfile
+import threading
 import unittest
 import time
 
 
 import pycryptosat
-from pycryptosat import Solver
+from pycryptosat import Portfolio, Solver
 
 _MODULE_DIR = os.path.dirname(os.path.realpath(__file__))+os.path.sep
 
@@ -137,6 +144,49 @@ class TestXor(unittest.TestCase):
             self.assertEqual(res, True)
             self.assertEqual(solution, tuple(solution_expected))
 
+    def test_bulk(self):
+        self.solver.add_xor_clauses(array('i', [1, 2, 3, 0, 2, 4, 0]), bytes([1, 0]))
+        res, solution = self.solver.solve([-1, -2])
+        self.assertEqual(res, True)
+        self.assertEqual(solution, (None, False, False, True, False))
+
+    def test_bulk_csr(self):
+        self.solver.add_xor_clauses(array('q', [1, 2, 2, 3]), array('i', [1, 0]),
+                                    indptr=array('q', [0, 2, 4]), max_var=5)
+        self.assertEqual(self.solver.nb_vars(), 5)
+        res, solution = self.solver.solve([1])
+        self.assertEqual(res, True)
+        self.assertEqual(solution[:4], (None, True, False, False))
+
+    def test_bulk_many(self):
+        random.seed(4)
+        xors = [random.sample(range(1, 40), 3) for _ in range(30)]
+        rhs = [random.getrandbits(1) for _ in xors]
+        flat = array('i', [v for xor in xors for v in xor + [0]])
+        self.solver.add_xor_clauses(flat, bytes(rhs))
+        reference = Solver()
+        for xor, r in zip(xors, rhs):
+            reference.add_xor_clause(xor, bool(r))
+        res, solution = self.solver.solve()
+        self.assertEqual(res, reference.solve()[0])
+        if res:
+            for xor, r in zip(xors, rhs):
+                self.assertEqual(sum(solution[v] for v in xor) % 2, r)
+
+    def test_bulk_wrong_args(self):
+        self.solver.add_xor_clauses(array('i', [0]), bytes([1]))
+        self.assertEqual(self.solver.solve(), (False, None))
+        self.assertRaises(TypeError, self.solver.add_xor_clauses, [1, 2, 0], bytes([1]))
+        for xors, rhs in [
+            (array('i', [1, -2, 0]), bytes([1])),
+            (array('i', [1, 2]), bytes([1])),
+            (array('i', [1, 2, 0]), bytes([1, 0])),
+            (array('i', [1, 2, 0]), bytes([2])),
+            (array('d', [1, 2, 0]), bytes([1])),
+        ]:
+            self.assertRaises(ValueError, Solver().add_xor_clauses, xors, rhs)
+        self.assertRaises(ValueError, Solver().add_xor_clauses, array('i', [1, 2, 0]), bytes([1]), max_var=2**28)
+
 
 class InitTester(unittest.TestCase):
 
@@ -230,6 +280,53 @@ class TestSolve(unittest.TestCase):
         cls = array('i', [1, 2, 0, 1, 2])
         self.assertRaises(ValueError, self.solver.add_clause, cls)
 
+    def test_add_clauses_array_max_var(self):
+        self.solver.add_clauses(array('i', [1, -2, 0, 3, 0]), max_var=10)
+        self.assertEqual(self.solver.nb_vars(), 10)
+        self.solver.add_clauses([[4, 5]], max_var=12)
+        self.assertEqual(self.solver.nb_vars(), 12)
+        self.assertRaises(ValueError, self.solver.add_clauses, [], max_var=-1)
+        self.assertRaises(ValueError, self.solver.add_clauses, array('i', [1, 2, 0]), max_var=2**28)
+        self.assertRaises(ValueError, self.solver.add_clauses, array('i', [1, 2**28, 0]))
+
+    def test_add_clauses_array_checked_first(self):
+        cls = array('q', [1, 0, 2**40, 0])
+        self.assertRaises(ValueError, self.solver.add_clauses, cls)
+        self.assertEqual(self.solver.nb_vars(), 0)
+        self.assertEqual(self.solver.solve(), (True, (None,)))
+
+    def test_add_clauses_csr(self):
+        lits = array('i', clauses1[0] + clauses1[1] + clauses1[2])
+        indptr = array('l', [0, 3, 7, 9])
+        self.solver.add_clauses(lits, indptr=indptr)
+        self.assertEqual(self.solver.nb_vars(), 5)
+        res, solution = self.solver.solve()
+        self.assertEqual(res, True)
+        self.assertTrue(check_solution(clauses1, solution))
+        self.solver.add_clauses(array('i', [-1, 1]), indptr=array('i', [0, 1, 2]))
+        self.assertEqual(self.solver.solve(), (False, None))
+
+        solver = Solver()
+        solver.add_clauses(array('i', [1]), indptr=array('i', [0, 1, 1]))
+        self.assertEqual(solver.solve(), (False, None))
+
+    def test_add_clauses_csr_wrong(self):
+        lits = array('i', [1, 2, 3])
+        self.assertRaises(ValueError, self.solver.add_clauses, lits, indptr=array('i', [0, 4]))
+        self.assertRaises(ValueError, self.solver.add_clauses, lits, indptr=array('i', [2, 1]))
+        self.assertRaises(ValueError, self.solver.add_clauses, array('i', [1, 0]), indptr=array('i', [0, 2]))
+        self.assertEqual(self.solver.nb_vars(), 0)
+
+    def test_add_clauses_matrix(self):
+        flat = array('i', [1, -5, 4, 0, -1, 5, 3, 4, -3, -4, 0, 0])
+        matrix = memoryview(flat).cast('B').cast('i', shape=[3, 4])
+        self.solver.add_clauses(matrix)
+        res, solution = self.solver.solve()
+        self.assertEqual(res, True)
+        self.assertTrue(check_solution(clauses1, solution))
+        self.solver.add_clauses(memoryview(array('i', [-1, 1])).cast('B').cast('i', shape=[2, 1]))
+        self.assertEqual(self.solver.solve(), (False, None))
+
     def test_bad_iter(self):
         class Liar:
 
@@ -297,6 +394,1174 @@ class TestSolve(unittest.TestCase):
         self.assertEqual(res, True)
 
 
+class TestModelBuffer(unittest.TestCase):
+
+    def setUp(self):
+        self.solver = Solver()
+        self.solver.add_clauses(clauses1)
+
+    def test_solve_buffer(self):
+        res, solution = self.solver.solve(model_format="buffer")
+        self.assertEqual(res, True)
+        self.assertEqual(len(solution), 6)
+        values = memoryview(solution).tolist()
+        self.assertEqual(values[0], -1)
+        self.assertTrue(check_solution(clauses1, [None] + [bool(v) for v in values[1:]]))
+
+    def test_solve_packed(self):
+        res, solution = self.solver.solve(model_format="packed")
+        self.assertEqual(res, True)
+        bits = memoryview(solution).tolist()
+        self.assertEqual(len(bits), 1)
+        values = memoryview(self.solver.get_model_buffer()).tolist()
+        for var in range(1, 6):
+            self.assertEqual(bits[0] >> var & 1, values[var])
+
+    def test_solve_none(self):
+        self.assertEqual(self.solver.solve(model_format="none"), (True, None))
+        self.assertRaises(ValueError, self.solver.solve, model_format="list")
+
+    def test_out(self):
+        res, tuple_solution = self.solver.solve(model_format="none")
+        out = array('b', [0] * 6)
+        self.assertIs(self.solver.get_model_buffer(out=out), out)
+        self.assertEqual(out[0], -1)
+        self.assertTrue(check_solution(clauses1, [None] + [bool(v) for v in out[1:]]))
+        self.assertRaises(ValueError, self.solver.get_model_buffer, out=array('b', [0] * 5))
+        self.assertRaises(ValueError, self.solver.get_model_buffer, out=array('i', [0] * 6))
+
+    def test_no_model(self):
+        self.assertRaises(RuntimeError, self.solver.get_model_buffer)
+        self.solver.solve([3, 4])
+        self.assertRaises(RuntimeError, self.solver.get_model_buffer)
+
+    def test_vars(self):
+        res, projected = self.solver.solve(vars=[4, 1, 4])
+        values = memoryview(self.solver.get_model_buffer()).tolist()
+        self.assertEqual(projected, (bool(values[4]), bool(values[1]), bool(values[4])))
+        res, projected = self.solver.solve(model_format="buffer", vars=array('i', [5, 3]))
+        values = memoryview(self.solver.get_model_buffer()).tolist()
+        self.assertEqual(memoryview(projected).tolist(), [values[5], values[3]])
+        res, projected = self.solver.solve(model_format="packed", vars=array('q', range(1, 6)))
+        values = memoryview(self.solver.get_model_buffer()).tolist()
+        self.assertEqual(memoryview(projected).tolist(), [sum(values[v] << (v - 1) for v in range(1, 6))])
+
+        out = bytearray(2)
+        self.assertIs(self.solver.get_model_buffer(out=out, vars=[2, 4]), out)
+        self.assertEqual(list(out), [values[2], values[4]])
+        self.assertRaises(ValueError, self.solver.get_model_buffer, out=bytearray(1), vars=[2, 4])
+        self.assertEqual(len(self.solver.get_model_buffer(vars=[])), 0)
+
+    def test_vars_sampling(self):
+        self.assertRaises(RuntimeError, self.solver.solve, vars="sampling")
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        fname = os.path.join(tmpdir.name, "show.cnf")
+        with open(fname, "w") as f:
+            f.write("p cnf 5 1\nc p show 5 2 0\n1 2 0\n")
+        self.solver.load_dimacs(fname)
+        res, projected = self.solver.solve(vars="sampling")
+        values = memoryview(self.solver.get_model_buffer()).tolist()
+        self.assertEqual(projected, (bool(values[5]), bool(values[2])))
+
+    def test_vars_wrong_args(self):
+        for vars in ([0], [-1], [6], array('i', [6]), array('d', [1]), "all"):
+            self.assertRaises(ValueError, self.solver.solve, vars=vars)
+        self.assertRaises(TypeError, self.solver.solve, vars=1)
+        self.assertEqual(self.solver.solve([3, 4], vars=[1]), (False, None))
+
+
+class TestIterSolve(unittest.TestCase):
+
+    def setUp(self):
+        self.solver = Solver()
+
+    def test_all(self):
+        self.solver.add_clause([1, 2])
+        models = list(self.solver.itersolve())
+        self.assertEqual(len(models), 3)
+        self.assertEqual(len(set(models)), 3)
+        for model in models:
+            self.assertTrue(check_solution([[1, 2]], model))
+        self.assertEqual(self.solver.solve(), (False, None))
+
+    def test_projection(self):
+        self.solver.add_clauses(clauses1)
+        it = self.solver.itersolve(projection=[1, 2])
+        models = list(it)
+        self.assertEqual(it.num_models, 4)
+        self.assertTrue(it.finished)
+        self.assertEqual(set((m[1], m[2]) for m in models),
+                         set([(False, False), (False, True), (True, False), (True, True)]))
+
+    def test_limit_and_format(self):
+        self.solver.add_clause([1, 2, 3])
+        it = self.solver.itersolve(assumptions=[-3], limit=2, model_format="buffer")
+        models = [memoryview(m).tolist() for m in it]
+        self.assertEqual(len(models), 2)
+        self.assertFalse(it.finished)
+        for m in models:
+            self.assertEqual(m[3], 0)
+        self.assertEqual(len(list(self.solver.itersolve([-3]))), 1)
+
+    def test_wrong_args(self):
+        self.solver.add_clause([1, 2])
+        self.assertRaises(ValueError, self.solver.itersolve, limit=-1)
+        self.assertRaises(ValueError, self.solver.itersolve, projection=[-1])
+        self.assertRaises(ValueError, self.solver.itersolve, projection=[3])
+        self.assertRaises(ValueError, self.solver.itersolve, model_format="list")
+        self.assertRaises(ValueError, self.solver.itersolve, time_limit=-1)
+
+    def test_confl_limit(self):
+        solver = Solver()
+        solver.load_dimacs(_MODULE_DIR+"f400-r425-x000.cnf")
+        it = solver.itersolve(confl_limit=10, verbose=0)
+        self.assertEqual(list(it), [])
+        self.assertFalse(it.finished)
+        self.assertEqual(solver.solve(confl_limit=10), (None, None))
+
+
+class TestSolveMany(unittest.TestCase):
+
+    def setUp(self):
+        self.solver = Solver()
+        self.solver.add_clauses([[-1], [2], [3], [-4]])
+
+    def test_status(self):
+        status, models, conflicts = self.solver.solve_many([[2], [1], [], [-2, 4], [3, -4]])
+        self.assertEqual(memoryview(status).tolist(), [1, 0, 1, 0, 1])
+        self.assertEqual(models, None)
+        self.assertEqual(conflicts, None)
+
+    def test_csr_models_conflicts(self):
+        cubes = array('i', [2, 1, -2, 3])
+        indptr = array('i', [0, 1, 2, 4])
+        status, models, conflicts = self.solver.solve_many(
+            cubes, indptr=indptr, model_format="buffer", conflicts=True)
+        self.assertEqual(memoryview(status).tolist(), [1, 0, 0])
+        models = memoryview(models).tolist()
+        self.assertEqual(models[0], [-1, 0, 1, 1, 0])
+        self.assertEqual(models[1], [-1] * 5)
+        confl_lits, confl_indptr = [memoryview(x).tolist() for x in conflicts]
+        self.assertEqual(confl_indptr[:2], [0, 0])
+        self.assertEqual(confl_lits[confl_indptr[1]:confl_indptr[2]], [-1])
+        self.assertEqual(confl_lits[confl_indptr[2]:confl_indptr[3]], [2])
+
+    def test_packed(self):
+        status, models, _ = self.solver.solve_many([[], [1]], model_format="packed")
+        self.assertEqual(memoryview(models).tolist(), [[0b1100], [0]])
+
+    def test_wrong_args(self):
+        self.assertRaises(ValueError, self.solver.solve_many, [[5]])
+        self.assertRaises(ValueError, self.solver.solve_many, [[1]], model_format="tuple")
+        self.assertRaises(ValueError, self.solver.solve_many,
+                          array('i', [1, 0]), indptr=array('i', [0, 2]))
+        self.assertRaises(TypeError, self.solver.solve_many, [1])
+
+
+class TestLoadDimacs(unittest.TestCase):
+
+    def setUp(self):
+        self.solver = Solver()
+
+    def write_tmp(self, name, data, opener=open):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        fname = os.path.join(tmpdir.name, name)
+        with opener(fname, "wb") as f:
+            f.write(data.encode())
+        return fname
+
+    def test_load(self):
+        stats = self.solver.load_dimacs(_MODULE_DIR+"f400-r425-x000.cnf")
+        self.assertEqual(stats["num_vars"], 400)
+        self.assertEqual(stats["num_clauses"], stats["clauses_added"])
+        self.assertEqual(stats["xor_clauses_added"], 0)
+        self.assertGreaterEqual(stats["parse_time"], 0)
+        self.assertEqual(self.solver.nb_vars(), 400)
+
+    def test_xor(self):
+        fname = self.write_tmp("xor.cnf", "p cnf 3 2\nx1 2 3 0\n-1 0\n")
+        stats = self.solver.load_dimacs(fname)
+        self.assertEqual(stats["clauses_added"], 1)
+        self.assertEqual(stats["xor_clauses_added"], 1)
+        res, solution = self.solver.solve([-2])
+        self.assertEqual(res, True)
+        self.assertEqual(solution, (None, False, False, True))
+
+    def test_gzip(self):
+        fname = self.write_tmp("clauses.cnf.gz", "p cnf 2 2\n-1 0\n1 0\n", gzip.open)
+        self.solver.load_dimacs(fname)
+        self.assertEqual(self.solver.solve(), (False, None))
+
+    def test_errors(self):
+        self.assertRaises(OSError, self.solver.load_dimacs, _MODULE_DIR+"nonexistent.cnf")
+        fname = self.write_tmp("bad.cnf", "p cnf 1 1\n1 q 0\n")
+        self.assertRaises(ValueError, self.solver.load_dimacs, fname)
+        fname = self.write_tmp("huge.cnf", "p cnf 300000000 1\n1 0\n")
+        with self.assertRaisesRegex(ValueError, "too many variables"):
+            self.solver.load_dimacs(fname)
+
+    def test_malformed(self):
+        bad_files = [
+            "p cnf 2 1\nc p foo\n1 2 0\n",
+            "p cnf 2 1\nc p weight 0 0.5 0\n1 2 0\n",
+            "p cnf 2 1\nc p weight x\n1 2 0\n",
+            "p cnf 2 1\nb 1 2 0\n",
+        ]
+        for data in bad_files:
+            fname = self.write_tmp("bad.cnf", data)
+            with self.assertRaisesRegex(ValueError, "line 2"):
+                Solver().load_dimacs(fname)
+
+        fname = self.write_tmp("twice.cnf", "p cnf 2 1\np cnf 2 1\n1 2 0\n")
+        self.solver.load_dimacs(fname)
+        with self.assertRaisesRegex(ValueError, "line 2"):
+            Solver().load_dimacs(fname, strict_header=True)
+
+
+class TestPseudoBoolean(unittest.TestCase):
+
+    def count_models(self, solver, num_vars):
+        return len(list(solver.itersolve(projection=range(1, num_vars + 1))))
+
+    def brute_force(self, num_vars, constraints):
+        count = 0
+        for values in itertools.product([False, True], repeat=num_vars):
+            ok = True
+            for lits, coeffs, bound, comparator in constraints:
+                total = sum(c for l, c in zip(lits, coeffs) if values[abs(l) - 1] == (l > 0))
+                ok &= {"<=": total <= bound, ">=": total >= bound, "=": total == bound}[comparator]
+            count += ok
+        return count
+
+    def solver_with_vars(self):
+        solver = Solver()
+        solver.add_clause([1, 2])
+        return solver
+
+    def check_random(self, num_vars, make_coeffs):
+        for _ in range(40):
+            constraints = []
+            solver = Solver()
+            solver.add_clause([num_vars, -num_vars])
+            for _ in range(random.randint(1, 2)):
+                lits = [v * random.choice([-1, 1])
+                        for v in random.sample(range(1, num_vars + 1), random.randint(1, num_vars))]
+                coeffs = make_coeffs(len(lits))
+                total = sum(abs(c) for c in coeffs)
+                constraint = (lits, coeffs, random.randint(-total // 3, total), random.choice(["<=", ">=", "="]))
+                solver.add_pb(*constraint)
+                constraints.append(constraint)
+            self.assertEqual(self.count_models(solver, num_vars), self.brute_force(num_vars, constraints))
+
+    def test_cardinality(self):
+        random.seed(1)
+        # Small and large bounds use different encodings
+        self.check_random(5, lambda n: [1] * n)
+        self.check_random(11, lambda n: [1] * n)
+
+    def test_pb(self):
+        random.seed(2)
+        self.check_random(8, lambda n: [random.randint(-6, 9) for _ in range(n)])
+        self.check_random(8, lambda n: [random.randint(-10**6, 10**6) for _ in range(n)])
+
+    def test_atmost_atleast(self):
+        for k in range(-1, 6):
+            solver = Solver()
+            solver.add_atmost([1, -2, 3, 4], k)
+            self.assertEqual(self.count_models(solver, 4), self.brute_force(4, [([1, -2, 3, 4], [1] * 4, k, "<=")]))
+            solver = Solver()
+            solver.add_atleast([1, -2, 3, 4], k)
+            self.assertEqual(self.count_models(solver, 4), self.brute_force(4, [([1, -2, 3, 4], [1] * 4, k, ">=")]))
+
+    def test_bulk(self):
+        solver = Solver()
+        solver.add_pb_constraints(array('i', [1, 2, 3, 2, 3, 4]), array('q', [0, 3, 6]),
+                                  array('q', [4, 2]), coeffs=array('q', [3, 2, 1, 1, 1, 1]), comparator=">=")
+        expected = self.brute_force(4, [([1, 2, 3], [3, 2, 1], 4, ">="), ([2, 3, 4], [1, 1, 1], 2, ">=")])
+        self.assertEqual(self.count_models(solver, 4), expected)
+        solver = Solver()
+        solver.add_pb_constraints(array('i', [1, 2, 3]), array('q', [0, 3]), array('q', [1]), comparator="=")
+        self.assertEqual(self.count_models(solver, 3), 3)
+
+    def test_wrong_args(self):
+        self.assertRaises(ValueError, self.solver_with_vars().add_pb, [1, 2], [1], 1)
+        self.assertRaises(ValueError, self.solver_with_vars().add_pb, [1, 2], [1, 1], 1, "<")
+        self.assertRaises(ValueError, self.solver_with_vars().add_pb, [1, 2], [2**61, 2**61], 1)
+        self.assertRaises(TypeError, self.solver_with_vars().add_pb, [1, 2], [1, "1"], 1)
+        self.assertRaises(ValueError, self.solver_with_vars().add_atmost, [1, 0], 1)
+        self.assertRaises(ValueError, self.solver_with_vars().add_pb_constraints,
+                          array('i', [1, 2]), array('q', [0, 2]), array('q', [1, 1]))
+        self.assertRaises(ValueError, self.solver_with_vars().add_pb_constraints,
+                          array('i', [1, 2]), array('q', [0, 2]), array('q', [1]), coeffs=array('q', [1]))
+
+    def write_opb(self, data, opener=open):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        fname = os.path.join(tmpdir.name, "problem.opb")
+        with opener(fname, "wb") as f:
+            f.write(data.encode())
+        return fname
+
+    def test_load_opb(self):
+        fname = self.write_opb("* #variable= 4 #constraint= 3\n"
+                               "min: +1 x1 +2 x2 ;\n"
+                               "+1 x1 +2 ~x2 -1 x3 >= 1 ;\n"
+                               "+1 x1 +1 x2 +1 x3 +1 x4 = 2 ;\n"
+                               "+3 x1 +2 x4\n  <= 3 ;\n")
+        solver = Solver()
+        stats = solver.load_opb(fname)
+        self.assertEqual(stats["num_vars"], 4)
+        self.assertEqual(stats["num_constraints"], 3)
+        self.assertEqual(stats["constraints_added"], 3)
+        self.assertTrue(stats["objective"])
+        self.assertEqual(solver.nb_vars(), 4 + stats["aux_vars_added"])
+        self.assertGreater(stats["clauses_added"], 0)
+        expected = self.brute_force(4, [([1, -2, 3], [1, 2, -1], 1, ">="),
+                                        ([1, 2, 3, 4], [1] * 4, 2, "="),
+                                        ([1, 4], [3, 2], 3, "<=")])
+        self.assertEqual(self.count_models(solver, 4), expected)
+
+    def test_load_opb_gzip(self):
+        fname = self.write_opb("+1 x1 +1 x2 >= 2 ;\n+1 x1 +1 x2 <= 1 ;\n", gzip.open)
+        solver = Solver()
+        stats = solver.load_opb(fname)
+        self.assertEqual(stats["num_constraints"], 0)
+        self.assertEqual(stats["constraints_added"], 2)
+        self.assertFalse(stats["objective"])
+        self.assertEqual(solver.solve(), (False, None))
+
+    def test_load_opb_errors(self):
+        self.assertRaises(OSError, Solver().load_opb, _MODULE_DIR+"nonexistent.opb")
+        bad_files = [
+            "* #variable= 2 #constraint= 1\n+1 x1 x2 >= 1 ;\n",
+            "* #variable= 2 #constraint= 1\n+1 x1 +1 x3 >= 1 ;\n",
+            "* #variable= 2 #constraint= 1\n+1 x1 +1 x2 > 1 ;\n",
+            "* #variable= 2 #constraint= 1\n+1 x1 +1 x2 >= 1 :\n",
+            "* #variable= 2 #constraint= 1\n+1 y1 >= 1 ;\n",
+        ]
+        for data in bad_files:
+            solver = Solver()
+            with self.assertRaisesRegex(ValueError, "line 2"):
+                solver.load_opb(self.write_opb(data))
+            self.assertEqual(solver.nb_vars(), 0)
+        for num_vars in (2**28, 5000000000):
+            solver = Solver()
+            with self.assertRaises(ValueError):
+                solver.load_opb(self.write_opb("* #variable= %d #constraint= 1\n+1 x1 >= 1 ;\n" % num_vars))
+            self.assertEqual(solver.nb_vars(), 0)
+
+
+class TestInterrupt(unittest.TestCase):
+
+    def run_interrupted(self, solver, func, delay=0.2):
+        # A single interrupt() must be enough, whenever it comes
+        results = []
+        thread = threading.Thread(target=lambda: results.append(func()))
+        t0 = time.time()
+        thread.start()
+        time.sleep(delay)
+        solver.interrupt()
+        thread.join(30)
+        self.assertFalse(thread.is_alive())
+        return results[0], time.time() - t0
+
+    def test_interrupt_solve(self):
+        for threads in (1, 2):
+            solver = Solver(threads=threads, time_limit=20)
+            solver.load_dimacs(_MODULE_DIR+"f400-r425-x000.cnf")
+            res, took_time = self.run_interrupted(solver, solver.solve)
+            self.assertEqual(res, (None, None))
+            self.assertLess(took_time, 10)
+
+    def test_interrupt_solve_many(self):
+        solver = Solver(time_limit=20)
+        solver.load_dimacs(_MODULE_DIR+"f400-r425-x000.cnf")
+        res, took_time = self.run_interrupted(
+            solver, lambda: solver.solve_many([[1], [2], [3]], conflicts=True))
+        status, _, (lits, indptr) = res
+        self.assertEqual(memoryview(status).tolist(), [-1, -1, -1])
+        self.assertEqual(memoryview(indptr).tolist(), [0, 0, 0, 0])
+        self.assertLess(took_time, 10)
+
+    def test_interrupt_backbone(self):
+        solver = Solver(time_limit=20)
+        solver.load_dimacs(_MODULE_DIR+"f400-r425-x000.cnf")
+        (lits, finished), took_time = self.run_interrupted(solver, solver.backbone)
+        self.assertFalse(finished)
+        self.assertLess(took_time, 10)
+
+    def test_interrupt_cube_and_conquer(self):
+        solver = Solver(time_limit=20)
+        solver.load_dimacs(_MODULE_DIR+"f400-r425-x000.cnf")
+        res, took_time = self.run_interrupted(solver, lambda: solver.cube_and_conquer(workers=2))
+        self.assertEqual(res[:2], (None, None))
+        self.assertLess(took_time, 10)
+        # Also while the cubes are made
+        res, took_time = self.run_interrupted(solver, lambda: solver.cube_and_conquer(depth=20, workers=2))
+        self.assertEqual(res[:2], (None, None))
+        self.assertEqual(res[2]["open"], res[2]["cubes"])
+        self.assertLess(took_time, 10)
+
+    def test_interrupt_early(self):
+        for delay in (0.01, 0.05):
+            solver = Solver(time_limit=20)
+            solver.load_dimacs(_MODULE_DIR+"f400-r425-x000.cnf")
+            res, took_time = self.run_interrupted(solver, solver.solve, delay)
+            self.assertEqual(res, (None, None))
+            self.assertLess(took_time, 10)
+
+    def test_not_sticky(self):
+        solver = Solver()
+        solver.add_clause([1])
+        solver.interrupt()
+        self.assertEqual(solver.solve(), (True, (None, True)))
+        self.assertEqual(solver.is_satisfiable(), True)
+
+
+class TestSolveAsync(unittest.TestCase):
+
+    def run_async(self, coro, timeout=60):
+        return asyncio.run(asyncio.wait_for(coro, timeout))
+
+    def test_solve(self):
+        async def run():
+            solvers = [Solver() for _ in range(10)]
+            for solver in solvers:
+                solver.add_clauses(clauses1)
+            return await asyncio.gather(*[s.solve_async() for s in solvers])
+
+        for res, solution in self.run_async(run()):
+            self.assertEqual(res, True)
+            self.assertTrue(check_solution(clauses1, solution))
+
+    def test_args(self):
+        async def run():
+            solver = Solver()
+            solver.add_clauses(clauses1)
+            unsat = await solver.solve_async([3, 4])
+            sat = await solver.solve_async(assumptions=[-3], model_format="buffer")
+            return unsat, sat
+
+        unsat, sat = self.run_async(run())
+        self.assertEqual(unsat, (False, None))
+        self.assertEqual(memoryview(sat[1]).tolist()[3], 0)
+
+    def test_executor(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        async def run(executor):
+            solver = Solver()
+            solver.add_clauses(clauses2)
+            return await solver.solve_async(executor=executor)
+
+        with ThreadPoolExecutor(1) as executor:
+            self.assertEqual(self.run_async(run(executor)), (False, None))
+
+    def test_wrong_args(self):
+        solver = Solver()
+        self.assertRaises(RuntimeError, solver.solve_async)
+
+        async def run():
+            solver.solve_async(time_limit=-1)
+        self.assertRaises(ValueError, self.run_async, run())
+
+        async def run_twice():
+            solver.add_clauses(clauses1)
+            fut = solver.solve_async()
+            self.assertRaises(RuntimeError, solver.solve_async)
+            return await fut
+        self.assertEqual(self.run_async(run_twice())[0], True)
+
+    def test_cancel(self):
+        async def run():
+            solver = Solver(time_limit=20)
+            solver.load_dimacs(_MODULE_DIR+"f400-r425-x000.cnf")
+            task = asyncio.ensure_future(solver.solve_async())
+            await asyncio.sleep(0.2)
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            self.assertTrue(task.cancelled())
+
+            t0 = time.time()
+            while True:
+                try:
+                    return await solver.solve_async(confl_limit=1), time.time() - t0
+                except RuntimeError:
+                    await asyncio.sleep(0.05)
+
+        res, took_time = self.run_async(run())
+        self.assertEqual(res, (None, None))
+        self.assertLess(took_time, 10)
+
+
+class TestLastStats(unittest.TestCase):
+
+    def test_stats(self):
+        solver = Solver()
+        self.assertIsNone(solver.last_stats())
+        solver.load_dimacs(_MODULE_DIR+"f400-r425-x000.cnf")
+        solver.solve(confl_limit=100)
+        stats = solver.last_stats()
+        self.assertEqual(stats["call"], "solve")
+        self.assertGreaterEqual(stats["conflicts"], 100)
+        self.assertGreater(stats["propagations"], 0)
+        self.assertGreater(stats["decisions"], 0)
+        self.assertGreaterEqual(stats["wall_time"], 0)
+        self.assertGreaterEqual(stats["cpu_time"], stats["search_time"])
+        self.assertGreaterEqual(stats["simplify_time"], 0)
+        if stats["peak_memory"] is not None:
+            self.assertGreater(stats["peak_memory"], 0)
+
+        solver.solve_many([[1], [2]], confl_limit=10)
+        self.assertEqual(solver.last_stats()["call"], "solve_many")
+        self.assertGreaterEqual(solver.last_stats()["conflicts"], 20)
+
+
+class TestSimplify(unittest.TestCase):
+
+    def test_simplify(self):
+        solver = Solver()
+        solver.load_dimacs(_MODULE_DIR+"f400-r425-x000.cnf")
+        self.assertIsNone(solver.simplify([1, -2], time_limit=5))
+        self.assertEqual(solver.last_stats()["call"], "simplify")
+        self.assertIsNone(solver.simplify(strategy="occ-bve, distill-cls,scc-vrepl"))
+        self.assertIsNone(solver.solve([1, -2], confl_limit=10)[0])
+
+    def test_unsat(self):
+        solver = Solver()
+        solver.add_clauses(clauses3 + [[1, 2]])
+        self.assertEqual(solver.simplify(strategy="full-probe"), False)
+        self.assertEqual(solver.solve(), (False, None))
+
+    def test_wrong_args(self):
+        solver = Solver()
+        solver.add_clause([1, 2])
+        self.assertRaises(ValueError, solver.simplify, strategy="occ-bve, card-find")
+        self.assertRaises(ValueError, solver.simplify, strategy="nonsense")
+        self.assertRaises(ValueError, solver.simplify, [3])
+        self.assertRaises(ValueError, solver.simplify, time_limit=-1)
+
+
+class TestConfig(unittest.TestCase):
+
+    def test_options(self):
+        solver = Solver(seed=5, polarity="rnd", bve=False, scc=True, sls=False,
+                        timeout_multiplier=0.5, otf_gauss=True, simplify_at_startup=False)
+        solver.add_clauses(clauses1)
+        res, solution = solver.solve()
+        self.assertEqual(res, True)
+        self.assertTrue(check_solution(clauses1, solution))
+
+    def test_presets(self):
+        for preset in ("incremental-fast-startup", "single-shot-max-throughput", "xor-heavy"):
+            solver = Solver(preset=preset)
+            solver.add_clauses(clauses1)
+            self.assertEqual(solver.solve()[0], True)
+
+    def test_single_run(self):
+        solver = Solver(preset="single-shot-max-throughput")
+        solver.add_clause([1])
+        self.assertEqual(solver.solve(), (True, (None, True)))
+        self.assertRaises(RuntimeError, solver.solve)
+        self.assertRaises(RuntimeError, solver.is_satisfiable)
+        solver = Solver(single_run=True)
+        solver.add_clause([1, 2])
+        self.assertRaises(RuntimeError, solver.solve_many, [[1], [-1]])
+
+        solver = Solver(preset="single-shot-max-throughput", single_run=False)
+        solver.add_clause([1])
+        solver.solve()
+        self.assertEqual(solver.solve(), (True, (None, True)))
+
+    def test_wrong_options(self):
+        self.assertRaises(TypeError, Solver, bve=1)
+        self.assertRaises(TypeError, Solver, seed="1")
+        self.assertRaises(ValueError, Solver, seed=-1)
+        self.assertRaises(ValueError, Solver, polarity="up")
+        self.assertRaises(ValueError, Solver, timeout_multiplier=0)
+        self.assertRaises(ValueError, Solver, preset="fast")
+        self.assertRaises(TypeError, Solver, no_such_option=True)
+
+
+class TestPortfolio(unittest.TestCase):
+
+    def setUp(self):
+        self.portfolio = Portfolio([{"seed": 1}, {"seed": 2, "polarity": "rnd"},
+                                    {"sls": False, "bve": False}])
+
+    def test_solve(self):
+        self.portfolio.add_clauses(clauses1)
+        self.assertIsNone(self.portfolio.winner)
+        res, solution = self.portfolio.solve()
+        self.assertEqual(res, True)
+        self.assertTrue(check_solution(clauses1, solution))
+        self.assertIn(self.portfolio.winner, (0, 1, 2))
+        self.assertEqual(self.portfolio.last_stats()["call"], "solve")
+
+        res, solution = self.portfolio.solve([-1, -2, -3], model_format="buffer")
+        self.assertEqual(res, True)
+        self.assertEqual(memoryview(solution).tolist()[1:4], [0, 0, 0])
+
+        self.portfolio.add_clause([1])
+        self.assertEqual(self.portfolio.solve([-1]), (False, None))
+        self.portfolio.add_clause([-1])
+        self.assertEqual(self.portfolio.solve(), (False, None))
+
+    def test_xor(self):
+        self.portfolio.add_xor_clause([1, 2, 3], False)
+        self.portfolio.add_clauses([[1], [2]])
+        self.assertEqual(self.portfolio.solve(), (True, (None, True, True, False)))
+
+    def test_interrupt(self):
+        portfolio = Portfolio(configs=[{"seed": 1}, {"seed": 2}], time_limit=20)
+        portfolio.load_dimacs(_MODULE_DIR+"f400-r425-x000.cnf")
+        results = []
+        thread = threading.Thread(target=lambda: results.append(portfolio.solve()))
+        t0 = time.time()
+        thread.start()
+        time.sleep(0.2)
+        portfolio.interrupt()
+        thread.join(30)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(results, [(None, None)])
+        self.assertIsNone(portfolio.winner)
+        self.assertLess(time.time() - t0, 10)
+
+    def test_wrong_configs(self):
+        self.assertRaises(TypeError, Portfolio)
+        self.assertRaises(ValueError, Portfolio, [])
+        self.assertRaises(TypeError, Portfolio, [1])
+        self.assertRaises(TypeError, Portfolio, [{}], configs=[{}])
+        self.assertRaises(ValueError, Portfolio, [{"seed": -1}])
+        self.assertRaises(TypeError, Portfolio, [{"no_such_option": True}])
+
+
+class TestClone(unittest.TestCase):
+
+    def setUp(self):
+        self.solver = Solver(seed=2)
+        self.solver.add_clauses(clauses1)
+        self.solver.add_xor_clause([4, 5, 6], True)
+
+    def test_clone(self):
+        for simplified in (True, False):
+            clone = self.solver.clone(simplified=simplified)
+            self.assertIs(type(clone), Solver)
+            self.assertEqual(clone.nb_vars(), self.solver.nb_vars())
+            res, solution = clone.solve()
+            self.assertEqual(res, True)
+            self.assertTrue(check_solution(clauses1, solution))
+            self.assertEqual(solution[4] ^ solution[5] ^ solution[6], True)
+
+    def test_independent(self):
+        clone = self.solver.clone()
+        clone.add_clause([-1])
+        clone.add_clause([1])
+        self.assertEqual(clone.solve(), (False, None))
+        self.assertEqual(self.solver.solve()[0], True)
+
+    def test_after_simplify(self):
+        # The variables of the clone are those of the original solver, also
+        # once simplification renumbered them internally
+        random.seed(2)
+        keep = list(range(1, 11))
+        for _ in range(10):
+            clauses = [[random.choice([-1, 1]) * random.randint(1, 60) for _ in range(3)]
+                       for _ in range(random.randint(150, 260))]
+            solver = Solver()
+            solver.add_clauses(clauses)
+            solver.simplify(assumptions=keep)
+            clones = [solver.clone(), solver.clone(simplified=False)]
+            reference = Solver()
+            reference.add_clauses(clauses)
+            for _ in range(5):
+                assumptions = [random.choice([-1, 1]) * v for v in random.sample(keep, 4)]
+                expected = reference.solve(assumptions)[0]
+                for clone in clones:
+                    self.assertEqual(clone.solve(assumptions)[0], expected)
+            for clone in clones + [clones[0].clone()]:
+                res, solution = clone.solve()
+                if res:
+                    self.assertTrue(check_solution(clauses, solution))
+
+    def test_reconstruction(self):
+        # 1 is eliminated, its value comes from extending the model
+        solver = Solver()
+        solver.add_clauses([[1, 2], [-1, 3], [2, 3, 4]])
+        solver.simplify(assumptions=[2, 3])
+        for clone in (solver.clone(), Solver.loads(solver.dumps(simplified=True))):
+            for assumptions in ([-2], [-3]):
+                res, solution = clone.solve(assumptions)
+                self.assertEqual(res, True)
+                self.assertTrue(check_solution([[1, 2], [-1, 3], [2, 3, 4]], solution))
+                self.assertEqual(memoryview(clone.get_model_buffer()).tolist()[1],
+                                 int(solution[1]))
+
+            # The other ways to read a model extend it too
+            _, models, _ = clone.solve_many([[-2], [-3]], model_format="buffer")
+            self.assertEqual([row[1] for row in memoryview(models).tolist()], [1, 0])
+            sat, solution, _ = clone.cube_and_conquer(depth=1, workers=1)
+            self.assertEqual(sat, True)
+            self.assertTrue(check_solution([[1, 2], [-1, 3], [2, 3, 4]], solution))
+
+    def test_config(self):
+        solver = Solver(single_run=True)
+        solver.add_clause([1])
+        clone = solver.clone()
+        self.assertEqual(clone.solve(), (True, (None, True)))
+        self.assertRaises(RuntimeError, clone.solve)
+
+
+class TestSerialize(unittest.TestCase):
+
+    def setUp(self):
+        self.solver = Solver(seed=4, polarity="rnd", time_limit=10)
+        self.solver.add_clauses(clauses1)
+        self.solver.add_xor_clause([4, 5, 6], True)
+
+    def check(self, solver):
+        self.assertEqual(solver.nb_vars(), 6)
+        res, solution = solver.solve()
+        self.assertEqual(res, True)
+        self.assertTrue(check_solution(clauses1, solution))
+        self.assertEqual(solution[4] ^ solution[5] ^ solution[6], True)
+
+    def test_dumps(self):
+        data = self.solver.dumps()
+        self.assertIsInstance(data, bytes)
+        self.check(Solver.loads(data))
+        self.check(Solver.loads(bytearray(data)))
+        self.check(Solver.loads(self.solver.dumps(simplified=True)))
+
+    def test_config(self):
+        solver = Solver.loads(Solver(single_run=True).dumps())
+        solver.solve()
+        self.assertRaises(RuntimeError, solver.solve)
+
+    def test_pickle(self):
+        self.check(pickle.loads(pickle.dumps(self.solver)))
+        self.assertRaises(TypeError, pickle.dumps, Portfolio([{}]))
+
+    def test_unsat(self):
+        self.solver.add_clauses([[1], [-1]])
+        self.assertEqual(Solver.loads(self.solver.dumps()).solve(), (False, None))
+
+    def test_invalid(self):
+        data = self.solver.dumps()
+        for invalid in (b"", b"CMSD", data[:-1], data + b"\0", data.replace(b"polarity", b"polarizy")):
+            self.assertRaises(ValueError, Solver.loads, invalid)
+        # Too many variables, right after the header of a solver without options
+        data = Solver().dumps()
+        self.assertRaises(ValueError, Solver.loads, data[:40] + (1 << 30).to_bytes(4, sys.byteorder) + data[44:])
+        self.assertRaises(TypeError, Solver.loads, "abc")
+
+
+class TestLoadSimplified(unittest.TestCase):
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.cache_dir = tmpdir.name
+        random.seed(6)
+        self.fname = os.path.join(self.cache_dir, "problem.cnf")
+        self.write_random(40, 120)
+
+    def write_random(self, num_vars, num_clauses):
+        self.clauses = [[random.choice([-1, 1]) * random.randint(1, num_vars) for _ in range(3)]
+                        for _ in range(num_clauses)]
+        with open(self.fname, "w") as f:
+            f.write("p cnf %d %d\n" % (num_vars, len(self.clauses)))
+            for clause in self.clauses:
+                f.write(" ".join(str(l) for l in clause) + " 0\n")
+
+    def load(self, options={}, **kwargs):
+        solver = Solver(**options)
+        stats = solver.load_simplified(self.fname, self.cache_dir, **kwargs)
+        return solver, stats
+
+    def test_cache(self):
+        solver, stats = self.load(assumptions=[1, 2])
+        self.assertEqual(stats["cache_hit"], False)
+        self.assertGreaterEqual(stats["load_time"], 0)
+        self.assertTrue(os.path.exists(os.path.join(self.cache_dir, stats["key"] + ".cms")))
+        reference = Solver()
+        reference.add_clauses(self.clauses)
+        for _ in range(2):
+            solver, cached_stats = self.load(assumptions=[-1, 2])
+            self.assertEqual(cached_stats["cache_hit"], True)
+            self.assertEqual(cached_stats["key"], stats["key"])
+            for assumptions in ([], [1, 2], [-1, 2], [-2]):
+                res, solution = solver.solve(assumptions)
+                self.assertEqual(res, reference.solve(assumptions)[0])
+                if res:
+                    self.assertTrue(check_solution(self.clauses, solution))
+                    for lit in assumptions:
+                        self.assertEqual(solution[abs(lit)], lit > 0)
+            pickled = pickle.loads(pickle.dumps(solver))
+            self.assertEqual(pickled.solve(), solver.solve())
+
+    def test_key(self):
+        keys = set()
+        for kwargs in ({}, {"assumptions": [3]}, {"strategy": "occ-bve"}, {"confl_limit": 1000}):
+            keys.add(self.load(**kwargs)[1]["key"])
+        self.assertEqual(len(keys), 4)
+        stats = self.load(options={"simplify": False, "bve": False})[1]
+        self.assertEqual(stats["cache_hit"], False)
+        self.assertEqual(self.load(options={"bve": False, "simplify": False})[1]["key"], stats["key"])
+        with open(self.fname, "a") as f:
+            f.write("1 2 0\n")
+        self.assertEqual(self.load()[1]["cache_hit"], False)
+
+    def test_invalid_cache(self):
+        stats = self.load()[1]
+        with open(os.path.join(self.cache_dir, stats["key"] + ".cms"), "wb") as f:
+            f.write(b"CMSD")
+        solver, stats = self.load()
+        self.assertEqual(stats["cache_hit"], False)
+        self.assertEqual(self.load()[1]["cache_hit"], True)
+        # Too many variables, right after the header of a solver without options
+        cache_fname = os.path.join(self.cache_dir, stats["key"] + ".cms")
+        with open(cache_fname, "rb") as f:
+            data = f.read()
+        with open(cache_fname, "wb") as f:
+            f.write(data[:40] + (1 << 30).to_bytes(4, sys.byteorder) + data[44:])
+        self.assertEqual(self.load()[1]["cache_hit"], False)
+        self.assertEqual(self.load()[1]["cache_hit"], True)
+
+    def test_itersolve(self):
+        # Sparse enough for variables to be eliminated
+        self.write_random(80, 160)
+        projection = range(1, 9)
+        reference = Solver()
+        reference.add_clauses(self.clauses)
+        def project(models):
+            return set(tuple(solution[var] for var in projection) for solution in models)
+        projected = project(reference.itersolve(projection=projection))
+        for cache_hit in (False, True):
+            solver, stats = self.load()
+            self.assertEqual(stats["cache_hit"], cache_hit)
+            clone = solver.clone()
+            models = list(solver.itersolve(limit=50))
+            self.assertEqual(len(set(models)), 50)
+            for solution in models:
+                self.assertTrue(check_solution(self.clauses, solution))
+            self.assertEqual(project(clone.itersolve(projection=projection)), projected)
+
+    def test_errors(self):
+        solver = Solver()
+        solver.add_clause([1])
+        self.assertRaises(RuntimeError, solver.load_simplified, self.fname, self.cache_dir)
+        self.assertRaises(OSError, Solver().load_simplified, self.fname + ".missing", self.cache_dir)
+        self.assertRaises(OSError, Solver().load_simplified, self.fname, self.fname + ".missing")
+        self.assertRaises(ValueError, Solver().load_simplified, self.fname, self.cache_dir, assumptions=[41])
+        self.assertRaises(ValueError, Solver().load_simplified, self.fname, self.cache_dir, strategy="nope")
+
+
+class TestIterConstraints(unittest.TestCase):
+
+    def setUp(self):
+        self.solver = Solver(confl_limit=2000)
+        self.solver.load_dimacs(_MODULE_DIR+"f400-r425-x000.cnf")
+
+    def test_learnt(self):
+        self.solver.solve()
+        it = self.solver.iter_constraints(max_len=10, max_glue=4, chunk=50)
+        self.assertGreater(it.num_clauses, 50)
+        num_clauses = 0
+        sibling = Solver(confl_limit=2000)
+        sibling.load_dimacs(_MODULE_DIR+"f400-r425-x000.cnf")
+        for lits_buf, indptr_buf in it:
+            lits = memoryview(lits_buf)
+            indptr = memoryview(indptr_buf)
+            self.assertEqual(lits.format, "i")
+            self.assertEqual(indptr.format, "q")
+            self.assertLessEqual(len(indptr) - 1, 50)
+            self.assertEqual(indptr[0], 0)
+            self.assertEqual(indptr[-1], len(lits))
+            for i in range(len(indptr) - 1):
+                self.assertLessEqual(indptr[i+1] - indptr[i], 10)
+            num_clauses += len(indptr) - 1
+            sibling.add_clauses(lits_buf, indptr=indptr_buf)
+        self.assertEqual(num_clauses, it.num_clauses)
+        # The learnt clauses are implied, so the formula stays satisfiable
+        self.assertNotEqual(sibling.solve()[0], False)
+
+    def test_irredundant(self):
+        solver = Solver()
+        solver.add_clauses(clauses1)
+        chunks = list(solver.iter_constraints(red=False))
+        self.assertEqual(len(chunks), 1)
+        lits, indptr = (memoryview(buf).tolist() for buf in chunks[0])
+        clauses = [sorted(lits[indptr[i]:indptr[i+1]]) for i in range(len(indptr) - 1)]
+        self.assertEqual(sorted(clauses), sorted(sorted(c) for c in clauses1))
+
+    def test_snapshot(self):
+        solver = Solver()
+        solver.add_clause([1, 2])
+        it = solver.iter_constraints(red=False)
+        solver.add_clause([2, 3])
+        self.assertEqual(it.num_clauses, 1)
+        self.assertEqual(len(list(it)), 1)
+        self.assertEqual(list(it), [])
+
+    def test_errors(self):
+        self.assertRaises(ValueError, self.solver.iter_constraints, chunk=0)
+        self.assertRaises(ValueError, self.solver.iter_constraints, max_len=-1)
+        self.assertRaises(TypeError, self.solver.iter_constraints, max_glue="3")
+
+
+class TestStructure(unittest.TestCase):
+
+    def test_fixed_and_equivalent(self):
+        solver = Solver()
+        solver.add_clauses([[1], [-2, 3], [2, -3], [3, 4, 5], [-3, -4, 5], [2, -5, 6]])
+        self.assertEqual(memoryview(solver.get_zero_assigned_lits()).tolist(), [1])
+        solver.simplify()
+        pairs = memoryview(solver.get_all_binary_xors()).tolist()
+        self.assertEqual([sorted(pair, key=abs) for pair in pairs], [[2, 3]])
+
+    def test_xors(self):
+        solver = Solver()
+        solver.add_xor_clause([1, 2, 3], True)
+        solver.add_xor_clause([3, 4, 5, 6], False)
+        xors_buf, indptr_buf, rhs_buf = solver.get_recovered_xors()
+        xors, indptr, rhs = (memoryview(buf).tolist() for buf in (xors_buf, indptr_buf, rhs_buf))
+        found = sorted((sorted(xors[indptr[i]:indptr[i+1]]), rhs[i]) for i in range(len(rhs)))
+        self.assertEqual(found, [([1, 2, 3], True), ([3, 4, 5, 6], False)])
+
+        copy = Solver()
+        copy.add_xor_clauses(xors_buf, rhs_buf, indptr=indptr_buf)
+        self.assertEqual(copy.solve([1, 2, -3])[0], False)
+        self.assertEqual(copy.solve([1, 2, 3])[0], True)
+
+    def test_or_gates(self):
+        solver = Solver()
+        solver.add_clauses([[7, -8], [7, -9], [-7, 8, 9]])
+        inputs, indptr, outputs = (memoryview(buf).tolist() for buf in solver.get_recovered_or_gates(effort=2))
+        self.assertEqual(outputs, [7])
+        self.assertEqual(sorted(inputs[indptr[0]:indptr[1]]), [8, 9])
+
+    def test_ite_gates(self):
+        solver = Solver()
+        solver.add_clauses([[-1, 2, -4], [-1, 3, 4], [1, -2, -4], [1, -3, 4]])
+        gates = solver.get_recovered_ite_gates()
+        self.assertEqual(memoryview(gates).shape, (2, 4))
+        clauses = set(frozenset(c) for c in [[-1, 2, -4], [-1, 3, 4], [1, -2, -4], [1, -3, 4]])
+        for a, s, b, out in memoryview(gates).tolist():
+            self.assertIn(frozenset([out, a, s]), clauses)
+            self.assertIn(frozenset([out, b, -s]), clauses)
+
+    def test_errors(self):
+        self.assertRaises(ValueError, Solver().get_recovered_xors, effort=0)
+        self.assertRaises(TypeError, Solver().get_recovered_or_gates, effort="1")
+
+
+class TestBackbone(unittest.TestCase):
+
+    def brute_force_backbone(self, clauses, num_vars):
+        models = [m for m in itertools.product([False, True], repeat=num_vars)
+                  if all(any(m[abs(l)-1] == (l > 0) for l in cl) for cl in clauses)]
+        return sorted((v if models[0][v-1] else -v) for v in range(1, num_vars+1)
+                      if len(set(m[v-1] for m in models)) == 1)
+
+    def test_backbone(self):
+        clauses = [[1, 2], [-2, 3], [-1, 3], [3, 4, 5], [-4, -5], [5, 6], [-6, 7], [-5, 7]]
+        solver = Solver()
+        solver.add_clauses(clauses)
+        lits, finished = solver.backbone()
+        self.assertTrue(finished)
+        self.assertEqual(sorted(memoryview(lits).tolist()), self.brute_force_backbone(clauses, 7))
+        self.assertEqual(solver.last_stats()["call"], "backbone")
+        progress = solver.backbone_progress()
+        self.assertEqual(progress["candidates"], progress["found"] + progress["rejected"])
+        self.assertEqual(progress["found"], 2)
+
+    def test_random(self):
+        random.seed(5)
+        for _ in range(20):
+            clauses = [[random.choice([-1, 1]) * random.randint(1, 8) for _ in range(3)]
+                       for _ in range(random.randint(10, 30))]
+            solver = Solver()
+            solver.add_clauses(clauses)
+            lits, finished = solver.backbone()
+            if lits is None:
+                self.assertEqual(solver.solve()[0], False)
+                continue
+            self.assertTrue(finished)
+            expected = self.brute_force_backbone(clauses, solver.nb_vars())
+            self.assertEqual(sorted(memoryview(lits).tolist()), expected)
+
+    def test_vars(self):
+        solver = Solver()
+        solver.add_clauses([[1], [-1, 2], [3, 4]])
+        lits, finished = solver.backbone(vars=[2, 3, 2])
+        self.assertTrue(finished)
+        self.assertEqual(memoryview(lits).tolist(), [2])
+        lits, _ = solver.backbone(vars=_array("i", [4]))
+        self.assertEqual(memoryview(lits).tolist(), [])
+
+    def test_unsat(self):
+        solver = Solver()
+        solver.add_clauses([[1], [-1]])
+        self.assertEqual(solver.backbone(), (None, True))
+
+    def test_limits(self):
+        solver = Solver()
+        solver.load_dimacs(_MODULE_DIR+"f400-r425-x000.cnf")
+        lits, finished = solver.backbone(confl_limit=10)
+        self.assertFalse(finished)
+        self.assertEqual(len(memoryview(lits)), 0)
+        self.assertEqual(solver.backbone_progress()["solves"], 1)
+
+    def test_errors(self):
+        solver = Solver()
+        solver.add_clause([1, 2])
+        self.assertRaises(ValueError, solver.backbone, vars=[3])
+        self.assertRaises(ValueError, solver.backbone, time_limit=-1)
+        self.assertRaises(RuntimeError, Solver(single_run=True).backbone)
+
+
+class TestSampleSls(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(3)
+        self.clauses = [[random.choice([-1, 1]) * random.randint(1, 120) for _ in range(3)]
+                        for _ in range(300)]
+        self.solver = Solver()
+        self.solver.add_clauses(self.clauses)
+
+    def check_samples(self, samples, max_rows):
+        view = memoryview(samples)
+        self.assertEqual(view.format, "B")
+        self.assertLessEqual(view.shape[0], max_rows)
+        self.assertGreater(view.shape[0], 0)
+        self.assertEqual(view.shape[1], self.solver.nb_vars())
+        for row in view.tolist():
+            for clause in self.clauses:
+                self.assertTrue(any((row[abs(lit)-1] == 1) == (lit > 0) for lit in clause))
+        return view.tolist()
+
+    def test_sample(self):
+        rows = self.check_samples(self.solver.sample_sls(10), 10)
+        self.assertGreater(len(set(map(tuple, rows))), 1)
+        self.assertEqual(self.solver.last_stats()["call"], "sample_sls")
+
+    def test_oracle(self):
+        self.check_samples(self.solver.sample_sls(10, mems=10**6, oracle=True), 10)
+
+    def test_simplified(self):
+        self.solver.simplify()
+        self.check_samples(self.solver.sample_sls(5), 5)
+
+    def test_errors(self):
+        self.assertRaises(ValueError, self.solver.sample_sls, -1)
+        self.assertRaises(ValueError, self.solver.sample_sls, 1, mems=0)
+        self.assertRaises(TypeError, self.solver.sample_sls, "1")
+
+
+class TestHeuristicState(unittest.TestCase):
+
+    def test_incidence(self):
+        solver = Solver()
+        solver.add_clauses([[1, 2], [-1, 3], [1, -2, 4]])
+        inc = memoryview(solver.get_var_incidence())
+        self.assertEqual(inc.format, "I")
+        self.assertEqual(inc.tolist(), [3, 2, 1, 1])
+        lit_inc = memoryview(solver.get_lit_incidence())
+        self.assertEqual(lit_inc.shape, (4, 2))
+        self.assertEqual(lit_inc.tolist(), [[2, 1], [1, 1], [1, 0], [1, 0]])
+
+    def test_incidence_red(self):
+        solver = Solver(confl_limit=2000)
+        solver.load_dimacs(_MODULE_DIR+"f400-r425-x000.cnf")
+        solver.solve()
+        irred = memoryview(solver.get_var_incidence()).tolist()
+        red = memoryview(solver.get_var_incidence(red=True)).tolist()
+        self.assertEqual(len(red), solver.nb_vars())
+        self.assertGreater(sum(red), sum(irred))
+
+    def test_vsids_scores(self):
+        solver = Solver(confl_limit=2000)
+        solver.load_dimacs(_MODULE_DIR+"f400-r425-x000.cnf")
+        self.assertEqual(memoryview(Solver().get_vsids_scores()).tolist(), [])
+        solver.solve()
+        scores = memoryview(solver.get_vsids_scores())
+        self.assertEqual(scores.format, "d")
+        self.assertEqual(len(scores), solver.nb_vars())
+        self.assertGreater(max(scores.tolist()), 0)
+
+    def test_unsat(self):
+        solver = Solver()
+        solver.add_clauses([[1], [-1]])
+        self.assertEqual(memoryview(solver.get_var_incidence()).tolist(), [0])
+        self.assertEqual(memoryview(solver.get_lit_incidence()).tolist(), [[0, 0]])
+
+
+class TestCubeAndConquer(unittest.TestCase):
+
+    def pigeonhole(self, pigeons, holes):
+        var = lambda p, h: p * holes + h + 1
+        clauses = [[var(p, h) for h in range(holes)] for p in range(pigeons)]
+        for h in range(holes):
+            for a, b in itertools.combinations(range(pigeons), 2):
+                clauses.append([-var(a, h), -var(b, h)])
+        solver = Solver()
+        solver.add_clauses(clauses)
+        return solver, clauses
+
+    def test_sat(self):
+        solver, clauses = self.pigeonhole(7, 7)
+        sat, solution, cubes = solver.cube_and_conquer(depth=3, workers=2)
+        self.assertEqual(sat, True)
+        for clause in clauses:
+            self.assertTrue(any(solution[abs(lit)] == (lit > 0) for lit in clause))
+        self.assertEqual(cubes["depth"], 3)
+        self.assertLessEqual(cubes["cubes"], 8)
+        self.assertLess(cubes["open"] + cubes["unsat"], cubes["cubes"])
+        self.assertEqual(solver.last_stats()["call"], "cube_and_conquer")
+
+    def test_unsat(self):
+        solver, _ = self.pigeonhole(6, 5)
+        sat, solution, cubes = solver.cube_and_conquer(n_cubes=5, workers=3)
+        self.assertEqual((sat, solution), (False, None))
+        self.assertEqual(cubes["depth"], 3)
+        self.assertEqual(cubes["unsat"], cubes["cubes"])
+        self.assertEqual(cubes["open"], 0)
+
+    def test_model_format(self):
+        solver, _ = self.pigeonhole(3, 3)
+        sat, solution, _ = solver.cube_and_conquer(workers=1, model_format="buffer", vars=[1, 2, 3])
+        self.assertEqual(sat, True)
+        self.assertEqual(len(memoryview(solution)), 3)
+
+    def test_limits(self):
+        solver, _ = self.pigeonhole(9, 8)
+        sat, solution, cubes = solver.cube_and_conquer(depth=2, workers=2, confl_limit=0)
+        self.assertEqual((sat, solution), (None, None))
+        self.assertEqual(cubes["unsat"] + cubes["open"], cubes["cubes"])
+        self.assertGreater(cubes["open"], 0)
+
+        solver = Solver()
+        solver.load_dimacs(_MODULE_DIR+"f400-r425-x000.cnf")
+        t0 = time.time()
+        sat, solution, cubes = solver.cube_and_conquer(depth=20, workers=2, time_limit=1)
+        self.assertEqual((sat, solution), (None, None))
+        self.assertEqual(cubes["open"], cubes["cubes"])
+        self.assertLess(time.time() - t0, 10)
+
+    def test_errors(self):
+        solver, _ = self.pigeonhole(3, 3)
+        self.assertRaises(ValueError, solver.cube_and_conquer, depth=2, n_cubes=4)
+        self.assertRaises(ValueError, solver.cube_and_conquer, depth=21)
+        self.assertRaises(ValueError, solver.cube_and_conquer, workers=0)
+        self.assertRaises(RuntimeError, Solver(single_run=True).cube_and_conquer)
+
+
 class TestSolveTimeLimit(unittest.TestCase):
 
     def get_clauses(self):
@@ -347,6 +1612,21 @@ def run():
     suite.addTest(unittest.makeSuite(InitTester))
     suite.addTest(unittest.makeSuite(TestSolve))
     suite.addTest(unittest.makeSuite(TestDump))
+    suite.addTest(unittest.makeSuite(TestModelBuffer))
+    suite.addTest(unittest.makeSuite(TestLoadDimacs))
+    suite.addTest(unittest.makeSuite(TestIterSolve))
+    suite.addTest(unittest.makeSuite(TestSolveMany))
+    suite.addTest(unittest.makeSuite(TestPseudoBoolean))
+    suite.addTest(unittest.makeSuite(TestInterrupt))
+    suite.addTest(unittest.makeSuite(TestSolveAsync))
+    suite.addTest(unittest.makeSuite(TestLastStats))
+    suite.addTest(unittest.makeSuite(TestSimplify))
+    suite.addTest(unittest.makeSuite(TestConfig))
+    suite.addTest(unittest.makeSuite(TestPortfolio))
+    suite.addTest(unittest.makeSuite(TestClone))
+    suite.addTest(unittest.makeSuite(TestSerialize))
+    suite.addTest(unittest.makeSuite(TestLoadSimplified))
+    suite.addTest(unittest.makeSuite(TestIterConstraints))
     suite.addTest(unittest.makeSuite(TestSolveTimeLimit))
 
     runner = unittest.TextTestRunner(verbosity=2)
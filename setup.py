@@ -45,13 +45,17 @@ picosatlib = ('picosatlib', {
 
 def gen_modules(version):
     define_macros_val : list[tuple[str, str | None]] | None
+    libraries_val = ['/usr/lib/libcadiback.so'] #, 'libgmpxx.so', 'libgmp.so'
     if platform == "win32" or platform == "cygwin":
         extra_compile_args_val = ['-I../', '-Isrc/', '/std:c++17', "/DINSTALLED_CADIBACK", "/DCMS_FULL_VERSION=\""+version+"\""]
         define_macros_val = [("TRACE", "")]
 
     else:
         extra_compile_args_val = ['-I../', '-Isrc/', '-std=c++17', "-DINSTALLED_CADIBACK"]
-        define_macros_val = [("TRACE", ""), ("CMS_FULL_VERSION", "\""+version+"\"")]
+        # zlib is not linked on Windows, so there load_dimacs() only reads
+        # uncompressed files
+        define_macros_val = [("TRACE", ""), ("CMS_FULL_VERSION", "\""+version+"\""), ("USE_ZLIB", None)]
+        libraries_val.append('z')
 
     modules = Extension(
         name = "pycryptosat",
@@ -62,6 +66,8 @@ def gen_modules(version):
                    "src/cardfinder.cpp",
                    "src/ccnr_cms.cpp",
                    "src/ccnr.cpp",
+                   "src/ccnr_oracle.cpp",
+                   "src/ccnr_oracle_pre.cpp",
                    "src/clauseallocator.cpp",
                    "src/clausecleaner.cpp",
                    "src/cnf.cpp",
@@ -102,7 +108,7 @@ def gen_modules(version):
                    "src/oracle_use.cpp",
                    "src/probe.cpp",
                ],
-        libraries = ['/usr/lib/libcadiback.so'], #, 'libgmpxx.so', 'libgmp.so'
+        libraries = libraries_val,
         extra_compile_args = extra_compile_args_val,
         define_macros=define_macros_val,
         language = "c++",
@@ -104,6 +104,7 @@ class ls_solver
         return _best_found_cost;
     }
     void set_verbosity(uint32_t verb);
+    void set_seed(int seed) { _random_seed = seed; }
 
     //formula
     vector<variable> _vars;
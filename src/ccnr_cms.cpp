@@ -48,7 +48,7 @@ CMS_ccnr::~CMS_ccnr()
     delete ls_s;
 }
 
-lbool CMS_ccnr::main_alter(int64_t mems, vector<uint8_t>& ret)
+lbool CMS_ccnr::main_alter(int64_t mems, int seed, vector<uint8_t>& ret)
 {
     //It might not work well with few number of variables
     //rnovelty could also die/exit(-1), etc.
@@ -64,6 +64,7 @@ lbool CMS_ccnr::main_alter(int64_t mems, vector<uint8_t>& ret)
         return l_Undef;
     }
 
+    ls_s->set_seed(seed);
     int res = ls_s->local_search(nullptr, mems, solver->conf.prefix.c_str(), 50LL*1000);
     if (res) {
       ret.clear();
@@ -658,7 +658,7 @@ vector<uint32_t> CNF::get_outside_lit_incidence()
 {
     vector<uint32_t> inc;
     inc.resize(nVars()*2, 0);
-    if (!okay()) return inc;
+    if (!okay()) return vector<uint32_t>(nVarsOuter()*2, 0);
 
     for(uint32_t i = 0; i < nVars()*2; i++) {
         const Lit l = Lit::toLit(i);
@@ -692,10 +692,10 @@ vector<uint32_t> CNF::get_outside_lit_incidence()
 
 vector<uint32_t> CNF::get_outside_var_incidence()
 {
-    assert(okay());
-
     vector<uint32_t> inc;
     inc.resize(nVarsOuter(), 0);
+    if (!okay()) return inc;
+
     for(uint32_t i = 0; i < nVars()*2; i++) {
         const Lit l = Lit::toLit(i);
         for(const auto& x: watches[l]) {
@@ -730,10 +730,11 @@ vector<uint32_t> CNF::get_outside_var_incidence_also_red()
 {
     vector<uint32_t> inc;
     inc.resize(nVars(), 0);
+    if (!okay()) return vector<uint32_t>(nVarsOuter(), 0);
     for(uint32_t i = 0; i < nVars()*2; i++) {
         const Lit l = Lit::toLit(i);
         for(const auto& x: watches[l]) {
-            if (x.isBin()) {
+            if (x.isBin() && l < x.lit2()) { //don't count twice
                 inc[x.lit2().var()]++;
                 inc[l.var()]++;
             }
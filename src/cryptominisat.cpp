@@ -1181,6 +1181,7 @@ void DLL_PUBLIC SATSolver::add_in_partial_solving_stats()
 
 DLL_PUBLIC std::vector<Lit> SATSolver::get_zero_assigned_lits() const
 {
+    actually_add_clauses_to_threads(data);
     return data->solvers[data->which_solved]->get_zero_assigned_lits();
 }
 
@@ -1217,6 +1218,7 @@ DLL_PUBLIC void SATSolver::log_to_file(std::string filename)
 
 DLL_PUBLIC std::vector<std::pair<Lit, Lit> > SATSolver::get_all_binary_xors() const
 {
+    actually_add_clauses_to_threads(data);
     return data->solvers[0]->get_all_binary_xors();
 }
 
@@ -1224,6 +1226,7 @@ DLL_PUBLIC vector<std::pair<vector<uint32_t>, bool> >
 SATSolver::get_recovered_xors(bool) const
 {
     vector<std::pair<vector<uint32_t>, bool> > ret;
+    actually_add_clauses_to_threads(data);
     Solver& s = *data->solvers[0];
 
     std::pair<vector<uint32_t>, bool> tmp;
@@ -1305,6 +1308,11 @@ DLL_PUBLIC uint64_t SATSolver::get_sum_decisions() const
     return total_decisions;
 }
 
+DLL_PUBLIC double SATSolver::get_sum_search_time() const
+{
+    return data->solvers[0]->sumSearchStats.cpu_time;
+}
+
 DLL_PUBLIC uint64_t SATSolver::get_last_conflicts()
 {
     return get_sum_conflicts() - data->previous_sum_conflicts;
@@ -1354,6 +1362,7 @@ DLL_PUBLIC std::vector<Lit> SATSolver::get_weight_translation() const
 DLL_PUBLIC map<uint32_t, VarMap> SATSolver::update_var_mapping(
         const std::map<uint32_t, VarMap>& vmap)
 {
+    actually_add_clauses_to_threads(data);
     return data->solvers[0]->update_var_mapping(vmap);
 }
 
@@ -1563,9 +1572,15 @@ DLL_PUBLIC void SATSolver::remove_and_clean_all()
 
 DLL_PUBLIC vector<uint32_t> SATSolver::get_var_incidence_also_red()
 {
+    actually_add_clauses_to_threads(data);
     return data->solvers[data->which_solved]->get_outside_var_incidence_also_red();
 }
 
+DLL_PUBLIC vector<double> SATSolver::get_vsids_scores()
+{
+    return data->solvers[data->which_solved]->get_vsids_scores();
+}
+
 DLL_PUBLIC void SATSolver::set_intree_probe(int val)
 {
     for (size_t i = 0; i < data->solvers.size(); ++i) {
@@ -1868,10 +1883,10 @@ DLL_PUBLIC bool SATSolver::minimize_clause(std::vector<Lit>& cl)
 }
 
 
-DLL_PUBLIC std::vector<std::vector<uint8_t>> SATSolver::many_sls(int64_t mems, uint32_t num) {
+DLL_PUBLIC std::vector<std::vector<uint8_t>> SATSolver::many_sls(int64_t mems, uint32_t num, bool oracle) {
     Solver& s = *data->solvers[0];
     actually_add_clauses_to_threads(data);
-    return s.many_sls(mems, num);
+    return s.many_sls(mems, num, oracle);
 }
 
 DLL_PUBLIC bool SATSolver::backbone_simpl(int64_t max_confl, bool& finished)
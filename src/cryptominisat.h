@@ -213,6 +213,7 @@ namespace CMSat {
         uint64_t get_sum_propagations() const; //!< Returns sum of all propagations since construction across all the threads
         uint64_t get_sum_decisions(); //get total number of decisions of all time made by all threads
         uint64_t get_sum_decisions() const; //!< Returns sum of all decisions since construction across all the threads
+        double get_sum_search_time() const; //!< CPU time spent searching, as opposed to simplifying, since construction, measured by the first thread
 
         void print_stats(double wallclock_time_started = 0) const; //print solving stats. Call after solve()/simplify()
         void set_frat(FILE* os); //set frat to ostream, e.g. stdout or a file
@@ -245,7 +246,10 @@ namespace CMSat {
         void remove_and_clean_all();
         lbool probe(Lit l, uint32_t& min_props);
         bool backbone_simpl(int64_t max_confl, bool& finished);
-        std::vector<std::vector<uint8_t>> many_sls(int64_t mems, uint32_t num);
+        //Assignments found by local search, over all variables, that
+        //satisfy the formula. Up to num of them, each search using at most
+        //mems memory accesses
+        std::vector<std::vector<uint8_t>> many_sls(int64_t mems, uint32_t num, bool oracle = false);
 
         //Given a set of literals to enqueue, returns:
         // 1) Whether they imply UNSAT. If "false": UNSAT
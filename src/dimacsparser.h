@@ -59,6 +59,13 @@ class DimacsParser
         const std::string dimacs_spec = "http://www.satcompetition.org/2009/format-benchmarks2009.html";
         const std::string please_read_dimacs = "\nPlease read DIMACS specification at http://www.satcompetition.org/2009/format-benchmarks2009.html";
 
+        //Stats of what was parsed
+        int get_num_header_vars() const { return num_header_vars; }
+        int get_num_header_cls() const { return num_header_cls; }
+        size_t get_norm_clauses_added() const { return norm_clauses_added; }
+        size_t get_xor_clauses_added() const { return xor_clauses_added; }
+        size_t get_line_num() const { return lineNum; }
+
     private:
         std::unique_ptr<FieldGen> fg;
         bool parse_DIMACS_main(C& in);
@@ -231,7 +238,7 @@ bool DimacsParser<C, S>::parseWeight(C& in) {
     if (in.parseInt(slit, lineNum)) {
         if (slit == 0) {
             cerr << "ERROR: Cannot define weight of literal 0!" << endl;
-            exit(-1);
+            return false;
         }
         std::string str = in.getRemain();
         if (!weight->parse(str, lineNum)) return false;
@@ -240,9 +247,8 @@ bool DimacsParser<C, S>::parseWeight(C& in) {
         return true;
     } else {
         cerr << "ERROR: weight is incorrect on line " << lineNum << endl;
-        exit(-1);
+        return false;
     }
-    return true;
 }
 
 template<class C, class S>
@@ -254,8 +260,8 @@ bool DimacsParser<C, S>::parse_header(C& in)
     in.parseString(str);
     if (str == "cnf") {
         if (header_found && strict_header) {
-            std::cerr << "ERROR: CNF header ('p cnf vars cls') found twice in file! Exiting." << endl;
-            exit(-1);
+            std::cerr << "ERROR: CNF header ('p cnf vars cls') found twice in file!" << endl;
+            return false;
         }
         header_found = true;
 
@@ -469,14 +475,14 @@ bool DimacsParser<C, S>::parseComments(C& in, const std::string& str)
         if (str2 == "weight") {
             if (ind_vars_set) {
                 cout << "ERROR: 'ind' and weights cannot be used together, you have to set independent support via 'c p show' " << endl;
-                exit(-1);
+                return false;
             }
             solver->set_weighted(true);
             if (!parseWeight(in)) return false;
         } else if (str2 == "show") {
             if (ind_vars_set) {
                 cout << "ERROR: 'c ind' and 'c p show' cannot be used together" << endl;
-                exit(-1);
+                return false;
             }
             in.skipWhitespace();
             vector<uint32_t> sampl_vars;
@@ -485,7 +491,7 @@ bool DimacsParser<C, S>::parseComments(C& in, const std::string& str)
         } else if (str2 == "optshow") {
             if (ind_vars_set) {
                 cout << "ERROR: 'c ind' and 'c p optshow' cannot be used together" << endl;
-                exit(-1);
+                return false;
             }
             in.skipWhitespace();
             vector<uint32_t> opt_sampl_vars;
@@ -493,7 +499,7 @@ bool DimacsParser<C, S>::parseComments(C& in, const std::string& str)
             solver->set_opt_sampl_vars(opt_sampl_vars);
         } else {
             cerr << "ERROR, 'c p' followed by unknown text: '" << str2 << "'" << endl;
-            exit(-1);
+            return false;
         }
     } else {
         if (verbosity >= 30) {
@@ -634,8 +640,8 @@ bool DimacsParser<C, S>::parse_DIMACS_main(C& in)
                 return false;
             }
             #else
-            cerr << "ERROR: BNN encounered but not enabled in parsing. Exiting." << endl;
-            exit(-1);
+            cerr << "ERROR: BNN encounered but not enabled in parsing." << endl;
+            return false;
             #endif
             break;
         case '\n':
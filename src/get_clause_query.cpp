@@ -119,7 +119,6 @@ bool GetClauseQuery::get_next_constraint(std::vector<Lit>& out, bool& is_xor, bo
             out.push_back(Lit(v, solver->value(v) == l_False));
             if (!simplified) out = solver->clause_outer_numbered(out);
             if (all_vars_outside(out)) {
-                if (!simplified) if (!simplified) solver->map_inter_to_outer(out);
                 units_at++;
                 return true;
             }
@@ -142,7 +141,6 @@ bool GetClauseQuery::get_next_constraint(std::vector<Lit>& out, bool& is_xor, bo
                 out.push_back(w.lit2());
                 if (!simplified) out = solver->clause_outer_numbered(out);
                 if (all_vars_outside(out)) {
-                    if (!simplified) solver->map_inter_to_outer(out);
                     watched_at_sub++;
                     return true;
                 }
@@ -181,7 +179,6 @@ bool GetClauseQuery::get_next_constraint(std::vector<Lit>& out, bool& is_xor, bo
                     if (!simplified) out = solver->clause_outer_numbered(*cl);
                     else {out.clear(); for(const auto& l: *cl) out.push_back(l);}
                     if (all_vars_outside(out)) {
-                        if (!simplified) solver->map_inter_to_outer(out);
                         at_lev[lev]++;
                         return true;
                     }
@@ -201,7 +198,6 @@ bool GetClauseQuery::get_next_constraint(std::vector<Lit>& out, bool& is_xor, bo
                 for(const auto& l: *cl) out.push_back(l);
             }
             if (all_vars_outside(out)) {
-                if (!simplified) solver->map_inter_to_outer(out);
                 at++;
                 return true;
             }
@@ -220,7 +216,6 @@ bool GetClauseQuery::get_next_constraint(std::vector<Lit>& out, bool& is_xor, bo
             }
             // NOTE; we must NEVER return the trivial XOR
             if (!x.trivial() && all_vars_outside(out)) {
-                if (!simplified) solver->map_inter_to_outer(out);
                 is_xor = true;
                 rhs = x.rhs;
                 xor_at++;
@@ -38,6 +38,7 @@ THE SOFTWARE.
 #include "main.h"
 #include "time_mem.h"
 #include "dimacsparser.h"
+#include "opbparser.h"
 #include "cryptominisat.h"
 #include "signalcode.h"
 #include "argparse.hpp"
@@ -64,6 +65,16 @@ Main::Main(int _argc, char** _argv) :
 {
 }
 
+template<class C, class T>
+void Main::readInOPB(SATSolver* solver2, T in)
+{
+    OPBParser<C, SATSolver> parser(solver2, conf.verbosity);
+    if (!parser.parse_OPB(in)) {
+        std::cerr << "ERROR! Could not parse OPB input, error at line " << parser.get_line_num() << endl;
+        exit(-1);
+    }
+}
+
 void Main::readInAFile(SATSolver* solver2, const string& filename) {
     std::unique_ptr<FieldGen> fg = std::make_unique<FGenDouble>();
     solver2->add_sql_tag("filename", filename);
@@ -85,9 +96,21 @@ void Main::readInAFile(SATSolver* solver2, const string& filename) {
         std::exit(1);
     }
 
-    bool strict_header = false;
-    if (!parser.parse_DIMACS(in, strict_header)) {
-        exit(-1);
+    const auto ends_with = [&](const string& suffix) {
+        return filename.size() >= suffix.size()
+            && filename.compare(filename.size() - suffix.size(), suffix.size(), suffix) == 0;
+    };
+    if (opb_input || ends_with(".opb") || ends_with(".opb.gz")) {
+        #ifndef USE_ZLIB
+        readInOPB<StreamBuffer<FILE*, FN>>(solver2, in);
+        #else
+        readInOPB<StreamBuffer<gzFile, GZ>>(solver2, in);
+        #endif
+    } else {
+        bool strict_header = false;
+        if (!parser.parse_DIMACS(in, strict_header)) {
+            exit(-1);
+        }
     }
 
     #ifndef USE_ZLIB
@@ -119,7 +142,13 @@ void Main::readInStandardInput(SATSolver* solver2)
     DimacsParser<StreamBuffer<gzFile, GZ>, SATSolver> parser(solver2, &debugLib, conf.verbosity, fg);
     #endif
 
-    if (!parser.parse_DIMACS(in, false)) exit(-1);
+    if (opb_input) {
+        #ifndef USE_ZLIB
+        readInOPB<StreamBuffer<FILE*, FN>>(solver2, in);
+        #else
+        readInOPB<StreamBuffer<gzFile, GZ>>(solver2, in);
+        #endif
+    } else if (!parser.parse_DIMACS(in, false)) exit(-1);
     #ifdef USE_ZLIB
         gzclose(in);
     #endif
@@ -942,6 +971,10 @@ void Main::add_supported_options() {
         .help("idrup");
     program.add_argument("--sampling")
         .help("Set sampling vars such as '1,84,44'. Can also be set via CNF using 'c p show 1 84 44 0'");
+    program.add_argument("--opb")
+        .flag()
+        .action([&](const auto&) {opb_input = true;})
+        .help("Input is in the OPB pseudo-Boolean format, encoded into clauses. Default for files ending in .opb or .opb.gz");
     program.add_argument("--assump")
         .action([&](const auto& a) {assump_filename = a;})
         .default_value(assump_filename)
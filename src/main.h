@@ -77,6 +77,7 @@ class Main: public MainCommon
         //File reading
         void readInAFile(SATSolver* solver2, const string& filename);
         void readInStandardInput(SATSolver* solver2);
+        template<class C, class T> void readInOPB(SATSolver* solver2, T in);
         void parseInAllFiles(SATSolver* solver2);
 
         //Helper functions
@@ -109,6 +110,7 @@ class Main: public MainCommon
         bool fileNamePresent;
         string result_fname;
         string input_file;
+        bool opb_input = false;
         std::ofstream* resultfile = nullptr;
 
         //Drat checker
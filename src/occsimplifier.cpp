@@ -2020,6 +2020,7 @@ vector<ITEGate> OccSimplifier::recover_ite_gates()
             gate.rhs = lit;
             seen[lit.var()] = 1;
             uint32_t at = 0;
+            uint32_t selector = var_Undef;
 
             for(uint32_t x = 0; x < 2; x++) {
                 Watched& w = out_a_all[i2+x];
@@ -2030,11 +2031,17 @@ vector<ITEGate> OccSimplifier::recover_ite_gates()
                     if (!seen[l.var()]) {
                         gate.lhs[at++] = l;
                         seen[l.var()] = 1;
+                    } else if (x == 1 && l.var() != lit.var()) {
+                        selector = l.var();
                     }
                 }
             }
             assert(at == 3);
 
+            //Put the literal shared by the 2 clauses in the middle, so the
+            //clauses are (rhs V lhs[0] V lhs[1]) and (rhs V lhs[2] V ~lhs[1])
+            if (gate.lhs[0].var() == selector) std::swap(gate.lhs[0], gate.lhs[1]);
+
             //Cleanup
             for(const auto& l: gate.get_all()) seen[l.var()] = 0;
             or_gates.push_back(gate);
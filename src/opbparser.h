@@ -0,0 +1,353 @@
+/*****************************************************************************
+Copyright (C) 2009-2020 Authors of CryptoMiniSat, see AUTHORS file
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+******************************************************************************/
+
+#pragma once
+
+#include "streambuffer.h"
+#include "solvertypesmini.h"
+#include "pbencoder.h"
+#include <cstdlib>
+#include <iostream>
+#include <string>
+#include <vector>
+
+using std::vector;
+using std::cerr;
+using std::cout;
+using std::endl;
+
+namespace CMSat {
+
+// Reads linear pseudo-Boolean constraints in the OPB format of the
+// pseudo-Boolean competitions and encodes them into clauses with PbEncoder:
+//
+//   * #variable= 3 #constraint= 2
+//   min: +1 x1 +2 x2 ;
+//   +1 x1 +2 ~x2 -1 x3 >= 1 ;
+//   +1 x1 +1 x2 = 1 ;
+//
+// Variable xN is variable N-1 of the solver. The objective function is
+// skipped, so only the decision problem is solved. "<=" is accepted too.
+template <class C, class S>
+class OPBParser
+{
+    public:
+        OPBParser(S* solver, unsigned verbosity);
+
+        template <class T> bool parse_OPB(T input_stream);
+        const std::string please_read_opb = "\nPlease read the OPB format description of the pseudo-Boolean competition";
+
+        //Stats of what was parsed
+        int64_t get_num_header_vars() const { return num_header_vars; }
+        int64_t get_num_header_constraints() const { return num_header_constraints; }
+        size_t get_constraints_added() const { return constraints_added; }
+        bool get_objective_found() const { return objective_found; }
+        uint64_t get_aux_vars_added() const { return aux_vars_added; }
+        uint64_t get_clauses_added() const { return clauses_added; }
+        size_t get_line_num() const { return lineNum; }
+
+    private:
+        bool parse_OPB_main(C& in);
+        void skip_space(C& in);
+        bool parse_header(C& in);
+        bool parse_objective(C& in);
+        bool parse_constraint(C& in);
+        bool parse_lit(C& in, Lit& lit);
+        void encode();
+
+        S* solver;
+        unsigned verbosity;
+
+        //Stat
+        size_t lineNum = 1;
+        bool header_found = false;
+        int64_t num_header_vars = 0;
+        int64_t num_header_constraints = 0;
+        size_t constraints_added = 0;
+        bool objective_found = false;
+        uint64_t aux_vars_added = 0;
+        uint64_t clauses_added = 0;
+
+        //The constraints, encoded once all of them are read so that the
+        //auxiliary variables come after the variables of the file
+        uint32_t max_var = 0;
+        vector<Lit> lits;
+        vector<int64_t> coeffs;
+        vector<size_t> starts;
+        vector<int64_t> bounds;
+        vector<PbComparator> comparators;
+};
+
+template<class C, class S>
+OPBParser<C, S>::OPBParser(S* _solver, unsigned _verbosity):
+    solver(_solver), verbosity(_verbosity)
+{
+}
+
+template<class C, class S>
+void OPBParser<C, S>::skip_space(C& in)
+{
+    for (;;) {
+        in.skipWhitespace();
+        if (*in != '\n') return;
+        ++in;
+        lineNum++;
+    }
+}
+
+//Reads "#variable= N #constraint= M", the rest of the first comment line
+template<class C, class S>
+bool OPBParser<C, S>::parse_header(C& in)
+{
+    std::string str;
+    for (;;) {
+        in.parseString(str);
+        if (str.empty()) return true;
+        int64_t* value = nullptr;
+        if (str == "#variable=") value = &num_header_vars;
+        if (str == "#constraint=") value = &num_header_constraints;
+        if (value == nullptr) continue;
+        header_found = true;
+        if (!in.parseInt(*value, lineNum)) return false;
+        if (*value < 0) {
+            std::cerr << "ERROR: " << str << " in the header cannot be less than 0" << endl;
+            return false;
+        }
+        if (value == &num_header_vars && *value >= (1LL<<28)) {
+            std::cerr << "ERROR: " << str << " in the header is out of range" << endl;
+            return false;
+        }
+    }
+}
+
+template<class C, class S>
+bool OPBParser<C, S>::parse_lit(C& in, Lit& lit)
+{
+    bool sign = false;
+    if (*in == '~') {
+        sign = true;
+        ++in;
+    }
+    if (*in != 'x') {
+        std::cerr
+        << "PARSE ERROR! At line " << lineNum
+        << " we expected a variable such as 'x1'"
+        << please_read_opb
+        << endl;
+        return false;
+    }
+    ++in;
+
+    int64_t var;
+    if (!in.parseInt(var, lineNum)) return false;
+    if (var < 1 || var >= (1LL<<28)) {
+        std::cerr
+        << "ERROR! "
+        << "Variable x" << var << " is out of range" << endl
+        << "--> At line " << lineNum
+        << endl;
+        return false;
+    }
+    if (header_found && var > num_header_vars) {
+        std::cerr
+        << "ERROR! "
+        << "Variable requested is larger than the header told us." << endl
+        << " -> var is : x" << var << endl
+        << " -> header told us maximum will be : " << num_header_vars << endl
+        << " -> At line " << lineNum
+        << endl;
+        return false;
+    }
+    lit = Lit(var-1, sign);
+    max_var = std::max<uint32_t>(max_var, var);
+    return true;
+}
+
+//Skips the objective function, up to the ';'
+template<class C, class S>
+bool OPBParser<C, S>::parse_objective(C& in)
+{
+    objective_found = true;
+    for (;;) {
+        if (*in == EOF) {
+            std::cerr << "PARSE ERROR! The objective function is not terminated by ';'" << endl;
+            return false;
+        }
+        if (*in == ';') {
+            ++in;
+            return true;
+        }
+        if (*in == '\n') lineNum++;
+        ++in;
+    }
+}
+
+template<class C, class S>
+bool OPBParser<C, S>::parse_constraint(C& in)
+{
+    for (;;) {
+        skip_space(in);
+        if (*in == '>' || *in == '<' || *in == '=') break;
+
+        int64_t coeff;
+        Lit lit;
+        if (!in.parseInt(coeff, lineNum)) return false;
+        skip_space(in);
+        if (!parse_lit(in, lit)) return false;
+        in.skipWhitespace();
+        if (*in == 'x' || *in == '~') {
+            std::cerr
+            << "ERROR! "
+            << "Non-linear constraints (products of literals) are not supported" << endl
+            << "--> At line " << lineNum
+            << endl;
+            return false;
+        }
+        lits.push_back(lit);
+        coeffs.push_back(coeff);
+    }
+
+    PbComparator cmp;
+    if (*in == '=') {
+        cmp = PbComparator::equal;
+        ++in;
+    } else {
+        cmp = *in == '>' ? PbComparator::at_least : PbComparator::at_most;
+        ++in;
+        if (*in != '=') {
+            std::cerr
+            << "PARSE ERROR! At line " << lineNum
+            << " we expected '>=', '<=' or '='"
+            << please_read_opb
+            << endl;
+            return false;
+        }
+        ++in;
+    }
+
+    int64_t bound;
+    if (!in.parseInt(bound, lineNum)) return false;
+    skip_space(in);
+    if (*in != ';') {
+        std::cerr
+        << "PARSE ERROR! At line " << lineNum
+        << " the constraint is not terminated by ';'"
+        << please_read_opb
+        << endl;
+        return false;
+    }
+    ++in;
+
+    if (!pb_in_range(coeffs.data() + starts.back(), coeffs.size() - starts.back(), bound)) {
+        std::cerr
+        << "ERROR! "
+        << "Coefficients and bound of the constraint are too large" << endl
+        << "--> At line " << lineNum
+        << endl;
+        return false;
+    }
+    starts.push_back(lits.size());
+    bounds.push_back(bound);
+    comparators.push_back(cmp);
+    constraints_added++;
+    return true;
+}
+
+template<class C, class S>
+bool OPBParser<C, S>::parse_OPB_main(C& in)
+{
+    std::string str;
+    starts.assign(1, 0);
+
+    for (;;) {
+        skip_space(in);
+        switch (*in) {
+        case EOF:
+            return true;
+        case '*':
+            ++in;
+            if (lineNum == 1 && !parse_header(in)) return false;
+            in.skipLine();
+            lineNum++;
+            break;
+        case 'm':
+            in.parseString(str);
+            if (str != "min:" && str != "max:") {
+                std::cerr
+                << "PARSE ERROR! At line " << lineNum
+                << " unexpected '" << str << "', we expected 'min:' or a constraint"
+                << please_read_opb
+                << endl;
+                return false;
+            }
+            if (!parse_objective(in)) return false;
+            break;
+        default:
+            if (!parse_constraint(in)) return false;
+            break;
+        }
+    }
+}
+
+template<class C, class S>
+void OPBParser<C, S>::encode()
+{
+    if (solver->nVars() < max_var) {
+        solver->new_vars(max_var - solver->nVars());
+    }
+
+    PbEncoder<S> encoder(solver);
+    vector<Lit> constr_lits;
+    vector<int64_t> constr_coeffs;
+    for (size_t i = 0; i < bounds.size(); i++) {
+        constr_lits.assign(lits.begin() + starts[i], lits.begin() + starts[i+1]);
+        constr_coeffs.assign(coeffs.begin() + starts[i], coeffs.begin() + starts[i+1]);
+        encoder.add(constr_lits, constr_coeffs, bounds[i], comparators[i]);
+    }
+    aux_vars_added = encoder.get_aux_vars_added();
+    clauses_added = encoder.get_clauses_added();
+}
+
+template <class C, class S>
+template <class T>
+bool OPBParser<C, S>::parse_OPB(T input_stream)
+{
+    C in(input_stream);
+    if (!parse_OPB_main(in)) return false;
+
+    if (num_header_vars > max_var) max_var = num_header_vars;
+    encode();
+
+    if (verbosity) {
+        cout
+        << "c -- OPB constraints added: " << constraints_added << endl
+        << "c -- OPB auxiliary vars added: " << aux_vars_added << endl
+        << "c -- OPB clauses added: " << clauses_added << endl;
+        if (objective_found) {
+            cout << "c WARNING: the objective function is ignored, only the constraints are solved" << endl;
+        }
+    }
+
+    return true;
+}
+
+}
@@ -0,0 +1,350 @@
+/*****************************************************************************
+Copyright (C) 2009-2020 Authors of CryptoMiniSat, see AUTHORS file
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+******************************************************************************/
+
+#pragma once
+
+#include "solvertypesmini.h"
+#include <algorithm>
+#include <cstdint>
+#include <cstdlib>
+#include <deque>
+#include <utility>
+#include <vector>
+
+namespace CMSat {
+
+using std::vector;
+
+enum class PbComparator { at_most, at_least, equal };
+
+// Sums of coefficients must stay below this while encoding
+static const int64_t max_pb_sum = (int64_t)1 << 62;
+
+// Whether sum(coeffs[i] * l_i) <cmp> bound is small enough to be encoded
+// without overflows
+inline bool pb_in_range(const int64_t* coeffs, size_t num_coeffs, int64_t bound)
+{
+    int64_t sum = 0;
+    for (size_t i = 0; i <= num_coeffs; i++) {
+        const int64_t value = i < num_coeffs ? coeffs[i] : bound;
+        if (value <= -max_pb_sum || value >= max_pb_sum || (sum += std::abs(value)) >= max_pb_sum) {
+            return false;
+        }
+    }
+    return true;
+}
+
+// Encodes cardinality and pseudo-Boolean constraints into clauses over new
+// auxiliary variables, added to solver, which needs new_var(), nVars() and
+// add_clause(). Callers must check the constraints with pb_in_range().
+//
+// Constraints are normalized to sum(w_i * l_i) <= k with 0 < w_i <= k, and
+// encoded by size: pairwise for at most one of a few literals, a sequential
+// (weight) counter when the bound is small, a totalizer for large
+// cardinality bounds and an adder network for large pseudo-Boolean ones.
+template <class S>
+class PbEncoder
+{
+public:
+    explicit PbEncoder(S* _solver) : solver(_solver) {}
+
+    void add(const vector<Lit>& lits, const vector<int64_t>& coeffs, int64_t bound, PbComparator cmp)
+    {
+        Terms terms;
+        if (cmp != PbComparator::at_least) {
+            for (size_t i = 0; i < lits.size(); i++) {
+                terms.push_back(std::make_pair(coeffs[i], lits[i]));
+            }
+            at_most(terms, bound);
+        }
+        if (cmp != PbComparator::at_most) {
+            terms.clear();
+            for (size_t i = 0; i < lits.size(); i++) {
+                terms.push_back(std::make_pair(-coeffs[i], lits[i]));
+            }
+            at_most(terms, -bound);
+        }
+    }
+
+    //Stats of the encoding
+    uint64_t get_aux_vars_added() const { return aux_vars_added; }
+    uint64_t get_clauses_added() const { return clauses_added; }
+
+private:
+    typedef vector<std::pair<int64_t, Lit>> Terms;
+
+    // Largest number of auxiliary variables of a sequential weight counter
+    static const int64_t max_counter_vars = 1 << 16;
+
+    S* solver;
+    uint64_t aux_vars_added = 0;
+    uint64_t clauses_added = 0;
+
+    Lit new_lit()
+    {
+        solver->new_var();
+        aux_vars_added++;
+        return Lit(solver->nVars() - 1, false);
+    }
+
+    void add_clause(const vector<Lit>& lits)
+    {
+        solver->add_clause(lits);
+        clauses_added++;
+    }
+
+    // sum(w_i * l_i) <= k, any weights
+    void at_most(Terms& terms, int64_t k)
+    {
+        size_t num = 0;
+        // term may be the element overwritten, so it is read first
+        for (const auto& term: terms) {
+            if (term.first > 0) {
+                terms[num++] = term;
+            } else if (term.first < 0) {
+                // w*l = w + (-w)*~l
+                k -= term.first;
+                terms[num++] = std::make_pair(-term.first, ~term.second);
+            }
+        }
+        terms.resize(num);
+        if (k < 0) {
+            add_clause({});
+            return;
+        }
+
+        // Literals that alone exceed the bound are false
+        int64_t sum = 0;
+        num = 0;
+        for (const auto& term: terms) {
+            if (term.first > k) {
+                add_clause({~term.second});
+            } else {
+                sum += term.first;
+                terms[num++] = term;
+            }
+        }
+        terms.resize(num);
+        if (sum <= k) {
+            return;
+        }
+
+        bool same_weights = true;
+        for (const auto& term: terms) {
+            same_weights &= term.first == terms[0].first;
+        }
+        if (same_weights) {
+            vector<Lit> lits;
+            for (const auto& term: terms) {
+                lits.push_back(term.second);
+            }
+            cardinality(lits, k / terms[0].first);
+        } else if (k <= max_counter_vars / (int64_t)terms.size()) {
+            sequential_counter(terms, k);
+        } else {
+            adder(terms, k);
+        }
+    }
+
+    // At most k of lits, 0 <= k < lits.size()
+    void cardinality(const vector<Lit>& lits, const int64_t k)
+    {
+        if (k == 0) {
+            for (const Lit lit: lits) {
+                add_clause({~lit});
+            }
+        } else if (k == 1 && lits.size() <= 6) {
+            for (size_t i = 0; i < lits.size(); i++) {
+                for (size_t j = i+1; j < lits.size(); j++) {
+                    add_clause({~lits[i], ~lits[j]});
+                }
+            }
+        } else if (k < 8) {
+            Terms terms;
+            for (const Lit lit: lits) {
+                terms.push_back(std::make_pair(1, lit));
+            }
+            sequential_counter(terms, k);
+        } else {
+            const vector<Lit> counts = totalizer(lits, 0, lits.size(), k+1);
+            add_clause({~counts[k]});
+        }
+    }
+
+    // Sequential weight counter of Hölldobler et al.: prev[j] means that the
+    // weights of the literals so far sum to more than j
+    void sequential_counter(const Terms& terms, const int64_t k)
+    {
+        vector<Lit> prev;
+        vector<Lit> cur;
+        for (size_t i = 0; i < terms.size(); i++) {
+            const int64_t w = terms[i].first;
+            const Lit x = terms[i].second;
+            if (i > 0) {
+                add_clause({~x, ~prev[k - w]});
+            }
+            if (i + 1 == terms.size()) {
+                break;
+            }
+            cur.clear();
+            for (int64_t j = 0; j < k; j++) {
+                cur.push_back(new_lit());
+            }
+            for (int64_t j = 0; j < w; j++) {
+                add_clause({~x, cur[j]});
+            }
+            if (i > 0) {
+                for (int64_t j = 0; j < k; j++) {
+                    add_clause({~prev[j], cur[j]});
+                }
+                for (int64_t j = 0; j < k - w; j++) {
+                    add_clause({~x, ~prev[j], cur[j + w]});
+                }
+            }
+            std::swap(prev, cur);
+        }
+    }
+
+    // Unary count of lits[begin, end), up to cap: count[j] is implied when
+    // more than j of them are true
+    vector<Lit> totalizer(const vector<Lit>& lits, size_t begin, size_t end, size_t cap)
+    {
+        if (end - begin == 1) {
+            return {lits[begin]};
+        }
+        const size_t mid = begin + (end - begin)/2;
+        const vector<Lit> left = totalizer(lits, begin, mid, cap);
+        const vector<Lit> right = totalizer(lits, mid, end, cap);
+        vector<Lit> count(std::min(left.size() + right.size(), cap));
+        for (Lit& lit: count) {
+            lit = new_lit();
+        }
+        vector<Lit> lits_tmp;
+        for (size_t i = 0; i <= left.size(); i++) {
+            for (size_t j = 0; j <= right.size(); j++) {
+                if (i + j == 0 || i + j > count.size()) {
+                    continue;
+                }
+                lits_tmp.clear();
+                if (i > 0) {
+                    lits_tmp.push_back(~left[i-1]);
+                }
+                if (j > 0) {
+                    lits_tmp.push_back(~right[j-1]);
+                }
+                lits_tmp.push_back(count[i+j-1]);
+                add_clause(lits_tmp);
+            }
+        }
+        return count;
+    }
+
+    // Adder network of Eén and Sörensson: the binary sum of the weights of
+    // the true literals, compared to k
+    void adder(const Terms& terms, const int64_t k)
+    {
+        vector<std::deque<Lit>> buckets;
+        for (const auto& term: terms) {
+            for (size_t bit = 0; (term.first >> bit) != 0; bit++) {
+                if ((term.first >> bit) & 1) {
+                    buckets.resize(std::max(buckets.size(), bit+1));
+                    buckets[bit].push_back(term.second);
+                }
+            }
+        }
+
+        vector<Lit> sum_bits;
+        for (size_t bit = 0; bit < buckets.size(); bit++) {
+            while (buckets[bit].size() >= 2) {
+                const Lit a = buckets[bit][0];
+                const Lit b = buckets[bit][1];
+                const bool full = buckets[bit].size() >= 3;
+                const Lit c = full ? buckets[bit][2] : lit_Undef;
+                buckets[bit].erase(buckets[bit].begin(), buckets[bit].begin() + (full ? 3 : 2));
+                const Lit sum = new_lit();
+                const Lit carry = new_lit();
+                if (full) {
+                    full_adder(a, b, c, sum, carry);
+                } else {
+                    half_adder(a, b, sum, carry);
+                }
+                buckets[bit].push_back(sum);
+                buckets.resize(std::max(buckets.size(), bit+2));
+                buckets[bit+1].push_back(carry);
+            }
+            sum_bits.push_back(buckets[bit].empty() ? lit_Undef : buckets[bit][0]);
+        }
+
+        // The sum is not larger than k: for every bit where k has a 0, the
+        // sum must not have a 1 there and be equal to k above it
+        vector<Lit> lits_tmp;
+        for (size_t i = 0; i < sum_bits.size(); i++) {
+            if (sum_bits[i] == lit_Undef || ((k >> i) & 1)) {
+                continue;
+            }
+            lits_tmp.assign(1, ~sum_bits[i]);
+            bool satisfied = false;
+            for (size_t j = i+1; j < sum_bits.size() && !satisfied; j++) {
+                const bool k_bit = (k >> j) & 1;
+                if (sum_bits[j] == lit_Undef) {
+                    satisfied = k_bit;
+                } else {
+                    lits_tmp.push_back(k_bit ? ~sum_bits[j] : sum_bits[j]);
+                }
+            }
+            if (!satisfied) {
+                add_clause(lits_tmp);
+            }
+        }
+    }
+
+    void half_adder(const Lit a, const Lit b, const Lit sum, const Lit carry)
+    {
+        add_clause({~a, ~b, ~sum});
+        add_clause({a, b, ~sum});
+        add_clause({~a, b, sum});
+        add_clause({a, ~b, sum});
+        add_clause({~a, ~b, carry});
+        add_clause({a, ~carry});
+        add_clause({b, ~carry});
+    }
+
+    void full_adder(const Lit a, const Lit b, const Lit c, const Lit sum, const Lit carry)
+    {
+        add_clause({~a, ~b, ~c, sum});
+        add_clause({~a, b, c, sum});
+        add_clause({a, ~b, c, sum});
+        add_clause({a, b, ~c, sum});
+        add_clause({a, b, c, ~sum});
+        add_clause({~a, ~b, c, ~sum});
+        add_clause({~a, b, ~c, ~sum});
+        add_clause({a, ~b, ~c, ~sum});
+        add_clause({~a, ~b, carry});
+        add_clause({~a, ~c, carry});
+        add_clause({~b, ~c, carry});
+        add_clause({a, b, ~carry});
+        add_clause({a, c, ~carry});
+        add_clause({b, c, ~carry});
+    }
+};
+
+}
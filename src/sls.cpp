@@ -23,6 +23,7 @@ THE SOFTWARE.
 #include "sls.h"
 #include "solver.h"
 #include "ccnr_cms.h"
+#include "ccnr_oracle_pre.h"
 #include "solvertypesmini.h"
 
 using namespace CMSat;
@@ -41,12 +42,51 @@ vector<vector<uint8_t>> SLS::run_alter(const int64_t mems, uint32_t num) {
     for(uint32_t i = 0; i < num; i++) {
       CMS_ccnr ccnr(solver);
       vector<uint8_t> sol;
-      auto ret = ccnr.main_alter(mems, sol);
+      auto ret = ccnr.main_alter(mems, rnd_uint(solver->mtrand, 1U << 30), sol);
       if (ret == l_True) sols.push_back(sol);
     }
     return sols;
 }
 
+// Same as run_alter(), with the local search of the oracle, which has no
+// lower limit on the size of the problem
+vector<vector<uint8_t>> SLS::run_alter_oracle(const int64_t mems, uint32_t num) {
+    vector<vector<uint8_t>> sols;
+    const uint32_t nvars = solver->nVars();
+    if (nvars == 0) return sols;
+
+    auto orc_lit = [](const Lit l) { return sspp::MkLit(l.var()+1, !l.sign()); };
+    vector<vector<sspp::Lit>> cls;
+    for(const auto& off: solver->longIrredCls) {
+        const Clause* cl = solver->cl_alloc.ptr(off);
+        cls.push_back({});
+        for(const Lit l: *cl) cls.back().push_back(orc_lit(l));
+    }
+    for(uint32_t i = 0; i < nvars*2; i++) {
+        const Lit l1 = Lit::toLit(i);
+        for(const auto& w: solver->watches[l1]) {
+            if (!w.isBin() || w.red() || l1 > w.lit2()) continue;
+            cls.push_back({orc_lit(l1), orc_lit(w.lit2())});
+        }
+    }
+    for(uint32_t i = 0; i < nvars; i++) {
+        if (solver->value(i) == l_Undef) continue;
+        cls.push_back({orc_lit(Lit(i, solver->value(i) == l_False))});
+    }
+    if (cls.empty()) return sols;
+
+    vector<int8_t> assump_map(nvars+1, 2);
+    CCNROraclePre ccnr(solver);
+    ccnr.init(cls, nvars, &assump_map);
+    for(uint32_t i = 0; i < num; i++) {
+      ccnr.reinit();
+      if (!ccnr.run(mems)) continue;
+      const auto& sol = ccnr.get_sol();
+      sols.push_back(vector<uint8_t>(sol.begin()+1, sol.begin()+1+nvars));
+    }
+    return sols;
+}
+
 lbool SLS::run_ccnr(const uint32_t num_sls_called)
 {
     CMS_ccnr ccnr(solver);
@@ -35,6 +35,7 @@ public:
     ~SLS() = default;
     lbool run(const uint32_t num_sls_called);
     vector<vector<uint8_t>> run_alter(const int64_t mems, uint32_t num);
+    vector<vector<uint8_t>> run_alter_oracle(const int64_t mems, uint32_t num);
 
 private:
     Solver* solver;
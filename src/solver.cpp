@@ -3056,6 +3056,7 @@ vector<Xor> Solver::get_recovered_xors() {
     vector<Xor> xors_ret;
     if (!okay()) return xors_ret;
 
+    conf.global_timeout_multiplier = conf.orig_global_timeout_multiplier;
     lbool ret = execute_inprocess_strategy(false, "occ-xor");
     if (ret == l_False) return xors_ret;
 
@@ -3308,6 +3309,7 @@ vector<OrGate> Solver::get_recovered_or_gates()
     if (!okay()) {
         return vector<OrGate>();
     }
+    conf.global_timeout_multiplier = conf.orig_global_timeout_multiplier;
 
     vector<OrGate> or_gates = occsimplifier->recover_or_gates();
 
@@ -3325,6 +3327,7 @@ vector<ITEGate> Solver::get_recovered_ite_gates()
     if (!okay()) {
         return vector<ITEGate>();
     }
+    conf.global_timeout_multiplier = conf.orig_global_timeout_multiplier;
 
     vector<ITEGate> or_gates = occsimplifier->recover_ite_gates();
 
@@ -3793,7 +3796,43 @@ void Solver::set_outer_lit_weight(const Lit lit, const float weight) {
     varData[l.var()].weight = l.sign() ? 1.0F-weight : weight;
 }
 
-vector<vector<uint8_t>> Solver::many_sls(int64_t mems, uint32_t num) {
+vector<vector<uint8_t>> Solver::many_sls(int64_t mems, uint32_t num, bool oracle) {
+    vector<vector<uint8_t>> sols;
+    if (!okay()) return sols;
+    assert(decisionLevel() == 0);
+
     SLS sls(this);
-    return sls.run_alter(mems, num);
+    const auto found = oracle ? sls.run_alter_oracle(mems, num) : sls.run_alter(mems, num);
+
+    // The local search only sees the clauses over the internal variables.
+    // Set the fixed variables, skip assignments that break an XOR, then
+    // extend them to the removed variables like a model.
+    const vector<lbool> orig_model = model;
+    for(const auto& sol: found) {
+        model.assign(nVarsOuter(), l_Undef);
+        for(uint32_t i = 0; i < nVarsOuter(); i++) {
+            if (value(i) != l_Undef) model[i] = value(i);
+            else if (i < nVars() && varData[i].removed == Removed::none) {
+                model[i] = boolToLBool(sol[i]);
+            }
+        }
+        bool xors_ok = true;
+        for(const auto& x: xorclauses) {
+            bool rhs = false;
+            for(const uint32_t v: x) rhs ^= model[v] == l_True;
+            if (rhs != x.rhs) {xors_ok = false; break;}
+        }
+        if (!xors_ok) continue;
+
+        updateArrayRev(model, inter_to_outerMain);
+        SolutionExtender extender(this, occsimplifier);
+        extender.extend();
+        vector<uint8_t> out(model.size());
+        for(size_t i = 0; i < model.size(); i++) out[i] = model[i] == l_True;
+        sols.push_back(std::move(out));
+    }
+    model = orig_model;
+    verb_print(1, "[sls-many] searches: " << num << " found: " << found.size()
+        << " kept: " << sols.size());
+    return sols;
 }